@@ -0,0 +1,881 @@
+#!/usr/bin/env python3
+"""
+Shared asset pipeline used by all optimize/compress scripts.
+
+1. Scan static directories once (os.scandir based walk).
+2. Describe each unit of work as a Job: source file, output files, encoder settings
+   and a module-level build function.
+3. Keep a persistent build manifest (.asset-cache/build-manifest.json) with
+   source content hashes, encoder settings and output hashes.
+4. Skip any job whose source, settings and outputs are unchanged since the last run.
+5. Run jobs as a stream of bounded stages: check (hash / prefetch, I/O threads) ->
+   build (decode, transform, encode on CPU workers; writes are buffered) ->
+   write (outputs + manifest hashes, I/O threads). Scripts describe what they
+   build as AssetClass configs instead of their own scan/build loops.
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import io
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+import PIL
+from PIL import ExifTags, Image, ImageChops, ImageOps, ImageStat, features
+
+import telemetry
+import transforms
+
+# GFX100S frames (11648x8736, 102MP) are above Pillow's default decompression-bomb
+# warning limit; allow exactly that, Pillow still refuses anything over twice it
+Image.MAX_IMAGE_PIXELS = max(Image.MAX_IMAGE_PIXELS or 0, 11648 * 8736)
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak RSS is not reported
+    resource = None
+
+try:
+    # Pillow >= 11.2 ships AVIF natively; older versions need the pillow-avif-plugin package
+    AVIF_AVAILABLE = features.check("avif")
+except ValueError:
+    AVIF_AVAILABLE = False
+if not AVIF_AVAILABLE:
+    try:
+        import pillow_avif  # noqa: F401  (registers the AVIF plugin)
+        AVIF_AVAILABLE = True
+    except ImportError:
+        pass
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+STATIC_DIR = PROJECT_ROOT / "static"
+IMG_DIR = STATIC_DIR / "img"
+PHOTOGRAPHY_DIR = STATIC_DIR / "photography"
+
+CACHE_DIR = PROJECT_ROOT / ".asset-cache"
+BUILD_MANIFEST_FILE = CACHE_DIR / "build-manifest.json"
+MANIFEST_VERSION = 1
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+# BlurHash placeholders need NumPy; without it assets are simply written without one
+PLACEHOLDERS_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+# Low-memory decode (load_resized): JPEGs are DCT-scaled to at least this multiple
+# of the target size before the final LANCZOS pass
+DRAFT_OVERSAMPLE = 2
+# Resize with an integer box reduction first, down to this multiple of the target
+REDUCING_GAP = 3.0
+# EXIF orientations that swap width and height
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+# Responsive width ladder; widths at or above an asset's own width are not generated
+RESPONSIVE_WIDTHS = (480, 800, 1200, 1920, 2912)
+VARIANT_RE = re.compile(r"^(?P<base>.+)-(?P<width>\d+)w$")
+# AVIF: start at WebP quality + offset, raise by STEP until fidelity matches the WebP
+AVIF_QUALITY_OFFSET = -20
+AVIF_QUALITY_STEP = 8
+AVIF_MAX_ATTEMPTS = 3
+AVIF_ERROR_TOLERANCE = 0.02
+# libavif speed (0 slowest/smallest .. 10 fastest); 6 is ~4x slower than WebP on a 2912px frame
+AVIF_SPEED = 6
+# Slowest/best lossless WebP effort, for alpha images that may beat their lossy encode
+LOSSLESS_WEBP_METHOD = 6
+# Public manifest consumed by src/data/assetManifest.ts (srcset, dimensions, bytes)
+ASSET_MANIFEST_FILE = PROJECT_ROOT / "src" / "data" / "asset-manifest.json"
+
+# Serial by default: a decoded 100MP frame is ~300MB, so parallelism is opt-in (-j N)
+DEFAULT_WORKERS = 1
+# Recycle worker processes periodically so allocator fragmentation from huge frames doesn't accumulate
+MAX_TASKS_PER_CHILD = 16
+# Threads for the disk-bound stages (source hashing / prefetch, output writes)
+DEFAULT_IO_THREADS = 4
+# Seconds between build-manifest saves while a run is in progress
+MANIFEST_SAVE_INTERVAL = 2.0
+
+
+def rel_path(path) -> str:
+    """Project-relative POSIX path used as a stable manifest key."""
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(PROJECT_ROOT).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def file_hash(path) -> str:
+    """Streaming BLAKE2b content hash (never loads the whole file)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_BYTES)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def settings_hash(settings: dict) -> str:
+    """Hash of encoder settings plus the Pillow version (encoder output depends on it)."""
+    payload = json.dumps({"settings": settings, "pillow": PIL.__version__}, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def scan_images(root, extensions, exclude_dirs=(), recursive=True):
+    """
+    Yield image files under root whose suffix (case-insensitive) is in extensions.
+    Directories named in exclude_dirs are pruned instead of filtered afterwards.
+    """
+    extensions = {e.lower() for e in extensions}
+    exclude_dirs = set(exclude_dirs)
+    stack = [Path(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = sorted(os.scandir(current), key=lambda e: e.name)
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if recursive and entry.name not in exclude_dirs:
+                    stack.append(Path(entry.path))
+            elif os.path.splitext(entry.name)[1].lower() in extensions:
+                yield Path(entry.path)
+
+
+def fit_within(size, max_width=None, max_height=None):
+    """Return (w, h) scaled down to fit the box, never upscaled."""
+    w, h = size
+    ratio = 1.0
+    if max_width:
+        ratio = min(ratio, max_width / w)
+    if max_height:
+        ratio = min(ratio, max_height / h)
+    if ratio >= 1:
+        return w, h
+    return max(1, int(w * ratio)), max(1, int(h * ratio))
+
+
+def open_oriented(path):
+    """Open an image and apply its EXIF orientation."""
+    img = Image.open(path)
+    return ImageOps.exif_transpose(img)
+
+
+def load_resized(path, max_width=None, max_height=None, transform_ops=None):
+    """
+    Decode an image already oriented and fitted within the box, without ever
+    holding the full-resolution frame when it is not needed.
+    1. JPEGs use draft mode: libjpeg's DCT scaling decodes straight to the
+       smallest 1/2, 1/4 or 1/8 scale that is still >= DRAFT_OVERSAMPLE x the target
+       (an 11648x8736 GFX frame for 2912px becomes a 5824x4368 decode, 1/4 the memory).
+    2. The final LANCZOS pass uses reducing_gap, so other formats get a cheap
+       integer box reduction before the expensive filter.
+    3. EXIF orientation is applied last, on the small image.
+    With transform_ops (see transforms.py) the frame is decoded at full size instead,
+    so crop boxes are exact source pixels. It is oriented, transformed, then fitted,
+    still from a single decode.
+    Returns (image, original_size); original_size is in display orientation.
+    """
+    with Image.open(path) as src:
+        with telemetry.stage("decode"):
+            # getexif() already decodes PNGs, so it is timed as part of the decode
+            transposed = src.getexif().get(ExifTags.Base.Orientation, 1) in TRANSPOSED_ORIENTATIONS
+            raw_w, raw_h = src.size
+            original_size = (raw_h, raw_w) if transposed else (raw_w, raw_h)
+            target_w, target_h = fit_within(original_size, max_width, max_height)
+            raw_target = (target_h, target_w) if transposed else (target_w, target_h)
+            if src.format == "JPEG" and raw_target != src.size and not transform_ops:
+                src.draft(src.mode, (raw_target[0] * DRAFT_OVERSAMPLE, raw_target[1] * DRAFT_OVERSAMPLE))
+            src.load()
+        img = src
+        if transform_ops:
+            with telemetry.stage("transform"):
+                img = transforms.apply_transforms(ImageOps.exif_transpose(src), transform_ops)
+            raw_target = fit_within(img.size, max_width, max_height)
+        with telemetry.stage("resize"):
+            if img.mode == "P":
+                # Palette images resize with NEAREST; expand so LANCZOS applies
+                img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+            if img.size != raw_target:
+                img = img.resize(raw_target, Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
+            elif img is src:
+                img = src.copy()  # detach from the file before it is closed
+        if transform_ops:
+            return img, original_size  # already oriented
+        with telemetry.stage("orient"):
+            return ImageOps.exif_transpose(img), original_size
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def encode_image(img, fmt, **save_kwargs) -> bytes:
+    """Encode to an in-memory buffer (no temp files on disk)."""
+    buf = io.BytesIO()
+    with telemetry.stage(f"encode_{fmt.lower()}"):
+        img.save(buf, fmt, **save_kwargs)
+    telemetry.count(f"encoded_bytes_{fmt.lower()}", buf.tell())
+    return buf.getvalue()
+
+
+def resolve_quality(img, source, settings, fmt="WEBP", save_kwargs=None) -> int:
+    """
+    settings["quality"], or with settings["target_ssim"] the lowest quality reaching
+    that SSIM (see perceptual_quality.py; imported lazily since it needs NumPy).
+    """
+    if not settings.get("target_ssim"):
+        return settings["quality"]
+    import perceptual_quality
+    with telemetry.stage("quality_search"):
+        return perceptual_quality.resolve_quality(img, source, settings, fmt, save_kwargs)
+
+
+_write_buffer = threading.local()
+
+
+@contextmanager
+def deferred_writes():
+    """
+    Collect this thread's write_atomic calls as (path, data) pairs instead of
+    writing them; the pipeline hands them to its write stage.
+    """
+    writes = []
+    previous = getattr(_write_buffer, "writes", None)
+    _write_buffer.writes = writes
+    try:
+        yield writes
+    finally:
+        _write_buffer.writes = previous
+
+
+def write_atomic(path, data: bytes):
+    """Write bytes via a temp file + rename so readers never see a half-written asset."""
+    path = Path(path)
+    buffered = getattr(_write_buffer, "writes", None)
+    if buffered is not None:
+        buffered.append((path, data))
+        return
+    tmp_path = path.with_name(path.name + ".tmp")
+    with telemetry.stage("write"):
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    telemetry.count("written_bytes", len(data))
+
+
+def public_url(path) -> str:
+    """URL the site serves a static file under (e.g. /img/yukari.webp)."""
+    return "/" + Path(path).resolve().relative_to(STATIC_DIR).as_posix()
+
+
+def variant_path(path, width) -> Path:
+    """DSCF0192.webp -> DSCF0192-480w.webp"""
+    path = Path(path)
+    return path.with_name(f"{path.stem}-{width}w{path.suffix}")
+
+
+def make_placeholder(img):
+    """BlurHash for img (see placeholders.py), or None when NumPy is unavailable."""
+    if not PLACEHOLDERS_AVAILABLE:
+        return None
+    import placeholders
+    with telemetry.stage("placeholder"):
+        return placeholders.blurhash(img)
+
+
+def _rms_error(reference, encoded: bytes) -> float:
+    """Mean per-band RMS difference between a reference image and a decoded encode."""
+    with Image.open(io.BytesIO(encoded)) as decoded:
+        decoded = decoded.convert(reference.mode)
+        return sum(ImageStat.Stat(ImageChops.difference(reference, decoded)).rms) / len(reference.getbands())
+
+
+def encode_matched_avif(img, webp_data: bytes, webp_quality: int):
+    """
+    Encode an AVIF whose fidelity matches the WebP encode of the same pixels.
+    Starts from the mapped quality and raises it until the AVIF's error against the
+    reference is no worse than the WebP's. Returns (avif_bytes, quality) or (None, None).
+    """
+    reference = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+    target_error = _rms_error(reference, webp_data) * (1 + AVIF_ERROR_TOLERANCE)
+    quality = max(1, min(100, webp_quality + AVIF_QUALITY_OFFSET))
+    for _ in range(AVIF_MAX_ATTEMPTS):
+        data = encode_image(reference, "AVIF", quality=quality, speed=AVIF_SPEED)
+        if _rms_error(reference, data) <= target_error:
+            return data, quality
+        quality = min(100, quality + AVIF_QUALITY_STEP)
+    return None, None
+
+
+def _save_variant(img, out_path, fmt, save_kwargs, avif, lossless_alpha=False) -> dict:
+    """
+    Write one width of an asset, plus an AVIF sibling when it is smaller at matched fidelity.
+    With lossless_alpha, images with an alpha channel are also encoded as lossless
+    WebP and whichever encode is smaller is written.
+    """
+    data = encode_image(img, fmt, **save_kwargs)
+    lossless = False
+    if lossless_alpha and fmt == "WEBP" and img.mode in ("RGBA", "LA"):
+        with telemetry.stage("lossless"):
+            kwargs = {k: v for k, v in save_kwargs.items() if k != "quality"}
+            lossless_data = encode_image(img, fmt, lossless=True, quality=100, method=LOSSLESS_WEBP_METHOD, **kwargs)
+        if len(lossless_data) < len(data):
+            data, lossless = lossless_data, True
+    write_atomic(out_path, data)
+    entry = {"src": public_url(out_path), "width": img.width, "height": img.height, "bytes": len(data)}
+    if lossless:
+        entry["lossless"] = True
+
+    avif_path = Path(out_path).with_suffix(".avif")
+    avif_data = None
+    # A lossless WebP has zero error, which no lossy AVIF can match
+    if avif and not lossless:
+        with telemetry.stage("avif"):
+            avif_data, avif_quality = encode_matched_avif(img, data, save_kwargs.get("quality", 80))
+    if avif_data is not None and len(avif_data) < len(data):
+        write_atomic(avif_path, avif_data)
+        entry["avif"] = {"src": public_url(avif_path), "bytes": len(avif_data), "quality": avif_quality}
+    elif avif_path.exists():
+        # AVIF lost (or is disabled): don't leave a stale larger/old file behind
+        avif_path.unlink()
+    return entry
+
+
+def save_with_variants(img, main_path, widths=RESPONSIVE_WIDTHS, fmt="WEBP", avif=None, lossless_alpha=False,
+                       **save_kwargs) -> dict:
+    """
+    Save the (already resized) main image plus every ladder width below it.
+    Each smaller width is downscaled from the previous step rather than from the
+    original, so the whole ladder costs a single decode and cheap resizes.
+    With avif (default: AVIF_AVAILABLE) each width also gets an .avif sibling when
+    it beats the WebP at matched fidelity. lossless_alpha lets alpha images use a
+    lossless WebP where it is smaller (see _save_variant). A BlurHash placeholder is added from the
+    smallest width.
+    Returns the asset manifest entry; its "variants" include the main image.
+    """
+    if avif is None:
+        avif = AVIF_AVAILABLE
+    main_path = Path(main_path)
+    main = _save_variant(img, main_path, fmt, save_kwargs, avif, lossless_alpha)
+    variants = [main]
+
+    # EXIF stays on the main image only; small variants are display-only
+    variant_kwargs = {k: v for k, v in save_kwargs.items() if k != "exif"}
+    current = img
+    for width in sorted((w for w in widths if w < img.width), reverse=True):
+        height = max(1, round(current.height * width / current.width))
+        with telemetry.stage("resize"):
+            current = current.resize((width, height), Image.Resampling.LANCZOS)
+        variants.append(_save_variant(current, variant_path(main_path, width), fmt, variant_kwargs, avif,
+                                      lossless_alpha))
+
+    variants.sort(key=lambda v: v["width"])
+    asset = {"src": main["src"], "width": img.width, "height": img.height,
+             "bytes": main["bytes"], "variants": variants}
+    if "avif" in main:
+        asset["avif"] = main["avif"]
+    # Placeholder from the smallest variant, which is already decoded in memory
+    placeholder = make_placeholder(current)
+    if placeholder:
+        asset["blurhash"] = placeholder
+    return asset
+
+
+def asset_extra_outputs(asset: dict) -> list:
+    """Project-relative paths of the generated variants and AVIF siblings (for result["extra_outputs"])."""
+    srcs = [v["src"] for v in asset["variants"] if v["src"] != asset["src"]]
+    srcs += [v["avif"]["src"] for v in asset["variants"] if "avif" in v]
+    return [rel_path(STATIC_DIR / src.lstrip("/")) for src in srcs]
+
+
+def update_asset_manifest(results, path=ASSET_MANIFEST_FILE):
+    """
+    Merge the "asset" entries of build results into the public asset manifest
+    (src/data/asset-manifest.json), dropping entries whose file no longer exists.
+    """
+    path = Path(path)
+    manifest = {}
+    if path.exists():
+        try:
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: rebuilding unreadable asset manifest {path}: {e}")
+
+    for r in results:
+        asset = r.get("asset")
+        if asset:
+            manifest[asset["src"]] = asset
+
+    manifest = {src: a for src, a in manifest.items() if (STATIC_DIR / src.lstrip("/")).exists()}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(path, (json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+    return manifest
+
+
+@dataclass
+class Job:
+    """
+    One unit of pipeline work.
+
+    build(source, outputs, settings) must be a module-level function returning a
+    result dict (the row printed in the summary table). It may rewrite the source
+    in place (e.g. JPG compression); the manifest records the source state after build.
+    Files written besides the declared outputs are listed in result["extra_outputs"]
+    (project-relative paths) so they are tracked too.
+    """
+    stage: str
+    source: Path
+    outputs: list
+    settings: dict
+    build: Callable
+    key: str = ""
+    extra: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.source = Path(self.source)
+        self.outputs = [Path(p) for p in self.outputs]
+        if not self.key:
+            self.key = f"{self.stage}:{rel_path(self.source)}"
+
+
+class BuildManifest:
+    """Persistent record of what each job last built from which inputs."""
+
+    def __init__(self, path=BUILD_MANIFEST_FILE):
+        self.path = Path(path)
+        self.entries = {}
+        self.dirty = False
+        if self.path.exists():
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == MANIFEST_VERSION:
+                    self.entries = data.get("entries", {})
+            except (OSError, ValueError) as e:
+                print(f"Warning: ignoring unreadable manifest {self.path}: {e}")
+
+    def file_state(self, path, previous=None) -> dict:
+        """
+        Stat + hash a file. If size and mtime match the previous record the stored
+        hash is reused, so a no-op run only stats files instead of reading them.
+        """
+        st = os.stat(path)
+        if previous and previous.get("size") == st.st_size and previous.get("mtime_ns") == st.st_mtime_ns:
+            digest = previous["hash"]
+        else:
+            digest = file_hash(path)
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest}
+
+    def is_fresh(self, job: Job) -> bool:
+        entry = self.entries.get(job.key)
+        if not entry or entry.get("settings_hash") != settings_hash(job.settings):
+            return False
+        if not job.source.exists():
+            return False
+        if self.file_state(job.source, entry.get("source"))["hash"] != entry["source"]["hash"]:
+            return False
+        # Recorded outputs = declared outputs + any extra files the build produced (e.g. variants)
+        outputs = entry.get("outputs", {})
+        if not {rel_path(p) for p in job.outputs} <= set(outputs):
+            return False
+        for rel, state in outputs.items():
+            p = PROJECT_ROOT / rel
+            if not p.exists():
+                return False
+            if self.file_state(p, state)["hash"] != state["hash"]:
+                return False
+        return True
+
+    def cached_result(self, job: Job) -> dict:
+        return dict(self.entries.get(job.key, {}).get("result", {}))
+
+    def snapshot(self, job: Job, result: dict) -> dict:
+        """
+        The manifest entry for a finished build (hashes the source and outputs).
+        Only reads files, so the pipeline computes it on an I/O thread.
+        """
+        previous = self.entries.get(job.key, {})
+        prev_outputs = previous.get("outputs", {})
+        output_paths = job.outputs + [PROJECT_ROOT / rel for rel in result.get("extra_outputs", [])]
+        return {
+            "source": self.file_state(job.source, previous.get("source")),
+            "settings": job.settings,
+            "settings_hash": settings_hash(job.settings),
+            "outputs": {
+                rel_path(p): self.file_state(p, prev_outputs.get(rel_path(p)))
+                for p in output_paths if p.exists()
+            },
+            "result": result,
+        }
+
+    def commit(self, job: Job, entry: dict):
+        self.entries[job.key] = entry
+        self.dirty = True
+
+    def record(self, job: Job, result: dict):
+        self.commit(job, self.snapshot(job, result))
+
+    def forget(self, job: Job):
+        if self.entries.pop(job.key, None) is not None:
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": MANIFEST_VERSION, "entries": self.entries}
+        write_atomic(self.path, json.dumps(data, ensure_ascii=False, indent=1, sort_keys=True).encode("utf-8"))
+        self.dirty = False
+
+
+@dataclass
+class Stage:
+    """
+    One step of a streaming pipeline: fn(item) runs on executor with at most
+    `limit` items in flight, and at most `limit` finished items of the previous
+    stage wait for it. fn may return Finished(value) to leave the pipeline early.
+    recover(item, exception), if given, turns a raised exception into a result.
+    """
+    name: str
+    fn: Callable
+    executor: object
+    limit: int = 1
+    recover: Optional[Callable] = None
+
+
+@dataclass
+class Finished:
+    """Stage result that skips the remaining stages."""
+    value: object
+
+
+def stream(items: Iterable, stages: list):
+    """
+    Push items through stages connected by bounded queues and yield each final
+    result (or Finished value) in completion order. A stage only starts an item
+    when the next stage's queue has room, so a slow stage holds back the ones
+    before it instead of letting decoded frames or encoded bytes pile up.
+    """
+    source = iter(items)
+    exhausted = False
+    queues = [deque() for _ in stages]
+    running = [{} for _ in stages]
+    while True:
+        while not exhausted and len(queues[0]) < stages[0].limit:
+            try:
+                queues[0].append(next(source))
+            except StopIteration:
+                exhausted = True
+        # Downstream first, so slots freed there are used before upstream refills them
+        for i in reversed(range(len(stages))):
+            stage = stages[i]
+            while queues[i] and len(running[i]) < stage.limit and (
+                    i + 1 == len(stages) or len(running[i]) + len(queues[i + 1]) < stages[i + 1].limit):
+                item = queues[i].popleft()
+                running[i][stage.executor.submit(stage.fn, item)] = item
+        in_flight = {future: i for i, futures in enumerate(running) for future in futures}
+        if not in_flight:
+            if exhausted and not any(queues):
+                return
+            continue
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            i = in_flight[future]
+            item = running[i].pop(future)
+            try:
+                value = future.result()
+            except Exception as e:
+                if stages[i].recover is None:
+                    raise
+                value = stages[i].recover(item, e)
+            if isinstance(value, Finished):
+                yield value.value
+            elif i + 1 < len(stages):
+                queues[i + 1].append(value)
+            else:
+                yield value
+
+
+@dataclass
+class _Task:
+    """A job travelling through the run_jobs stages."""
+    index: int
+    job: Job
+    status: str = "pending"
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    events: list = field(default_factory=list)
+    writes: list = field(default_factory=list)
+    entry: Optional[dict] = None
+
+
+def _prefetch(path):
+    """Ask the OS to start reading a source into the page cache before the build decodes it."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+def _check(task: _Task, manifest: BuildManifest, force: bool):
+    """I/O stage: skip fresh jobs (hashing reads the source), prefetch the rest."""
+    job = task.job
+    if not force and manifest.is_fresh(job):
+        task.status = "skipped"
+        task.result = manifest.cached_result(job)
+        return Finished(task)
+    _prefetch(job.source)
+    return task
+
+
+def _execute(job: Job):
+    """Run a job's build function, returning (result, error, telemetry events) instead of raising."""
+    result, error = None, None
+    with telemetry.track_file(rel_path(job.source), job.stage) as file_event:
+        try:
+            result = dict(job.build(job.source, job.outputs, job.settings) or {})
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        file_event["status"] = "failed" if error else "built"
+    if result is not None:
+        # High-water mark of the process that ran the job (the pool worker, or this process)
+        result["peak_rss_mb"] = peak_rss_mb()
+        result["worker_pid"] = os.getpid()
+    return result, error, telemetry.drain()
+
+
+def _build(task: _Task) -> _Task:
+    """CPU stage (pool worker or build thread): decode, transform, encode; writes are buffered."""
+    with deferred_writes() as writes:
+        task.result, task.error, task.events = _execute(task.job)
+    # A failed build writes nothing, rather than leaving some of its outputs behind
+    task.writes = [] if task.error else writes
+    task.status = "failed" if task.error else "built"
+    return task
+
+
+def _task_failed(task: _Task, e: Exception) -> _Task:
+    # A stage raised outside the build function: unreadable source, full disk, or a
+    # pool worker that died (e.g. killed by the OOM killer) and took the job with it
+    task.status, task.error = "failed", f"{type(e).__name__}: {e}"
+    return task
+
+
+def _write(task: _Task, manifest: BuildManifest) -> _Task:
+    """I/O stage: write the buffered outputs, then hash them for the manifest entry."""
+    if task.error:
+        return task
+    with telemetry.for_file(rel_path(task.job.source)):
+        for path, data in task.writes:
+            write_atomic(path, data)
+        task.writes = []
+        task.entry = manifest.snapshot(task.job, task.result)
+    return task
+
+
+def stream_jobs(jobs: Iterable[Job], manifest: Optional[BuildManifest] = None, force=False, workers=1,
+                io_threads=DEFAULT_IO_THREADS):
+    """
+    Run jobs as a stream and yield (index, job, result) as each finishes, where
+    index is the job's position in jobs.
+    check (I/O threads) -> build (`workers` processes, or one thread) -> write (I/O threads).
+    At most `workers` jobs are being built, so no more than `workers` decoded frames
+    are in memory, and at most `workers` encoded results wait for the writers.
+    Jobs are consumed lazily, so scanning overlaps with building.
+    Each result has an added "status": built / skipped / failed.
+    """
+    if manifest is None:
+        manifest = BuildManifest()
+    workers = max(1, workers)
+    if workers > 1:
+        cpu = ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=MAX_TASKS_PER_CHILD)
+    else:
+        # One build thread: writes and hashing still overlap with the encode
+        cpu = ThreadPoolExecutor(max_workers=1, thread_name_prefix="build")
+    io_pool = ThreadPoolExecutor(max_workers=io_threads, thread_name_prefix="asset-io")
+    stages = [
+        Stage("check", lambda t: _check(t, manifest, force), io_pool, io_threads, recover=_task_failed),
+        Stage("build", _build, cpu, workers, recover=_task_failed),
+        Stage("write", lambda t: _write(t, manifest), io_pool, io_threads, recover=_task_failed),
+    ]
+    tasks = (_Task(index, job) for index, job in enumerate(jobs))
+    done_count = 0
+    last_save = time.monotonic()
+    try:
+        with cpu, io_pool:
+            for task in stream(tasks, stages):
+                job = task.job
+                telemetry.collect(task.events)
+                if task.status == "skipped":
+                    telemetry.skipped(rel_path(job.source), job.stage)
+                    result = dict(task.result, status="skipped")
+                elif task.status == "failed":
+                    print(f"Failed to process {job.source}: {task.error}")
+                    manifest.forget(job)
+                    result = {"source": str(job.source), "status": "failed", "error": task.error}
+                else:
+                    manifest.commit(job, task.entry)
+                    result = dict(task.result, status="built")
+                if task.status != "skipped":
+                    done_count += 1
+                    print(f"[{done_count}] {result['status']}: {job.source.name}")
+                # Persist progress so an interrupted run keeps what finished
+                if time.monotonic() - last_save >= MANIFEST_SAVE_INTERVAL:
+                    manifest.save()
+                    last_save = time.monotonic()
+                yield task.index, job, result
+    finally:
+        manifest.save()
+
+
+def run_jobs(jobs: Iterable[Job], manifest: Optional[BuildManifest] = None, force=False, workers=1) -> list:
+    """
+    Run jobs, skipping those whose inputs are unchanged (see stream_jobs).
+    Returns one result dict per job, in the input job order.
+    """
+    results = {}
+    for index, _, result in stream_jobs(jobs, manifest, force, workers):
+        results[index] = result
+    return [results[i] for i in range(len(results))]
+
+
+@dataclass
+class AssetClass:
+    """
+    Declarative description of one kind of asset a script builds.
+
+    Sources are the `files` (project-relative) plus every file under `roots` with
+    a matching extension, minus `exclude_dirs` and anything `include` rejects.
+    outputs(source) gives the declared output paths; settings is a dict or a
+    settings(source) function. build is the module-level Job build function.
+    Sources with an entry in scripts/transforms.json get it as settings["transforms"],
+    so changing the entry rebuilds them.
+    """
+    stage: str
+    build: Callable
+    settings: object
+    roots: list = field(default_factory=list)
+    files: list = field(default_factory=list)
+    extensions: set = field(default_factory=lambda: {".jpg", ".jpeg", ".png"})
+    exclude_dirs: set = field(default_factory=set)
+    recursive: bool = True
+    include: Optional[Callable] = None
+    outputs: Callable = None
+
+    def sources(self):
+        for f in self.files:
+            path = PROJECT_ROOT / f
+            if path.exists():
+                yield path
+        for root in self.roots:
+            for path in scan_images(root, self.extensions, self.exclude_dirs, self.recursive):
+                if self.include is None or self.include(path):
+                    yield path
+
+    def matches(self, path) -> bool:
+        """Whether path is one of this class's sources, decided without scanning."""
+        path = Path(path).resolve()
+        if any(path == (PROJECT_ROOT / f).resolve() for f in self.files):
+            return True
+        if path.suffix.lower() not in {e.lower() for e in self.extensions}:
+            return False
+        for root in self.roots:
+            try:
+                dirs = path.relative_to(Path(root).resolve()).parts[:-1]
+            except ValueError:
+                continue
+            if (dirs and not self.recursive) or set(dirs) & set(self.exclude_dirs):
+                continue
+            return self.include is None or self.include(path)
+        return False
+
+    def jobs(self, paths=None, **overrides):
+        """
+        Lazily yield one Job per source (or per path in paths that is a source);
+        overrides are merged into every job's settings.
+        """
+        sources = self.sources() if paths is None else (Path(p) for p in paths if self.matches(p))
+        for path in sources:
+            settings = dict(self.settings(path) if callable(self.settings) else self.settings)
+            settings.update(overrides)
+            ops = transforms.for_source(path)
+            if ops:
+                settings["transforms"] = ops
+            outputs = self.outputs(path) if self.outputs else webp_output(path)
+            yield Job(self.stage, path, outputs, settings, self.build)
+
+
+def webp_output(source) -> list:
+    """Default AssetClass outputs: a .webp beside the source."""
+    return [Path(source).with_suffix(".webp")]
+
+
+def in_place(source) -> list:
+    """AssetClass outputs for builds that rewrite their source."""
+    return [Path(source)]
+
+
+def run_asset_classes(classes, manifest: Optional[BuildManifest] = None, force=False, workers=1,
+                      paths=None, **overrides) -> list:
+    """
+    Stream the jobs of every class through one run_jobs call (see AssetClass.jobs for
+    paths and overrides).
+    """
+    jobs = itertools.chain.from_iterable(c.jobs(paths, **overrides) for c in classes)
+    return run_jobs(jobs, manifest, force=force, workers=workers)
+
+
+def add_pipeline_args(parser: argparse.ArgumentParser, ssim=True):
+    """
+    Common CLI flags shared by every pipeline script. Scripts whose encodes do not
+    go through resolve_quality pass ssim=False, so --target-ssim is not offered.
+    """
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild everything, ignoring the build manifest")
+    parser.add_argument("-j", "--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Parallel encode processes; each holds at most one decoded image "
+                             f"(default: {DEFAULT_WORKERS})")
+    if ssim:
+        parser.add_argument("--target-ssim", type=float, default=None, metavar="SSIM",
+                            help="Pick the lowest quality whose output reaches this SSIM (e.g. 0.985) "
+                                 "instead of the fixed quality constant (needs NumPy)")
+    return telemetry.add_telemetry_args(parser)
+
+
+def print_run_stats(results):
+    built = sum(1 for r in results if r.get("status") == "built")
+    skipped = sum(1 for r in results if r.get("status") == "skipped")
+    failed = sum(1 for r in results if r.get("status") == "failed")
+    print(f"\nBuilt: {built}, Unchanged (skipped): {skipped}, Failed: {failed}")
+    peaks = {}
+    for r in results:
+        if r.get("status") == "built" and r.get("peak_rss_mb"):
+            peaks[r["worker_pid"]] = max(peaks.get(r["worker_pid"], 0), r["peak_rss_mb"])
+    if peaks:
+        print(f"Peak RSS: {max(peaks.values()):.0f} MB per worker (max of {len(peaks)} process(es))")
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the image pipeline, with regression tracking.
+
+1. Synthetic fixtures are generated once (fixed seed) into .asset-cache/bench-fixtures/:
+   - gfx:     100MP-class JPEG (11648x8736) with Fujifilm EXIF + MakerNote
+   - artwork: crackle-texture painting (craquelure network over soft colour fields)
+   - alpha:   RGBA PNG with transparent edges (UI / character cut-out)
+2. Each stage runs in a fresh worker process (best of --repeat), so the reported
+   peak RSS belongs to that stage alone: decode, load_resized (draft decode + resize),
+   encode (save_with_variants: WebP ladder + placeholder), quality_search (SSIM) and exif (header parse).
+3. Seconds, throughput (megapixels/s), peak RSS and output bytes are appended to
+   .asset-cache/benchmark-history.json and compared with the median of the last
+   comparable runs (same host, profile and Pillow version). Exit status is 1 when
+   a metric regresses beyond the threshold.
+
+Usage: python scripts/benchmark_pipeline.py [--quick] [--repeat N] [--threshold 0.15] [--no-record]
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import PIL
+from PIL import Image, ImageChops, TiffImagePlugin
+
+import asset_pipeline as pipeline
+import perceptual_quality
+from extract_exif import format_exif
+from metadata_index import merged_tags, read_header
+
+FIXTURE_DIR = pipeline.CACHE_DIR / "bench-fixtures"
+HISTORY_FILE = pipeline.CACHE_DIR / "benchmark-history.json"
+HISTORY_VERSION = 2
+FIXTURE_VERSION = 1
+SEED = 20240601
+
+# Fixture sizes per profile: full matches the real GFX100S / gallery sources
+PROFILES = {
+    "full": {"gfx": (11648, 8736), "artwork": (2400, 3000), "alpha": (1600, 1600)},
+    "quick": {"gfx": (2912, 2184), "artwork": (1200, 1500), "alpha": (800, 800)},
+}
+STAGES = {
+    "gfx": ["decode", "load_resized", "encode", "quality_search", "exif"],
+    "artwork": ["decode", "load_resized", "encode", "quality_search"],
+    "alpha": ["decode", "load_resized", "encode", "quality_search"],
+}
+# Pipeline settings the stages run with (the photography WebP box)
+MAX_WIDTH = 2912
+MAX_HEIGHT = 2184
+WEBP_QUALITY = 80
+TARGET_SSIM = 0.985
+
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.15
+# Encoders are deterministic, so any real growth in output bytes is a regression
+BYTES_THRESHOLD = 0.01
+BASELINE_RUNS = 5
+METRICS = ("seconds", "peak_rss_mb", "bytes")
+
+
+# --- Fixtures --------------------------------------------------------------
+
+def _fuji_makernote() -> bytes:
+    """Minimal Fujifilm MakerNote: Classic Chrome, strong grain, DR400."""
+    entries = [(0x1047, 64), (0x1401, 0x600), (0x1403, 400)]
+    ifd = struct.pack("<H", len(entries))
+    for tag, value in entries:
+        ifd += struct.pack("<HHIH2x", tag, 3, 1, value)
+    return b"FUJIFILM" + struct.pack("<I", 12) + ifd + struct.pack("<I", 0)
+
+
+def _gfx_exif() -> Image.Exif:
+    exif = Image.Exif()
+    exif[0x010F] = "FUJIFILM"
+    exif[0x0110] = "GFX100S"
+    exif[0x0112] = 1
+    exif_ifd = exif.get_ifd(0x8769)
+    exif_ifd[0x829A] = TiffImagePlugin.IFDRational(1, 250)   # ExposureTime
+    exif_ifd[0x829D] = TiffImagePlugin.IFDRational(28, 10)   # FNumber
+    exif_ifd[0x8827] = 100                                   # ISO
+    exif_ifd[0x9204] = TiffImagePlugin.IFDRational(-1, 3)    # ExposureBiasValue
+    exif_ifd[0x920A] = TiffImagePlugin.IFDRational(45, 1)    # FocalLength
+    exif_ifd[0xA434] = "GF45mmF2.8 R WR"                     # LensModel
+    exif_ifd[0x927C] = _fuji_makernote()
+    return exif
+
+
+def _smooth_field(size, cells, rng, mode="L"):
+    """Low-frequency random field: a small random image upscaled bicubically."""
+    bands = 3 if mode == "RGB" else 1
+    small = rng.integers(0, 256, (cells[1], cells[0], bands), dtype=np.uint8)
+    img = Image.fromarray(small.squeeze(-1) if bands == 1 else small, mode)
+    return img.resize(size, Image.Resampling.BICUBIC)
+
+
+def _add_grain(img, sigma):
+    """Sensor-like noise, generated and applied in C (no full-size float arrays)."""
+    noise = Image.effect_noise(img.size, sigma)
+    return ImageChops.add(img, Image.merge("RGB", [noise] * 3), scale=1.0, offset=-128)
+
+
+def make_gfx(path, size, rng):
+    # Sky gradient + soft hills + hard-edged blocks, upscaled, then per-pixel grain
+    w, h = size[0] // 8, size[1] // 8
+    y, x = np.mgrid[0:h, 0:w].astype(np.float32)
+    sky = np.stack([90 + 80 * y / h, 140 + 60 * y / h, 220 - 40 * y / h], -1)
+    horizon = h * (0.55 + 0.08 * np.sin(x / w * 9) + 0.04 * np.sin(x / w * 31))
+    ground = y > horizon
+    sky[ground] = np.array([70, 90, 50], np.float32) + 30 * np.sin(x[ground] / 7)[:, None]
+    for _ in range(40):
+        bx, by = rng.integers(0, w - 20), rng.integers(h // 3, h - 20)
+        bw, bh = rng.integers(5, 40), rng.integers(10, 60)
+        sky[by:by + bh, bx:bx + bw] = rng.integers(40, 220, 3)
+    base = Image.fromarray(np.clip(sky, 0, 255).astype(np.uint8), "RGB").resize(size, Image.Resampling.BICUBIC)
+    _add_grain(base, 10).save(path, "JPEG", quality=95, exif=_gfx_exif())
+
+
+def make_artwork(path, size, rng):
+    # Colour fields + brush texture, crossed by a craquelure network
+    paint = _add_grain(_smooth_field(size, (6, 8), rng, "RGB"), 6)
+    cracks = np.zeros((size[1], size[0]), bool)
+    for cells in ((size[0] // 60, size[1] // 60), (size[0] // 25, size[1] // 25)):
+        field = np.asarray(_smooth_field(size, cells, rng), np.int16)
+        cracks |= np.abs(field - 128) < 3  # zero-crossings of the field form a cell network
+    arr = np.asarray(paint).copy()
+    arr[cracks] = (arr[cracks] * 0.35).astype(np.uint8)
+    Image.fromarray(arr, "RGB").save(path, "JPEG", quality=95)
+
+
+def make_alpha(path, size, rng):
+    # Flat-shaded shape with an anti-aliased, radially fading alpha edge
+    h, w = size[1], size[0]
+    y, x = np.mgrid[0:h, 0:w].astype(np.float32)
+    r = np.hypot(x - w / 2, y - h / 2) / (min(w, h) / 2)
+    rgba = np.zeros((h, w, 4), np.uint8)
+    rgba[..., 0] = 200 - (r * 60).clip(0, 60).astype(np.uint8)
+    rgba[..., 1] = np.where((x // (w / 8) + y // (h / 8)) % 2, 120, 90)
+    rgba[..., 2] = rng.integers(150, 170)
+    rgba[..., 3] = (255 * np.clip((1 - r) * 6, 0, 1)).astype(np.uint8)
+    Image.fromarray(rgba, "RGBA").save(path, "PNG")
+
+
+FIXTURES = {"gfx": (make_gfx, ".jpg"), "artwork": (make_artwork, ".jpg"), "alpha": (make_alpha, ".png")}
+
+
+def ensure_fixtures(profile) -> dict:
+    """Generate missing fixtures; returns {name: (source_path, resized_path)}."""
+    directory = FIXTURE_DIR / f"v{FIXTURE_VERSION}-{profile}"
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = {}
+    for name, (make, suffix) in FIXTURES.items():
+        source = directory / f"{name}{suffix}"
+        resized = directory / f"{name}-resized.png"
+        if not source.exists():
+            print(f"🧪 Generating fixture {source.name} {PROFILES[profile][name]}...")
+            make(source, PROFILES[profile][name], np.random.default_rng(SEED))
+        if not resized.exists() or resized.stat().st_mtime < source.stat().st_mtime:
+            # Lossless copy of the resized frame, so the encode stages don't pay for the decode
+            img, _ = pipeline.load_resized(source, MAX_WIDTH, MAX_HEIGHT)
+            img.save(resized, "PNG")
+        paths[name] = (source, resized)
+    return paths
+
+
+# --- Stages (run inside a fresh worker process) ----------------------------
+
+def _best_of(repeat, fn):
+    best, value = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, value
+
+
+def _open_loaded(path):
+    with Image.open(path) as img:
+        img.load()
+        return img.copy() if img.mode != "P" else img.convert("RGBA")
+
+
+def stage_decode(source, resized, repeat):
+    def run():
+        with Image.open(source) as img:
+            img.load()
+            return img.width * img.height
+    seconds, pixels = _best_of(repeat, run)
+    return {"seconds": seconds, "pixels": pixels}
+
+
+def stage_load_resized(source, resized, repeat):
+    def run():
+        img, (w, h) = pipeline.load_resized(source, MAX_WIDTH, MAX_HEIGHT)
+        return w * h
+    seconds, pixels = _best_of(repeat, run)
+    return {"seconds": seconds, "pixels": pixels}
+
+
+def stage_encode(source, resized, repeat):
+    img = _open_loaded(resized)
+
+    def run():
+        # The real save_with_variants (ladder + placeholder); deferred_writes keeps the files in memory
+        with pipeline.deferred_writes() as writes:
+            pipeline.save_with_variants(img, pipeline.STATIC_DIR / "benchmark.webp", avif=False,
+                                        quality=WEBP_QUALITY)
+        return sum(len(data) for _, data in writes)
+    seconds, output_bytes = _best_of(repeat, run)
+    return {"seconds": seconds, "pixels": img.width * img.height, "bytes": output_bytes}
+
+
+def stage_quality_search(source, resized, repeat):
+    img = _open_loaded(resized)
+    seconds, (quality, score) = _best_of(
+        repeat, lambda: perceptual_quality.search_quality(img, "WEBP", TARGET_SSIM))
+    output_bytes = len(pipeline.encode_image(img, "WEBP", quality=quality))
+    return {"seconds": seconds, "pixels": img.width * img.height, "bytes": output_bytes,
+            "quality": quality, "ssim": round(score, 5)}
+
+
+def stage_exif(source, resized, repeat):
+    def run():
+        entry = read_header(source)
+        data = format_exif(merged_tags(entry))
+        data.update(entry.get("makernote", {}))
+        return data
+    # Header parsing is sub-millisecond; time a batch so the clock resolution doesn't matter
+    batch = 50
+    seconds, data = _best_of(repeat, lambda: [run() for _ in range(batch)][-1])
+    return {"seconds": seconds / batch, "pixels": None, "fields": len(data),
+            "filmSimulation": data.get("filmSimulation")}
+
+
+STAGE_FUNCTIONS = {
+    "decode": stage_decode,
+    "load_resized": stage_load_resized,
+    "encode": stage_encode,
+    "quality_search": stage_quality_search,
+    "exif": stage_exif,
+}
+
+
+def _run_stage(stage, source, resized, repeat):
+    result = STAGE_FUNCTIONS[stage](source, resized, repeat)
+    result["peak_rss_mb"] = pipeline.peak_rss_mb()
+    return result
+
+
+def run_benchmarks(fixtures, repeat, stages=None) -> dict:
+    results = {}
+    for name, (source, resized) in fixtures.items():
+        for stage in STAGES[name]:
+            if stages and stage not in stages:
+                continue
+            # One fresh process per stage, so peak RSS is not inherited from earlier stages
+            with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as pool:
+                result = pool.submit(_run_stage, stage, source, resized, repeat).result()
+            if result.get("pixels"):
+                result["mpix_per_s"] = result["pixels"] / 1e6 / result["seconds"]
+            results[f"{name}/{stage}"] = result
+            print_result(f"{name}/{stage}", result)
+    return results
+
+
+# --- History & regression check -------------------------------------------
+
+def load_history() -> dict:
+    try:
+        with open(HISTORY_FILE, encoding="utf-8") as f:
+            history = json.load(f)
+        if history.get("version") == HISTORY_VERSION:
+            return history
+    except (OSError, ValueError):
+        pass
+    return {"version": HISTORY_VERSION, "runs": []}
+
+
+def environment(profile) -> dict:
+    return {"host": platform.node(), "machine": platform.machine(), "python": platform.python_version(),
+            "pillow": PIL.__version__, "profile": profile, "fixtures": FIXTURE_VERSION}
+
+
+def baseline(history, env) -> dict:
+    """Per-metric median over the last comparable, non-regressed runs."""
+    runs = [r for r in history["runs"] if r["env"] == env and not r.get("regressions")][-BASELINE_RUNS:]
+    base = {}
+    for run in runs:
+        for key, metrics in run["results"].items():
+            for metric in METRICS:
+                if metrics.get(metric) is not None:
+                    base.setdefault(key, {}).setdefault(metric, []).append(metrics[metric])
+    return {key: {m: statistics.median(v) for m, v in metrics.items()} for key, metrics in base.items()}
+
+
+def find_regressions(results, base, threshold) -> list:
+    regressions = []
+    for key, metrics in results.items():
+        for metric in METRICS:
+            value, reference = metrics.get(metric), base.get(key, {}).get(metric)
+            if value is None or not reference:
+                continue
+            limit = BYTES_THRESHOLD if metric == "bytes" else threshold
+            change = value / reference - 1
+            if change > limit:
+                regressions.append(f"{key} {metric}: {reference:.4g} -> {value:.4g} (+{change:.1%}, limit {limit:.0%})")
+    return regressions
+
+
+def print_result(key, result):
+    throughput = f"{result['mpix_per_s']:8.1f} MP/s" if result.get("mpix_per_s") else " " * 13
+    size = f"{result['bytes'] / 1024:9.1f} KB" if result.get("bytes") else ""
+    rss = f"{result['peak_rss_mb']:7.0f} MB" if result.get("peak_rss_mb") else ""
+    print(f"  {key:<24} {result['seconds'] * 1000:10.1f} ms {throughput} {rss} {size}")
+
+
+def main(profile="full", repeat=DEFAULT_REPEAT, threshold=DEFAULT_THRESHOLD, record=True, stages=None):
+    print(f"⏱️  Image pipeline benchmark ({profile}, best of {repeat})")
+    # Generated in a child too: workers inherit the parent's RSS high-water mark on Linux,
+    # so the parent must never hold a 100MP frame itself
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as pool:
+        fixtures = pool.submit(ensure_fixtures, profile).result()
+    print(f"  {'stage':<24} {'time':>13} {'throughput':>13} {'peak RSS':>10} {'output':>12}")
+    results = run_benchmarks(fixtures, repeat, stages)
+
+    history = load_history()
+    env = environment(profile)
+    base = baseline(history, env)
+    regressions = find_regressions(results, base, threshold)
+    if not base:
+        print("\nNo comparable previous run to compare against.")
+    elif regressions:
+        print(f"\n❌ {len(regressions)} regression(s) against the median of recent runs:")
+        for line in regressions:
+            print(f"   {line}")
+    else:
+        print(f"\n✅ No regressions beyond {threshold:.0%} (bytes {BYTES_THRESHOLD:.0%})")
+
+    if record:
+        history["runs"].append({"timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                                "env": env, "results": results, "regressions": regressions})
+        HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        pipeline.write_atomic(HISTORY_FILE, json.dumps(history, indent=1).encode("utf-8"))
+        print(f"History: {pipeline.rel_path(HISTORY_FILE)} ({len(history['runs'])} runs)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the image pipeline on synthetic fixtures")
+    parser.add_argument("--quick", action="store_true", help="smaller fixtures (2912px GFX frame)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per stage; the best is kept")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative slowdown / memory growth before failing (default: 0.15)")
+    parser.add_argument("--stage", action="append", choices=sorted(STAGE_FUNCTIONS),
+                        help="only run these stages (repeatable)")
+    parser.add_argument("--no-record", action="store_true", help="compare only, don't append to the history")
+    args = parser.parse_args()
+    sys.exit(main("quick" if args.quick else "full", args.repeat, args.threshold, not args.no_record, args.stage))
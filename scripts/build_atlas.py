@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Thumbnail atlases (sprite sheets) for the gallery listing pages.
+
+1. Each listing gets one atlas group: the series covers of phantasm/index.tsx, the
+   photo grid of every photography series, and the artworks of MagicGallery.
+   Its web WebPs are scaled to twice the card's CSS width, so sprites stay sharp on
+   2x screens (optionally center-cropped to the card's aspect ratio first), and packed
+   MaxRects-style (bottom-left) into as few sheets as fit in MAX_SHEET_SIZE x MAX_SHEET_SIZE:
+   static/photography/Skitting/*.webp -> static/atlas/Skitting.3fa9c1.webp
+2. Every sprite is padded by GUTTER pixels of its own edge colour, so a scaled
+   background never samples a neighbouring thumbnail.
+3. src/data/atlas-manifest.json maps group -> image path -> sprite rectangle;
+   SpriteImage renders it with CSS background-size/background-position percentages,
+   so a listing page loads one sheet instead of a full-size WebP per card.
+4. Sheet names carry a 6-character hash of their content, so a repacked sheet gets
+   a new URL and /atlas/* can be cached as immutable. Freshness is decided per group
+   by a key over its sources and settings: an atlas depends on every image in it, so
+   it is not a per-file build-manifest job. Unchanged groups are skipped (use --force
+   to repack); sheets no longer in the manifest are removed. A group with a missing
+   source is left out of the manifest with a warning, so its page uses plain <img>.
+
+Run after the WebP scripts (optimize_artworks.py, compress_hires_images.py): the
+thumbnails are cut from the web WebPs, not from the masters.
+
+Usage: python scripts/build_atlas.py [--force]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image, ImageOps
+
+import asset_pipeline as pipeline
+import telemetry
+
+ATLAS_DIR = pipeline.STATIC_DIR / "atlas"
+ATLAS_MANIFEST_FILE = pipeline.PROJECT_ROOT / "src" / "data" / "atlas-manifest.json"
+
+# Largest sheet side: stays well inside mobile GPU texture limits
+MAX_SHEET_SIZE = 4096
+GUTTER = 2
+ATLAS_QUALITY = 82
+TAG_LENGTH = 6
+
+# Thumbnail widths are 2x the card's CSS width
+# Series grid cards are ~680 CSS px wide (two columns of a 1400px page)
+SERIES_THUMB_WIDTH = 1360
+# phantasm/index.tsx series card: 800 CSS px wide at 4:3
+COVER_THUMB_WIDTH = 1600
+# MagicGallery art inside frame + mat: ~360 CSS px wide at ~30:35 (object-cover)
+ARTWORK_THUMB_WIDTH = 720
+
+# Keep in sync with seriesList in src/pages/phantasm/index.tsx
+PHANTASM_COVERS = [
+    "static/photography/chaoyang2/DSCF0139.webp",
+    "static/photography/flying-seimei/DSCF0232.webp",
+    "static/photography/Skitting/DSCF0169.webp",
+    "static/photography/fu-and-cat/DSCF0010.webp",
+]
+# Series directories that are not photo series
+EXCLUDE_SERIES = {"exif"}
+
+
+@dataclass
+class AtlasGroup:
+    """The card images of one listing page, packed into one or a few sheets."""
+    name: str
+    files: list
+    width: int
+    # (width, height): center-crop every thumbnail to this aspect ratio first
+    aspect: Optional[tuple] = None
+    settings: dict = field(init=False)
+
+    def __post_init__(self):
+        self.files = [Path(f) for f in self.files]
+        self.settings = {"format": "WEBP", "quality": ATLAS_QUALITY, "width": self.width,
+                         "aspect": list(self.aspect) if self.aspect else None,
+                         "max_sheet_size": MAX_SHEET_SIZE, "gutter": GUTTER}
+
+
+def web_images(directory) -> list:
+    """Main web WebPs of a directory (responsive -480w variants excluded)."""
+    return sorted(p for p in pipeline.scan_images(directory, {".webp"}, recursive=False)
+                  if not pipeline.VARIANT_RE.match(p.stem))
+
+
+def atlas_groups() -> list:
+    groups = [
+        AtlasGroup("phantasm", [pipeline.PROJECT_ROOT / f for f in PHANTASM_COVERS], COVER_THUMB_WIDTH, (4, 3)),
+        AtlasGroup("artworks", web_images(pipeline.IMG_DIR / "artworks"), ARTWORK_THUMB_WIDTH, (6, 7)),
+    ]
+    for series in sorted(pipeline.PHOTOGRAPHY_DIR.iterdir()):
+        if series.is_dir() and series.name not in EXCLUDE_SERIES:
+            groups.append(AtlasGroup(series.name, web_images(series), SERIES_THUMB_WIDTH))
+    return [g for g in groups if g.files]
+
+
+def group_key(group: AtlasGroup) -> str:
+    """Hash of the group's sources (paths and content) and settings."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(pipeline.settings_hash(group.settings).encode("ascii"))
+    for path in group.files:
+        digest.update(pipeline.rel_path(path).encode("utf-8"))
+        digest.update(pipeline.file_hash(path).encode("ascii"))
+    return digest.hexdigest()
+
+
+class MaxRectsBin:
+    """
+    MaxRects packer with the bottom-left rule: keeps every maximal free rectangle,
+    places each item where its bottom edge is highest (then leftmost), then splits the
+    free rectangles it overlaps. Bottom-left fills the sheet row by row, so the used
+    area stays compact instead of running down one edge of the MAX_SHEET_SIZE square.
+    """
+
+    def __init__(self, width, height):
+        self.free = [(0, 0, width, height)]
+        self.width = 0
+        self.height = 0
+
+    def insert(self, w, h):
+        best = None
+        for fx, fy, fw, fh in self.free:
+            if w <= fw and h <= fh:
+                score = (fy + h, fx)
+                if best is None or score < best[0]:
+                    best = (score, fx, fy)
+        if best is None:
+            return None
+        _, x, y = best
+        self._split(x, y, w, h)
+        self.width = max(self.width, x + w)
+        self.height = max(self.height, y + h)
+        return x, y
+
+    def _split(self, x, y, w, h):
+        pieces = []
+        for rx, ry, rw, rh in self.free:
+            if x >= rx + rw or x + w <= rx or y >= ry + rh or y + h <= ry:
+                pieces.append((rx, ry, rw, rh))
+                continue
+            if x > rx:
+                pieces.append((rx, ry, x - rx, rh))
+            if x + w < rx + rw:
+                pieces.append((x + w, ry, rx + rw - x - w, rh))
+            if y > ry:
+                pieces.append((rx, ry, rw, y - ry))
+            if y + h < ry + rh:
+                pieces.append((rx, y + h, rw, ry + rh - y - h))
+        # Drop rectangles contained in another one
+        self.free = [a for i, a in enumerate(pieces)
+                     if not any(i != j and _contains(b, a) and (b != a or j < i) for j, b in enumerate(pieces))]
+
+
+def _contains(outer, inner) -> bool:
+    return (outer[0] <= inner[0] and outer[1] <= inner[1]
+            and inner[0] + inner[2] <= outer[0] + outer[2] and inner[1] + inner[3] <= outer[1] + outer[3])
+
+
+def pack(sizes, max_size=MAX_SHEET_SIZE) -> list:
+    """
+    Place (w, h) boxes into as few max_size sheets as needed, largest first.
+    Returns (sheet index, x, y) per box, in input order, and the used size of every sheet.
+    """
+    bins = []
+    placements = [None] * len(sizes)
+    for i in sorted(range(len(sizes)), key=lambda i: (max(sizes[i]), sizes[i][0] * sizes[i][1]), reverse=True):
+        w, h = sizes[i]
+        if w > max_size or h > max_size:
+            raise ValueError(f"{w}x{h} sprite does not fit a {max_size}px sheet")
+        for index, b in enumerate(bins):
+            spot = b.insert(w, h)
+            if spot:
+                break
+        else:
+            bins.append(MaxRectsBin(max_size, max_size))
+            index, spot = len(bins) - 1, bins[-1].insert(w, h)
+        placements[i] = (index, *spot)
+    return placements, [(b.width, b.height) for b in bins]
+
+
+def load_thumbnail(path, width, aspect=None):
+    if aspect:
+        img, _ = pipeline.load_resized(path)
+        size = (width, round(width * aspect[1] / aspect[0]))
+        with telemetry.stage("resize"):
+            img = ImageOps.fit(img, size, Image.Resampling.LANCZOS)
+    else:
+        img, _ = pipeline.load_resized(path, max_width=width)
+    return img.convert("RGB")
+
+
+def paste_extruded(sheet, thumb, x, y, gutter=GUTTER):
+    """Paste thumb at (x + gutter, y + gutter) and repeat its edge pixels into the gutter."""
+    w, h = thumb.size
+    sheet.paste(thumb, (x + gutter, y + gutter))
+    if not gutter:
+        return
+    edges = [
+        ((0, 0, w, 1), (w, gutter), (x + gutter, y)),
+        ((0, h - 1, w, h), (w, gutter), (x + gutter, y + gutter + h)),
+        ((0, 0, 1, h), (gutter, h), (x, y + gutter)),
+        ((w - 1, 0, w, h), (gutter, h), (x + gutter + w, y + gutter)),
+    ]
+    for box, size, at in edges:
+        sheet.paste(thumb.crop(box).resize(size, Image.Resampling.NEAREST), at)
+    for cx, cy, ax, ay in [(0, 0, x, y), (w - 1, 0, x + gutter + w, y), (0, h - 1, x, y + gutter + h),
+                           (w - 1, h - 1, x + gutter + w, y + gutter + h)]:
+        sheet.paste(thumb.getpixel((cx, cy)), (ax, ay, ax + gutter, ay + gutter))
+
+
+def sheet_path(group: AtlasGroup, data: bytes, index, count) -> Path:
+    suffix = f"-{index}" if count > 1 else ""
+    tag = hashlib.blake2b(data, digest_size=16).hexdigest()[:TAG_LENGTH]
+    return ATLAS_DIR / f"{group.name}{suffix}.{tag}.webp"
+
+
+def build_group(group: AtlasGroup, key) -> dict:
+    """Pack one group into its sheets; returns its atlas-manifest entry."""
+    thumbs = [load_thumbnail(p, group.width, group.aspect) for p in group.files]
+    with telemetry.stage("pack"):
+        placements, sheet_sizes = pack([(t.width + 2 * GUTTER, t.height + 2 * GUTTER) for t in thumbs])
+    sheets = [Image.new("RGB", size) for size in sheet_sizes]
+    sprites = {}
+    for path, thumb, (index, x, y) in zip(group.files, thumbs, placements):
+        paste_extruded(sheets[index], thumb, x, y)
+        sprites[pipeline.public_url(path)] = {"sheet": index, "x": x + GUTTER, "y": y + GUTTER,
+                                              "width": thumb.width, "height": thumb.height}
+
+    ATLAS_DIR.mkdir(parents=True, exist_ok=True)
+    entries = []
+    for index, sheet in enumerate(sheets):
+        data = pipeline.encode_image(sheet, "WEBP", quality=group.settings["quality"], method=6)
+        path = sheet_path(group, data, index, len(sheets))
+        pipeline.write_atomic(path, data)
+        entries.append({"src": pipeline.public_url(path), "width": sheet.width, "height": sheet.height,
+                        "bytes": len(data)})
+    return {"key": key, "sheets": entries, "sprites": sprites}
+
+
+def is_current(entry, key) -> bool:
+    return bool(entry) and entry.get("key") == key and all(
+        (pipeline.STATIC_DIR / s["src"].lstrip("/")).exists() for s in entry["sheets"])
+
+
+def load_atlas_manifest(path=ATLAS_MANIFEST_FILE) -> dict:
+    if not path.exists():
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: rebuilding unreadable atlas manifest {path}: {e}")
+        return {}
+
+
+def prune_atlases(manifest) -> int:
+    """Remove sheets that no group of the manifest references."""
+    if not ATLAS_DIR.exists():
+        return 0
+    keep = {pipeline.STATIC_DIR / s["src"].lstrip("/") for entry in manifest.values() for s in entry["sheets"]}
+    removed = 0
+    for path in ATLAS_DIR.iterdir():
+        if path.is_file() and path not in keep:
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def main(force=False):
+    print("🚀 Packing thumbnail atlases...")
+    previous = load_atlas_manifest()
+    manifest = {}
+    rows = []
+    failed = False
+    for group in atlas_groups():
+        missing = [p for p in group.files if not p.exists()]
+        if missing:
+            # e.g. a renamed cover still listed in PHANTASM_COVERS: the page falls back to <img>
+            print(f"⚠️  {group.name}: missing {', '.join(pipeline.rel_path(p) for p in missing)}; not atlased")
+            rows.append((group, "Skipped: missing sources"))
+            continue
+        key = group_key(group)
+        if not force and is_current(previous.get(group.name), key):
+            manifest[group.name] = previous[group.name]
+            rows.append((group, "skipped"))
+            continue
+        try:
+            manifest[group.name] = build_group(group, key)
+            rows.append((group, "built"))
+        except (OSError, ValueError) as e:
+            failed = True
+            if group.name in previous:
+                manifest[group.name] = previous[group.name]
+            rows.append((group, f"Error: {e}"))
+
+    ATLAS_MANIFEST_FILE.parent.mkdir(parents=True, exist_ok=True)
+    pipeline.write_atomic(ATLAS_MANIFEST_FILE,
+                          (json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+    if not failed:
+        removed = prune_atlases(manifest)
+        if removed:
+            print(f"🗑 Removed {removed} stale atlas sheets")
+
+    print(f"\n{'Group':<16} | {'Images':>6} | {'Sources':>8} | {'Sheets':<20} | Atlas")
+    print("-" * 72)
+    for group, status in rows:
+        if status.startswith(("Error", "Skipped")):
+            print(f"{group.name:<16} | {status}")
+            continue
+        entry = manifest[group.name]
+        source_kb = sum(p.stat().st_size for p in group.files) / 1024
+        atlas_kb = sum(s["bytes"] for s in entry["sheets"]) / 1024
+        sheets = ", ".join(f"{s['width']}x{s['height']}" for s in entry["sheets"])
+        mark = "" if status == "built" else " (unchanged)"
+        print(f"{group.name:<16} | {len(group.files):>6} | {source_kb:>6.0f}KB | {sheets:<20} | {atlas_kb:.0f}KB{mark}")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--force", action="store_true", help="Repack every group, even when its sources are unchanged")
+    telemetry.add_telemetry_args(parser)
+    args = parser.parse_args()
+    telemetry.configure(args.telemetry, args.profile)
+    main(force=args.force)
+    telemetry.finish()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Precache manifest (and optional service worker) for prefetching the next photos.
+
+1. Every photography series and the artworks get an ordered list of their web
+   WebPs: stable path, the URL actually requested (the content-hashed one from
+   src/data/asset-paths.json when fingerprint_assets.py has run), byte size and
+   content hash.
+2. The order is the page's own: the source under ORDER_SOURCES that references
+   most of a group's WebPs (the series page's photos array, galleryData.ts for the
+   artworks) gives the order of first reference. WebPs it does not reference are
+   appended by file name.
+3. src/data/precache-manifest.json also carries the prefetch limits. usePrefetchNext
+   warms the next PREFETCH_COUNT photos of the current series, stopping at
+   PREFETCH_BUDGET_BYTES, and skips Save-Data and 2G/3G connections.
+4. With --service-worker, static/sw.js is written too: it serves the manifest's
+   URLs cache-first from a cache named after the manifest version and drops older
+   caches, so prefetched and viewed photos stay instant on repeat visits. Without it
+   a previously generated sw.js is removed and the site unregisters the worker.
+
+Run after fingerprint_assets.py, so the manifest holds the URLs pages request.
+Standard library only; the deploy workflow runs it before `npm run build`.
+
+Usage: python scripts/build_precache.py [--service-worker]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+STATIC_DIR = PROJECT_ROOT / "static"
+PHOTOGRAPHY_DIR = STATIC_DIR / "photography"
+ARTWORKS_DIR = STATIC_DIR / "img" / "artworks"
+PATHS_FILE = PROJECT_ROOT / "src" / "data" / "asset-paths.json"
+PRECACHE_FILE = PROJECT_ROOT / "src" / "data" / "precache-manifest.json"
+SERVICE_WORKER_FILE = STATIC_DIR / "sw.js"
+SERVICE_WORKER_URL = "/sw.js"
+
+# Sources whose image literals give the viewing order
+ORDER_SOURCES = ["src/pages/phantasm", "src/data/galleryData.ts"]
+# Series directories that are not photo series
+EXCLUDE_SERIES = {"exif"}
+
+PREFETCH_COUNT = 3
+# A GFX series WebP is ~0.5-1.4MB: about three photos ahead
+PREFETCH_BUDGET_BYTES = 3 * 1024 * 1024
+HASH_LENGTH = 12
+HASH_CHUNK_BYTES = 1024 * 1024
+
+VARIANT_RE = re.compile(r"-\d+w$")
+WEBP_LITERAL_RE = re.compile(r"""['"`](/[^'"`\n]+?\.webp)['"`]""")
+
+SERVICE_WORKER_TEMPLATE = """\
+// Generated by scripts/build_precache.py; do not edit
+const VERSION = {version};
+const CACHE_PREFIX = 'photos-';
+const CACHE = CACHE_PREFIX + VERSION;
+const BASE = new URL(self.registration.scope).pathname.replace(/\\/$/, '');
+// Compare percent-encoded pathnames, as request URLs have them
+const URLS = new Set({urls}.map((url) => new URL(BASE + url, self.location.origin).pathname));
+
+self.addEventListener('install', () => self.skipWaiting());
+
+self.addEventListener('activate', (event) => {{
+    event.waitUntil(
+        caches.keys()
+            .then((keys) => Promise.all(
+                keys.filter((key) => key.startsWith(CACHE_PREFIX) && key !== CACHE).map((key) => caches.delete(key))
+            ))
+            .then(() => self.clients.claim())
+    );
+}});
+
+// Cache-first for the manifest's photos only; everything else goes to the network untouched
+self.addEventListener('fetch', (event) => {{
+    const url = new URL(event.request.url);
+    if (event.request.method !== 'GET' || url.origin !== self.location.origin || !URLS.has(url.pathname)) return;
+    event.respondWith(
+        caches.open(CACHE).then(async (cache) => {{
+            const cached = await cache.match(url.pathname);
+            if (cached) return cached;
+            const response = await fetch(event.request);
+            if (response.ok) cache.put(url.pathname, response.clone());
+            return response;
+        }})
+    );
+}});
+"""
+
+
+def content_hash(path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_BYTES)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()[:HASH_LENGTH]
+
+
+def public_url(path) -> str:
+    return "/" + path.relative_to(STATIC_DIR).as_posix()
+
+
+def web_images(directory) -> list:
+    """Main web WebPs of a directory (responsive -480w variants excluded)."""
+    return sorted(p for p in directory.iterdir()
+                  if p.is_file() and p.suffix.lower() == ".webp" and not VARIANT_RE.search(p.stem))
+
+
+def groups() -> dict:
+    found = {"artworks": web_images(ARTWORKS_DIR)} if ARTWORKS_DIR.is_dir() else {}
+    for series in sorted(PHOTOGRAPHY_DIR.iterdir()):
+        if series.is_dir() and series.name not in EXCLUDE_SERIES:
+            found[series.name] = web_images(series)
+    return {name: images for name, images in found.items() if images}
+
+
+def order_sources():
+    for name in ORDER_SOURCES:
+        path = PROJECT_ROOT / name
+        files = sorted(path.rglob("*")) if path.is_dir() else [path]
+        for f in files:
+            if f.is_file() and f.suffix in {".ts", ".tsx"}:
+                yield f
+
+
+def page_orders() -> list:
+    """Image literals of each order source, in order of first appearance."""
+    orders = []
+    for path in order_sources():
+        seen = []
+        for match in WEBP_LITERAL_RE.finditer(path.read_text(encoding="utf-8")):
+            if match.group(1) not in seen:
+                seen.append(match.group(1))
+        orders.append(seen)
+    return orders
+
+
+def ordered(images, orders) -> list:
+    """images sorted by the order source that references most of them, the rest by name."""
+    urls = [public_url(p) for p in images]
+    best = max(orders, key=lambda refs: len(set(refs) & set(urls)), default=[])
+    head = [url for url in best if url in urls]
+    return head + [url for url in urls if url not in head]
+
+
+def build_manifest(service_worker=False) -> dict:
+    hashed = {}
+    if PATHS_FILE.exists():
+        with open(PATHS_FILE, encoding="utf-8") as f:
+            hashed = json.load(f)
+    orders = page_orders()
+    series = {}
+    for name, images in groups().items():
+        series[name] = [
+            {"src": src, "url": hashed.get(src, src), "bytes": (STATIC_DIR / src.lstrip("/")).stat().st_size,
+             "hash": content_hash(STATIC_DIR / src.lstrip("/"))}
+            for src in ordered(images, orders)
+        ]
+    version = hashlib.blake2b(json.dumps(series, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+    manifest = {
+        "version": version[:HASH_LENGTH],
+        "prefetch": {"count": PREFETCH_COUNT, "budgetBytes": PREFETCH_BUDGET_BYTES},
+        "series": series,
+    }
+    if service_worker:
+        manifest["serviceWorker"] = SERVICE_WORKER_URL
+    return manifest
+
+
+def service_worker_source(manifest) -> str:
+    urls = sorted({entry["url"] for entries in manifest["series"].values() for entry in entries})
+    return SERVICE_WORKER_TEMPLATE.format(version=json.dumps(manifest["version"]),
+                                          urls=json.dumps(urls, ensure_ascii=False, indent=4))
+
+
+def write_text(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def main(service_worker=False):
+    print("📦 Building the precache manifest...")
+    manifest = build_manifest(service_worker)
+    write_text(PRECACHE_FILE, json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True) + "\n")
+    if service_worker:
+        write_text(SERVICE_WORKER_FILE, service_worker_source(manifest))
+    elif SERVICE_WORKER_FILE.exists():
+        SERVICE_WORKER_FILE.unlink()
+        print(f"🗑 Removed {SERVICE_WORKER_FILE.relative_to(PROJECT_ROOT)}; browsers will unregister it")
+
+    for name, entries in manifest["series"].items():
+        hashed = sum(1 for e in entries if e["url"] != e["src"])
+        total_mb = sum(e["bytes"] for e in entries) / (1024 * 1024)
+        print(f"   {name:<16} {len(entries):>3} photos, {total_mb:5.1f}MB, {hashed} hashed URLs")
+    print(f"✅ Version {manifest['version']} -> {PRECACHE_FILE.relative_to(PROJECT_ROOT)}"
+          + (f", {SERVICE_WORKER_FILE.relative_to(PROJECT_ROOT)}" if service_worker else ""))
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the photo precache manifest")
+    parser.add_argument("--service-worker", action="store_true",
+                        help=f"also generate {SERVICE_WORKER_URL}, which caches the manifest's photos")
+    args = parser.parse_args()
+    main(service_worker=args.service_worker)
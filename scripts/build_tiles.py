@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Deep-zoom tile pyramids for the photography masters.
+
+1. Every master JPG under static/photography/<series>/ is cut into a DZI pyramid:
+   512px WebP tiles at each zoom level, from full resolution down to the first
+   level that fits in a single tile.
+   static/photography/Skitting/DSCF0192.jpg ->
+   static/tiles/Skitting/DSCF0192.3fa9c1.dzi + DSCF0192.3fa9c1_files/<level>/<col>_<row>.webp
+2. The frame is decoded once, then walked as 512-row strips: each strip is tiled
+   and box-reduced 2x into the next level's row buffer, so no level other than the
+   decoded frame is ever held whole (Pillow's JPEG decoder has no row-range API,
+   so the full-resolution decode itself is not split).
+3. The 6-character tag is a hash of the master's content and the tile settings, so
+   a rebuilt pyramid gets new URLs and /tiles/* can be cached as immutable.
+4. src/data/tile-manifest.json maps the master's URL (GfxPhoto's originalSrc) to its
+   pyramid; the DeepZoom viewer loads only the tiles in view. Tiles of pyramids that
+   are no longer in the manifest are removed.
+
+Run after compress_hires_images.py: the pyramid is cut from the compressed master,
+so the tiles match the high-res download.
+
+Runs through the shared asset pipeline: unchanged masters are skipped
+(use --force to rebuild everything).
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+import asset_pipeline as pipeline
+import telemetry
+import transforms
+
+TILES_DIR = pipeline.STATIC_DIR / "tiles"
+TILE_MANIFEST_FILE = pipeline.PROJECT_ROOT / "src" / "data" / "tile-manifest.json"
+
+TILE_SIZE = 512
+# Tiles abut exactly; the viewer rounds tile edges to whole screen pixels instead
+TILE_OVERLAP = 0
+TILE_FORMAT = "webp"
+TILE_QUALITY = 80
+TAG_LENGTH = 6
+
+DZI_NAMESPACE = "http://schemas.microsoft.com/deepzoom/2008"
+
+TILE_SETTINGS = {"format": "WEBP", "tile_size": TILE_SIZE, "overlap": TILE_OVERLAP, "quality": TILE_QUALITY}
+
+
+def level_sizes(size, tile_size=TILE_SIZE) -> list:
+    """Level dimensions from full resolution down: each half the previous (rounded up), until one tile."""
+    sizes = [tuple(size)]
+    while max(sizes[-1]) > tile_size:
+        w, h = sizes[-1]
+        sizes.append(((w + 1) // 2, (h + 1) // 2))
+    return sizes
+
+
+def max_level(size) -> int:
+    """DZI numbering: level 0 is 1x1, the full-resolution level is ceil(log2(longest side))."""
+    return math.ceil(math.log2(max(size))) if max(size) > 1 else 0
+
+
+def pyramid_tag(source, settings) -> str:
+    """Content + settings hash used in the pyramid's file names."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(pipeline.file_hash(source).encode("ascii"))
+    digest.update(pipeline.settings_hash(settings).encode("ascii"))
+    return digest.hexdigest()[:TAG_LENGTH]
+
+
+def dzi_descriptor(size, tile_size, overlap, fmt) -> bytes:
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<Image xmlns="{DZI_NAMESPACE}" TileSize="{tile_size}" Overlap="{overlap}" Format="{fmt}">'
+        f'<Size Width="{size[0]}" Height="{size[1]}"/></Image>\n'
+    ).encode("utf-8")
+
+
+class TilePyramid:
+    """
+    Cuts a frame fed as horizontal strips into DZI tiles. Each completed tile row is
+    encoded, then reduced 2x (box filter) into the next level's row buffer. A 2x2 box
+    never straddles an even strip boundary, so strip-wise reduction gives the same
+    pixels as reducing the whole level.
+    """
+
+    def __init__(self, size, files_dir, tile_size=TILE_SIZE, quality=TILE_QUALITY):
+        self.sizes = level_sizes(size, tile_size)
+        self.top_level = max_level(size)
+        self.files_dir = files_dir
+        self.tile_size = tile_size
+        self.quality = quality
+        self.buffers = [None] * len(self.sizes)
+        self.next_row = [0] * len(self.sizes)
+        self.files = []
+        self.bytes = 0
+        for depth in range(len(self.sizes)):
+            (files_dir / str(self.top_level - depth)).mkdir(parents=True, exist_ok=True)
+
+    @property
+    def min_level(self) -> int:
+        return self.top_level - len(self.sizes) + 1
+
+    def add_strip(self, strip, depth=0):
+        pending = self.buffers[depth]
+        if pending is not None:
+            merged = Image.new(strip.mode, (strip.width, pending.height + strip.height))
+            merged.paste(pending, (0, 0))
+            merged.paste(strip, (0, pending.height))
+            strip = merged
+        while strip.height >= self.tile_size:
+            self._emit_row(depth, strip.crop((0, 0, strip.width, self.tile_size)))
+            strip = strip.crop((0, self.tile_size, strip.width, strip.height))
+        self.buffers[depth] = strip if strip.height else None
+
+    def finish(self):
+        """Emit the last, partial tile row of every level (top down, each feeds the next)."""
+        for depth in range(len(self.sizes)):
+            pending, self.buffers[depth] = self.buffers[depth], None
+            if pending is not None:
+                self._emit_row(depth, pending)
+
+    def _emit_row(self, depth, row):
+        level_dir = self.files_dir / str(self.top_level - depth)
+        row_index = self.next_row[depth]
+        self.next_row[depth] += 1
+        for col, x in enumerate(range(0, row.width, self.tile_size)):
+            tile = row.crop((x, 0, min(x + self.tile_size, row.width), row.height))
+            data = pipeline.encode_image(tile, "WEBP", quality=self.quality)
+            path = level_dir / f"{col}_{row_index}.{TILE_FORMAT}"
+            pipeline.write_atomic(path, data)
+            self.files.append(path)
+            self.bytes += len(data)
+        if depth + 1 < len(self.sizes):
+            self.add_strip(row.reduce(2), depth + 1)
+
+
+def build_tiles(source, outputs=None, settings=None):
+    """Cut one master into a tile pyramid plus its .dzi descriptor."""
+    settings = settings or TILE_SETTINGS
+    tile_size = settings["tile_size"]
+    series = source.parent.relative_to(pipeline.PHOTOGRAPHY_DIR)
+    name = f"{source.stem}.{pyramid_tag(source, settings)}"
+    dzi_path = TILES_DIR / series / f"{name}.dzi"
+    files_dir = TILES_DIR / series / f"{name}_files"
+
+    with Image.open(source) as src:
+        with telemetry.stage("decode"):
+            src.load()
+            ImageOps.exif_transpose(src, in_place=True)
+        img = src
+        if settings.get("transforms"):
+            with telemetry.stage("transform"):
+                img = transforms.apply_transforms(src, settings["transforms"])
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+
+        pyramid = TilePyramid(img.size, files_dir, tile_size, settings["quality"])
+        with telemetry.stage("tile"):
+            for y in range(0, img.height, tile_size):
+                pyramid.add_strip(img.crop((0, y, img.width, min(y + tile_size, img.height))))
+            pyramid.finish()
+        size = img.size
+
+    pipeline.write_atomic(dzi_path, dzi_descriptor(size, tile_size, settings["overlap"], TILE_FORMAT))
+    print(f"   🧩 {source.name}: {len(pyramid.files)} tiles, levels {pyramid.min_level}-{pyramid.top_level}, "
+          f"{pyramid.bytes / (1024 * 1024):.1f}MB")
+    tiles = {
+        "dzi": pipeline.public_url(dzi_path),
+        "tiles": pipeline.public_url(files_dir),
+        "width": size[0],
+        "height": size[1],
+        "tileSize": tile_size,
+        "overlap": settings["overlap"],
+        "format": TILE_FORMAT,
+        "minLevel": pyramid.min_level,
+        "maxLevel": pyramid.top_level,
+        "bytes": pyramid.bytes,
+    }
+    return {"name": pipeline.rel_path(source), "original": pipeline.public_url(source), "tiles": tiles,
+            "tile_count": len(pyramid.files),
+            "extra_outputs": [pipeline.rel_path(p) for p in [dzi_path] + pyramid.files]}
+
+
+def is_master(path):
+    """Master JPGs in a series directory (derivatives contain '_')."""
+    return "_" not in path.stem
+
+
+def no_declared_outputs(source) -> list:
+    """Pyramid paths carry a content tag, so they are only known after the build (extra_outputs)."""
+    return []
+
+
+MASTERS = pipeline.AssetClass("build_tiles", build_tiles, TILE_SETTINGS, roots=[pipeline.PHOTOGRAPHY_DIR],
+                              extensions={".jpg"}, include=is_master, outputs=no_declared_outputs)
+
+
+def update_tile_manifest(results, path=TILE_MANIFEST_FILE):
+    """
+    Merge the "tiles" entries of build results into src/data/tile-manifest.json
+    (keyed by the master's URL), dropping pyramids whose descriptor no longer exists.
+    """
+    manifest = {}
+    if path.exists():
+        try:
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: rebuilding unreadable tile manifest {path}: {e}")
+    for r in results:
+        if r.get("tiles"):
+            manifest[r["original"]] = r["tiles"]
+    manifest = {src: t for src, t in manifest.items()
+                if (pipeline.STATIC_DIR / t["dzi"].lstrip("/")).exists()}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pipeline.write_atomic(path, (json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+    return manifest
+
+
+def prune_tiles(results, masters=None):
+    """
+    Remove tiles and descriptors not produced by this run's (built or unchanged) pyramids.
+    With masters, only those masters' pyramids are considered (results cover just them).
+    """
+    keep = {pipeline.PROJECT_ROOT / rel for r in results for rel in r.get("extra_outputs", [])}
+    prefixes = None
+    if masters is not None:
+        prefixes = tuple(str(TILES_DIR / Path(m).parent.relative_to(pipeline.PHOTOGRAPHY_DIR) / f"{Path(m).stem}.")
+                         for m in masters)
+    removed = 0
+    for dirpath, dirnames, filenames in os.walk(TILES_DIR, topdown=False):
+        for filename in filenames:
+            path = Path(dirpath) / filename
+            if prefixes is not None and not str(path).startswith(prefixes):
+                continue
+            if path not in keep:
+                os.remove(path)
+                removed += 1
+        if not os.listdir(dirpath) and dirpath != str(TILES_DIR):
+            os.rmdir(dirpath)
+    return removed
+
+
+def main(force=False, workers=1):
+    print("🚀 Building deep-zoom tile pyramids...")
+    results = pipeline.run_asset_classes([MASTERS], force=force, workers=workers)
+    update_tile_manifest(results)
+
+    # A failed master keeps its previous pyramid: its tiles are not in this run's results
+    if any(r.get("status") == "failed" for r in results):
+        print("⚠️  Some masters failed; stale tiles were not pruned")
+    else:
+        removed = prune_tiles(results)
+        if removed:
+            print(f"🗑 Removed {removed} stale tile files")
+
+    print(f"\n{'Master':<50} | {'Size':<11} | {'Levels':<7} | {'Tiles':>6} | Total")
+    print("-" * 95)
+    for r in results:
+        if r.get("status") == "failed":
+            print(f"{r['source']:<50} | Error: {r['error']}")
+            continue
+        t = r["tiles"]
+        dims = f"{t['width']}x{t['height']}"
+        levels = f"{t['minLevel']}-{t['maxLevel']}"
+        print(f"{r['name']:<50} | {dims:<11} | {levels:<7} | {r['tile_count']:>6} | {t['bytes'] / (1024 * 1024):.1f}MB")
+    pipeline.print_run_stats(results)
+    return results
+
+
+if __name__ == "__main__":
+    parser = pipeline.add_pipeline_args(argparse.ArgumentParser(description=__doc__), ssim=False)
+    args = parser.parse_args()
+    telemetry.configure(args.telemetry, args.profile)
+    main(force=args.force, workers=args.workers)
+    telemetry.finish()
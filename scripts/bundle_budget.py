@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Size-budget check for the deploy bundle (Cloudflare rejects any asset over 25MB).
+
+1. Walk the bundle (build/ if it exists, else static/) with os.scandir, listing
+   directories in parallel on a thread pool. Every file counts except those matched
+   by the root's .assetsignore (the list of files wrangler does not upload), since
+   anything else is deployed.
+2. Enforce the budgets in scripts/bundle_budget.json: per file, per directory
+   (including subdirectories), total bytes and total file count.
+3. Report the largest files, directories and extensions, and the byte delta since
+   the last recorded run (.asset-cache/bundle-manifest-<root>.json).
+4. Exit 1 if any budget is exceeded, so CI stops before `wrangler deploy`.
+
+Standard library only, so it runs in the deploy workflow without Pillow.
+
+Usage: python scripts/bundle_budget.py [--root build] [--no-record]
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path, PurePosixPath
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CONFIG_FILE = Path(__file__).resolve().parent / "bundle_budget.json"
+CACHE_DIR = PROJECT_ROOT / ".asset-cache"
+
+SCAN_THREADS = 8
+TOP_ROWS = 10
+# Directory rows in the report go this deep (img, img/artworks, ...)
+REPORT_DEPTH = 2
+MB = 1024 * 1024
+# wrangler skips the files this lists when uploading the assets directory
+ASSETSIGNORE = ".assetsignore"
+
+
+def default_root() -> Path:
+    build = PROJECT_ROOT / "build"
+    return build if build.is_dir() else PROJECT_ROOT / "static"
+
+
+def load_config(path=CONFIG_FILE) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_assetsignore(root) -> list:
+    """Patterns of <root>/.assetsignore (plus the file itself), or [] without one."""
+    path = Path(root) / ASSETSIGNORE
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return []
+    return [ASSETSIGNORE] + [line.strip() for line in lines if line.strip() and not line.startswith("#")]
+
+
+def is_ignored(rel: str, patterns) -> bool:
+    """gitignore-style subset: a pattern with a slash matches the root-relative path, else any name."""
+    parts = PurePosixPath(rel).parts
+    for pattern in patterns:
+        pattern = pattern.rstrip("/")
+        if "/" in pattern:
+            if fnmatch.fnmatch(rel, pattern.lstrip("/")) or fnmatch.fnmatch(rel, pattern.lstrip("/") + "/*"):
+                return True
+        elif any(fnmatch.fnmatch(part, pattern) for part in parts):
+            return True
+    return False
+
+
+def _list_dir(path):
+    files, dirs = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                files.append((entry.path, entry.stat(follow_symlinks=False).st_size))
+    return files, dirs
+
+
+def scan_bundle(root, ignore=(), threads=SCAN_THREADS) -> dict:
+    """{root-relative POSIX path: bytes} for every file under root not matching an ignore pattern."""
+    root = Path(root)
+    sizes = {}
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        pending = {pool.submit(_list_dir, root)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, dirs = future.result()
+                for path, size in files:
+                    rel = Path(path).relative_to(root).as_posix()
+                    if not is_ignored(rel, ignore):
+                        sizes[rel] = size
+                pending |= {pool.submit(_list_dir, d) for d in dirs}
+    return sizes
+
+
+def directory_totals(sizes: dict) -> dict:
+    """{directory: bytes} where each directory counts everything below it."""
+    totals = {}
+    for rel, size in sizes.items():
+        for parent in PurePosixPath(rel).parents:
+            if str(parent) != ".":
+                totals[str(parent)] = totals.get(str(parent), 0) + size
+    return totals
+
+
+def check_budgets(sizes: dict, dir_totals: dict, config: dict):
+    """Returns (errors, warnings) as printable lines."""
+    errors, warnings = [], []
+    max_file = config["max_file_mb"] * MB
+    warn_file = config.get("warn_file_mb", config["max_file_mb"]) * MB
+    for rel, size in sorted(sizes.items()):
+        if size > max_file:
+            errors.append(f"{rel}: {size / MB:.1f}MB > {config['max_file_mb']}MB per-file limit")
+        elif size > warn_file:
+            warnings.append(f"{rel}: {size / MB:.1f}MB is close to the {config['max_file_mb']}MB limit")
+
+    for directory, budget_mb in sorted(config.get("directories", {}).items()):
+        size = dir_totals.get(directory.strip("/"), 0)
+        if size > budget_mb * MB:
+            errors.append(f"{directory}/: {size / MB:.1f}MB > {budget_mb}MB directory budget")
+
+    total = sum(sizes.values())
+    if total > config["max_total_mb"] * MB:
+        errors.append(f"bundle: {total / MB:.1f}MB > {config['max_total_mb']}MB total budget")
+    if len(sizes) > config["max_files"]:
+        errors.append(f"bundle: {len(sizes)} files > {config['max_files']} file limit")
+    return errors, warnings
+
+
+def manifest_path(root) -> Path:
+    return CACHE_DIR / f"bundle-manifest-{Path(root).name}.json"
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("files", {})
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(path, sizes: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"total": sum(sizes.values()), "files": sizes}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _share(size, total) -> str:
+    return f"{size / MB:9.2f}MB {size / total * 100 if total else 0:5.1f}%"
+
+
+def print_report(sizes: dict, dir_totals: dict, top=TOP_ROWS):
+    total = sum(sizes.values())
+    print(f"📦 Bundle: {len(sizes)} files, {total / MB:.1f}MB")
+
+    print("\n--- Largest files ---")
+    for rel, size in sorted(sizes.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f"{rel:<60} {_share(size, total)}")
+
+    print("\n--- Largest directories ---")
+    shallow = {d: s for d, s in dir_totals.items() if len(PurePosixPath(d).parts) <= REPORT_DEPTH}
+    for directory, size in sorted(shallow.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f"{directory + '/':<60} {_share(size, total)}")
+
+    print("\n--- By extension ---")
+    by_ext = {}
+    for rel, size in sizes.items():
+        ext = PurePosixPath(rel).suffix.lower() or "(none)"
+        count, ext_bytes = by_ext.get(ext, (0, 0))
+        by_ext[ext] = (count + 1, ext_bytes + size)
+    for ext, (count, ext_bytes) in sorted(by_ext.items(), key=lambda kv: kv[1][1], reverse=True)[:top]:
+        print(f"{ext:<12} {count:6d} files {_share(ext_bytes, total)}")
+
+
+def print_delta(previous, sizes: dict, top=TOP_ROWS):
+    if previous is None:
+        print("\nNo previous bundle manifest to compare against.")
+        return
+    delta = sum(sizes.values()) - sum(previous.values())
+    added = set(sizes) - set(previous)
+    removed = set(previous) - set(sizes)
+    print(f"\n--- Since last run: {delta / MB:+.2f}MB "
+          f"({len(added)} added, {len(removed)} removed) ---")
+    changes = {rel: sizes.get(rel, 0) - previous.get(rel, 0) for rel in set(sizes) | set(previous)}
+    changes = {rel: d for rel, d in changes.items() if d}
+    for rel, d in sorted(changes.items(), key=lambda kv: abs(kv[1]), reverse=True)[:top]:
+        tag = " (new)" if rel in added else " (removed)" if rel in removed else ""
+        print(f"{rel:<60} {d / 1024:+12.1f}KB{tag}")
+
+
+def main(root=None, config_path=CONFIG_FILE, record=True, top=TOP_ROWS):
+    root = Path(root) if root else default_root()
+    if not root.is_dir():
+        print(f"Error: {root} not found.")
+        return 1
+    config = load_config(config_path)
+    print(f"🔍 Scanning {root}...")
+    sizes = scan_bundle(root, load_assetsignore(root))
+    dir_totals = directory_totals(sizes)
+
+    print_report(sizes, dir_totals, top)
+    manifest = manifest_path(root)
+    print_delta(load_manifest(manifest), sizes, top)
+
+    errors, warnings = check_budgets(sizes, dir_totals, config)
+    print()
+    for line in warnings:
+        print(f"⚠️  {line}")
+    for line in errors:
+        print(f"❌ {line}")
+    if errors:
+        print(f"Budget exceeded ({len(errors)} violation(s)); not deployable.")
+        return 1
+    print("✅ Bundle within budget")
+    # Only a passing bundle becomes the baseline for the next delta
+    if record:
+        save_manifest(manifest, sizes)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the deploy bundle against its size budgets")
+    parser.add_argument("--root", default=None, help="directory to check (default: build/ if present, else static/)")
+    parser.add_argument("--config", default=CONFIG_FILE, help="budget config (default: scripts/bundle_budget.json)")
+    parser.add_argument("--no-record", action="store_true", help="don't store this run as the baseline for the next delta")
+    parser.add_argument("--top", type=int, default=TOP_ROWS, help=f"rows per report table (default: {TOP_ROWS})")
+    args = parser.parse_args()
+    sys.exit(main(args.root, args.config, record=not args.no_record, top=args.top))
@@ -1,6 +1,6 @@
 
-import os
-from PIL import Image
+import asset_pipeline as pipeline
+from metadata_index import MetadataIndex
 
 files = [
     "static/img/yukari.png",
@@ -14,12 +14,15 @@ files = [
 print(f"{'File':<60} {'Size (MB)':<10} {'Dimensions':<15}")
 print("-" * 85)
 
+# Dimensions come from the shared metadata index (header-only, cached by mtime/size/hash)
+index = MetadataIndex()
 for f in files:
     try:
-        path = os.path.join(os.getcwd(), f)
-        size_mb = os.path.getsize(path) / (1024 * 1024)
-        with Image.open(path) as img:
-            dims = f"{img.width}x{img.height}"
-            print(f"{f:<60} {size_mb:<10.2f} {dims:<15}")
+        path = pipeline.PROJECT_ROOT / f
+        entry = index.get(path)
+        size_mb = entry["size"] / (1024 * 1024)
+        dims = f"{entry['width']}x{entry['height']}"
+        print(f"{f:<60} {size_mb:<10.2f} {dims:<15}")
     except Exception as e:
         print(f"{f:<60} Error: {e}")
+index.save()
@@ -6,78 +6,61 @@ Rules:
 2. Exclude 'digital_Resource' directory.
 3. For each image file (JPG, PNG, etc.):
    - If a corresponding WebP exists (checking that optimization happened).
-   - Check if the filename (e.g., 'IMG_0196.jpg') is referenced in `src/`.
+   - Check if the filename (e.g., 'IMG_0196.jpg') is referenced in the site sources
+     (src/, blog/, i18n/, docusaurus.config.ts) via the reference index.
    - If NOT referenced, DELETE it.
+4. Report dangling references (paths in the sources that point to missing files).
+
+The reference index (reference_index.py) is built in one pass and cached by mtime,
+so the check is a set difference rather than one grep per image.
+
+Usage: python scripts/cleanup_unused.py [--dry-run]
 """
 
+import argparse
 import os
-import glob
-from pathlib import Path
 
-SRC_DIR = "/Users/yukari/Code/sukima-ml/src"
-IMG_DIR = "/Users/yukari/Code/sukima-ml/static/img"
+import asset_pipeline as pipeline
+from reference_index import dangling_references, load_index, print_dangling
+
+IMG_DIR = pipeline.IMG_DIR
 EXCLUDE_DIRS = ["digital_Resource", "artworks_backup"]
+EXTENSIONS = {'.jpg', '.jpeg', '.png'}
 
-def search_in_src(filename):
-    # Simple grep equivalent
-    # We search recursively in src for the string
-    # This is expensive but safe.
-    # Actually, let's load all source files once? No, too big.
-    # Let's iterate.
-    
-    # Heuristic: Most references are file names.
-    # grep -r "filename" src
-    
-    # Python implementation of grep
-    command = f"grep -r '{filename}' {SRC_DIR}"
-    ret = os.system(command + " > /dev/null 2>&1")
-    return ret == 0
 
-def main():
-    print("🧹 Starting cleanup of unused source images...")
-    
-    root_path = Path(IMG_DIR)
-    
-    # Get all source images (not WebP)
-    # We consider JPG, PNG.
-    extensions = {'.jpg', '.JPG', '.jpeg', '.JPEG', '.png', '.PNG'}
-    
-    files_to_check = []
-    
-    for ext in extensions:
-        files_to_check.extend(root_path.rglob(f"*{ext}"))
-        
-    for file_path in files_to_check:
-        # 1. Check exclusions
-        rel_path = file_path.relative_to(root_path)
-        if any(ex in str(rel_path) for ex in EXCLUDE_DIRS):
+def find_unused(referenced_names):
+    """Source images that have an optimized WebP and whose file name is never referenced."""
+    unused = []
+    for file_path in pipeline.scan_images(IMG_DIR, EXTENSIONS, EXCLUDE_DIRS):
+        if not file_path.with_suffix('.webp').exists():
             continue
-            
-        print(f"Checking {file_path.name}...")
-        
-        # 2. Check if WebP version exists
-        webp_path = file_path.with_suffix('.webp')
-        if not webp_path.exists():
-            print(f"  Skipping: No WebP version found.")
-            continue
-            
-        # 3. Check if strict filename is used in src
-        if search_in_src(file_path.name):
-            print(f"  Keep: Referenced in code.")
-            continue
-            
-        # 4. Check if just the stem is used?
-        # e.g. imported as X, used as X.
-        # But usually we use full path strings in React imports or src="...jpg"
-        # If user uses <img src={require('./...jpg').default} />
-        
-        # Risk: What if the code references the JPG specifically for a download?
-        # "search_in_src" checks for the Extension too because we pass file_path.name
-        
-        print(f"  🗑 DELETE: Unused source {file_path.name}")
-        os.remove(file_path)
-        
+        if file_path.name not in referenced_names:
+            unused.append(file_path)
+    return unused
+
+
+def main(dry_run=False):
+    print("🧹 Starting cleanup of unused source images...")
+
+    index = load_index()
+    print(f"📇 Reference index: {len(index.entries)} files ({index.parsed} re-read)")
+
+    unused = find_unused(index.basenames())
+    for file_path in unused:
+        if dry_run:
+            print(f"  Would delete: {pipeline.rel_path(file_path)}")
+        else:
+            print(f"  🗑 DELETE: Unused source {pipeline.rel_path(file_path)}")
+            os.remove(file_path)
+    if not unused:
+        print("  Nothing to delete.")
+
+    print_dangling(dangling_references(index))
     print("Done.")
 
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Remove unused source images from static/img")
+    parser.add_argument("--dry-run", action="store_true", help="list unused images without deleting them")
+    args = parser.parse_args()
+    main(dry_run=args.dry_run)
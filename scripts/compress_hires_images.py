@@ -3,150 +3,239 @@
 Unified Image Optimization Script for Photography Series
 1. Scan specified directories.
 2. For each High-Res JPG:
-   - If size > 25MB, compress it (in-place) to < 24.5MB while keeping resolution.
-   - Generate a WebP version scaled to fit within 2912x2184 (4:3 aspect ratio).
+   - If size > 24MB, compress it (in-place) to < 22MB while keeping resolution,
+     re-encoding at the highest quality that fits.
+   - Generate a WebP version scaled to fit within 2912x2184 (4:3 aspect ratio),
+     plus smaller responsive widths (DSCFxxxx-480w.webp, ...) for srcset.
    - Remove "useless" files (old _web.jpg, _web.webp variations if they don't match the standard).
+
+Runs through the shared asset pipeline: files whose content and settings are
+unchanged since the last run are skipped (use --force to rebuild everything).
 """
 
+import argparse
+import json
 import os
-import shutil
-from PIL import Image, ImageOps
+import statistics
+from PIL import Image
 from pathlib import Path
 
-# Standard Configuration
+import asset_pipeline as pipeline
+import telemetry
+
 # Standard Configuration
 MIN_JPG_SIZE_MB = 20.0
 MAX_JPG_SIZE_MB = 24.0
 TARGET_JPG_SIZE_MB = 22.0
 TARGET_JPG_BYTES = int(TARGET_JPG_SIZE_MB * 1024 * 1024)
 
+# Quality prediction: a GRIDxGRID mosaic of full-res tiles is encoded instead of the whole frame
+SAMPLE_GRID = 8
+SAMPLE_TILE = 256
+SIZE_MODEL_FILE = pipeline.CACHE_DIR / "jpeg-size-model.json"
+SIZE_MODEL_HISTORY = 50
+
 WEBP_MAX_WIDTH = 2912
 WEBP_MAX_HEIGHT = 2184
 WEBP_QUALITY = 85
 
 # Directories to process
 TARGET_DIRS = [
-    "/Users/yukari/Code/sukima-ml/static/photography/chaoyang2",
-    "/Users/yukari/Code/sukima-ml/static/photography/flying-seimei",
-    "/Users/yukari/Code/sukima-ml/static/photography/Skitting",
-    "/Users/yukari/Code/sukima-ml/static/photography/fu-and-cat"
+    pipeline.PHOTOGRAPHY_DIR / "chaoyang2",
+    pipeline.PHOTOGRAPHY_DIR / "flying-seimei",
+    pipeline.PHOTOGRAPHY_DIR / "Skitting",
+    pipeline.PHOTOGRAPHY_DIR / "fu-and-cat",
 ]
 
-def compress_jpg_in_place(filepath):
+JPG_SETTINGS = {"format": "JPEG", "max_mb": MAX_JPG_SIZE_MB, "target_bytes": TARGET_JPG_BYTES,
+                "optimize": True, "progressive": True}
+WEBP_SETTINGS = {"format": "WEBP", "max_width": WEBP_MAX_WIDTH, "max_height": WEBP_MAX_HEIGHT,
+                 "quality": WEBP_QUALITY, "widths": list(pipeline.RESPONSIVE_WIDTHS),
+                 "avif": pipeline.AVIF_AVAILABLE, "placeholder": pipeline.PLACEHOLDERS_AVAILABLE,
+                 "draft": pipeline.DRAFT_OVERSAMPLE}
+
+def sample_mosaic(img, grid=SAMPLE_GRID, tile=SAMPLE_TILE):
     """
-    Compress JPG in-place if it exceeds MAX_JPG_SIZE_MB.
-    Tries to find the highest quality that fits under TARGET_JPG_SIZE_MB.
+    Build a small mosaic of full-resolution tiles spread evenly over the frame.
+    Unlike a downscaled copy it keeps the original texture/noise, so its
+    bytes-per-pixel tracks the full encode closely.
     """
-    size_mb = os.path.getsize(filepath) / (1024 * 1024)
-    if size_mb <= MAX_JPG_SIZE_MB:
-        print(f"✅ JPG OK ({size_mb:.1f}MB): {Path(filepath).name}")
-        return True
+    w, h = img.size
+    tile = min(tile, w // grid, h // grid)
+    mosaic = Image.new(img.mode, (tile * grid, tile * grid))
+    for gy in range(grid):
+        for gx in range(grid):
+            x = (w - tile) * gx // max(1, grid - 1)
+            y = (h - tile) * gy // max(1, grid - 1)
+            mosaic.paste(img.crop((x, y, x + tile, y + tile)), (gx * tile, gy * tile))
+    return mosaic
 
-    print(f"📉 Compressing JPG ({size_mb:.1f}MB -> TARGET): {Path(filepath).name}...")
-    
-    img = Image.open(filepath)
-    exif_data = img.info.get('exif')
-    
-    # Binary search for quality
-    low, high = 1, 95
-    best_quality = 80
-    
-    # Use a temp file for testing
-    temp_path = str(filepath) + ".tmp.jpg"
-    
+def load_size_model():
+    """Ratios of actual full-encode size to the mosaic estimate from earlier runs."""
+    try:
+        with open(SIZE_MODEL_FILE, encoding="utf-8") as f:
+            return json.load(f).get("ratios", [])
+    except (OSError, ValueError):
+        return []
+
+def update_size_model(results):
+    """
+    Append the "size_ratio" of every freshly built result to the model. Called once
+    from the parent after a run, so parallel workers never race on the file.
+    """
+    new = [r["size_ratio"] for r in results if r.get("status") == "built" and r.get("size_ratio")]
+    if not new:
+        return
+    ratios = (load_size_model() + new)[-SIZE_MODEL_HISTORY:]
+    SIZE_MODEL_FILE.parent.mkdir(parents=True, exist_ok=True)
+    pipeline.write_atomic(SIZE_MODEL_FILE, json.dumps({"ratios": ratios}).encode("utf-8"))
+
+def predict_quality(img, target_bytes, save_kwargs):
+    """
+    Seed quality from the mosaic: binary search the cheap mosaic encode for the highest
+    quality whose scaled estimate (corrected by the fitted ratio) fits the target.
+    Returns (quality, estimate_fn).
+    """
+    mosaic = sample_mosaic(img)
+    scale = (img.width * img.height) / (mosaic.width * mosaic.height)
+    ratios = load_size_model()
+    correction = statistics.median(ratios) if ratios else 1.0
+    mosaic_kwargs = {k: v for k, v in save_kwargs.items() if k != "exif"}
+    cache = {}
+
+    def estimate(q):
+        if q not in cache:
+            cache[q] = len(pipeline.encode_image(mosaic, "JPEG", quality=q, **mosaic_kwargs)) * scale
+        return cache[q]
+
+    low, high, best = 1, 95, 1
     while low <= high:
         mid = (low + high) // 2
-        save_kwargs = {"quality": mid, "optimize": True, "progressive": True}
-        if exif_data:
-            save_kwargs["exif"] = exif_data
-            
-        img.save(temp_path, "JPEG", **save_kwargs)
-        size = os.path.getsize(temp_path)
-        
-        if size < TARGET_JPG_BYTES:
-            best_quality = mid
+        if estimate(mid) * correction < target_bytes:
+            best = mid
             low = mid + 1
         else:
             high = mid - 1
-            
-    # Save final
-    save_kwargs = {"quality": best_quality, "optimize": True, "progressive": True}
-    if exif_data:
-        save_kwargs["exif"] = exif_data
-    img.save(filepath, "JPEG", **save_kwargs)
-    img.close()
-    
-    # Verify
-    new_size_mb = os.path.getsize(filepath) / (1024 * 1024)
-    print(f"   Saved at Q{best_quality}, Size: {new_size_mb:.1f}MB")
-    if os.path.exists(temp_path):
-        os.remove(temp_path)
-        
-    return True
+    return best, estimate
+
+def reencode_jpg(filepath):
+    """
+    Find the highest quality that fits under TARGET_JPG_SIZE_MB.
+    The quality is predicted from a tile mosaic, then confirmed with one or two
+    full in-memory encodes (more only while stepping down from an overshoot).
+    Returns (bytes, quality, full encodes, size ratio for the model); raises
+    ValueError if not even Q1 fits.
+    """
+    with Image.open(filepath) as img:
+        with telemetry.stage("decode"):
+            img.load()
+        exif_data = img.info.get('exif')
+        save_kwargs = {"optimize": True, "progressive": True}
+        if exif_data:
+            save_kwargs["exif"] = exif_data
+
+        with telemetry.stage("predict_quality"):
+            quality, estimate = predict_quality(img, TARGET_JPG_BYTES, save_kwargs)
+
+        # Confirm with full encodes, walking from the predicted quality towards the boundary
+        encodes = {}
+        def full_encode(q):
+            encodes[q] = pipeline.encode_image(img, "JPEG", quality=q, **save_kwargs)
+            return len(encodes[q])
+
+        if full_encode(quality) < TARGET_JPG_BYTES:
+            # Prediction fits: one probe upwards, keep it if it still fits
+            if quality < 95 and full_encode(quality + 1) < TARGET_JPG_BYTES:
+                quality += 1
+        else:
+            # Prediction overshot: step down until it fits
+            while True:
+                if quality == 1:
+                    raise ValueError(f"no JPEG quality fits under {TARGET_JPG_SIZE_MB}MB")
+                quality -= 1
+                if full_encode(quality) < TARGET_JPG_BYTES:
+                    break
 
-def generate_standard_webp(jpg_path):
+    return encodes[quality], quality, len(encodes), len(encodes[quality]) / estimate(quality)
+
+def compress_jpg_in_place(filepath, outputs=None, settings=None):
+    """
+    Compress JPG in-place if it exceeds MAX_JPG_SIZE_MB, to just under TARGET_JPG_SIZE_MB
+    (see reencode_jpg). The written file is always a verified fit.
+    """
+    name = Path(filepath).name
+    size_mb = os.path.getsize(filepath) / (1024 * 1024)
+    if size_mb <= MAX_JPG_SIZE_MB:
+        print(f"✅ JPG OK ({size_mb:.1f}MB): {name}")
+        return {"name": name, "size_mb": size_mb, "quality": None}
+
+    print(f"📉 Compressing JPG ({size_mb:.1f}MB -> TARGET): {name}...")
+    data, quality, full_encodes, size_ratio = reencode_jpg(filepath)
+
+    # Save final. Under run_jobs, write_atomic is buffered (deferred_writes) and the
+    # pipeline's write stage replaces the master after the job returns; called
+    # directly, it replaces the file here.
+    pipeline.write_atomic(filepath, data)
+
+    new_size_mb = len(data) / (1024 * 1024)
+    print(f"   Saved at Q{quality}, Size: {new_size_mb:.1f}MB ({full_encodes} full encodes)")
+    return {"name": name, "size_mb": new_size_mb, "quality": quality, "full_encodes": full_encodes,
+            "size_ratio": size_ratio}
+
+def generate_standard_webp(jpg_path, outputs=None, settings=None):
     """
     Generate standard WebP from the JPG source.
     Resizes to fit within 2912x2184.
     """
     webp_path = Path(jpg_path).with_suffix('.webp')
+    settings = settings or WEBP_SETTINGS
     
-    with Image.open(jpg_path) as img:
-        # Fix orientation
-        img = ImageOps.exif_transpose(img)
-        
-        # Calculate new dimensions maintaining aspect ratio
-        original_w, original_h = img.size
-        
-        # We want to fit within WEBP_MAX_WIDTH x WEBP_MAX_HEIGHT
-        # This is essentially fitting into a box
-        
-        # Check aspect ratio
-        ratio = min(WEBP_MAX_WIDTH / original_w, WEBP_MAX_HEIGHT / original_h)
-        
-        # If image is already smaller than target, don't upscale? 
-        # Actually standard says "Keep 2912x2184", usually implying max dimension.
-        # But if original is smaller, we keep it. 
-        # However, these constitute "Photography", so they are likely huge.
-        
-        if ratio < 1:
-            new_w = int(original_w * ratio)
-            new_h = int(original_h * ratio)
-            img = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-            print(f"   Resizing for WebP: {original_w}x{original_h} -> {new_w}x{new_h}")
-        else:
-            print(f"   Original smaller than target ({original_w}x{original_h}), keeping size.")
-            
-        # Strip metadata for WebP to save space, but maybe keep basic EXIF? 
-        # Usually web display doesn't need full EXIF inside the file if we rely on data/JSON.
-        # But user likes EXIF. Let's keep it if possible, but WebP exif support in PIL can be tricky.
-        # Simple save usually drops it unless specified. 
-        # Let's drop strictly solely primarily to ensure small size, as EXIF is displayed via code lookup in this project mostly?
-        # WAIT: User said "EXIF data MUST be extracted from the actual image file". 
-        # So we MUST KEEP EXIF in the WebP if the component reads from WebP?
-        # Actually key: The "High-Res Downloads" are JPG. The WebP is for display.
-        # If the code reads metadata from the *WebP* or the *JPG*?
-        # Looking at code: `useExif` hook exists. 
-        # The code in `chaoyang2.tsx` (and `flyingSSky.tsx`) has HARDCODED data in `photos` array?
-        # NO: `useExif` hook was seen in `index.tsx` imports but `chaoyang2.tsx` defines `const photos = [ ... aperture: 'f/5.6' ...]`.
-        # So it seems valid metadata is manually put in code or read?
-        # Actually `IMAGE_STANDARDS.md` says: "Source of Truth: EXIF data MUST be extracted from the actual image file... Do not manually hardcode".
-        # This implies dynamic reading.
-        # BUT `chaoyang2.tsx` HAS hardcoded data! 
-        # "Image Standards" is the *goal*. The current code might be transitional. 
-        # Safest bet: Keep EXIF in WebP if possible, or definitely keep it in JPG.
-        # PIL's `.save(..., exif=img.info.get('exif'))` works for WebP in newer versions.
+    # Decode straight to ~2x the WebP box via JPEG DCT scaling instead of holding the
+    # full 11648x8736 frame (plus its transposed copy) in memory
+    img, (original_w, original_h) = pipeline.load_resized(jpg_path, settings["max_width"], settings["max_height"],
+                                                              settings.get("transforms"))
+    new_w, new_h = img.size
+    if (new_w, new_h) != (original_w, original_h):
+        print(f"   Resizing for WebP: {original_w}x{original_h} -> {new_w}x{new_h}")
+    else:
+        print(f"   Original smaller than target ({original_w}x{original_h}), keeping size.")
+
+    # Strip metadata for WebP to save space, but maybe keep basic EXIF? 
+    # Usually web display doesn't need full EXIF inside the file if we rely on data/JSON.
+    # But user likes EXIF. Let's keep it if possible, but WebP exif support in PIL can be tricky.
+    # Simple save usually drops it unless specified. 
+    # Let's drop strictly solely primarily to ensure small size, as EXIF is displayed via code lookup in this project mostly?
+    # WAIT: User said "EXIF data MUST be extracted from the actual image file". 
+    # So we MUST KEEP EXIF in the WebP if the component reads from WebP?
+    # Actually key: The "High-Res Downloads" are JPG. The WebP is for display.
+    # If the code reads metadata from the *WebP* or the *JPG*?
+    # Looking at code: `useExif` hook exists. 
+    # The code in `chaoyang2.tsx` (and `flyingSSky.tsx`) has HARDCODED data in `photos` array?
+    # NO: `useExif` hook was seen in `index.tsx` imports but `chaoyang2.tsx` defines `const photos = [ ... aperture: 'f/5.6' ...]`.
+    # So it seems valid metadata is manually put in code or read?
+    # Actually `IMAGE_STANDARDS.md` says: "Source of Truth: EXIF data MUST be extracted from the actual image file... Do not manually hardcode".
+    # This implies dynamic reading.
+    # BUT `chaoyang2.tsx` HAS hardcoded data! 
+    # "Image Standards" is the *goal*. The current code might be transitional. 
+    # Safest bet: Keep EXIF in WebP if possible, or definitely keep it in JPG.
+    # PIL's `.save(..., exif=img.info.get('exif'))` works for WebP in newer versions.
+    
+    save_kwargs = {"quality": pipeline.resolve_quality(img, Path(jpg_path), settings)}
+    if 'exif' in img.info:
+        save_kwargs['exif'] = img.info['exif']
         
-        save_kwargs = {"quality": WEBP_QUALITY}
-        if 'exif' in img.info:
-            save_kwargs['exif'] = img.info['exif']
-            
-        img.save(webp_path, "WEBP", **save_kwargs)
-        print(f"   Generated WebP: {webp_path.name}")
+    # The smaller srcset widths are downscaled from this already-resized frame
+    asset = pipeline.save_with_variants(img, webp_path, settings["widths"], "WEBP",
+                                        settings["avif"], **save_kwargs)
+    print(f"   Generated WebP: {webp_path.name} (+{len(asset['variants']) - 1} responsive widths)")
+    return {"name": webp_path.name, "width": img.width, "height": img.height,
+            "webp_kb": asset["bytes"] / 1024, "webp_quality": save_kwargs["quality"],
+            "asset": asset, "extra_outputs": pipeline.asset_extra_outputs(asset)}
 
 def cleanup_directory(directory):
     """
-    Remove files that are not the master JPG or the standard WebP.
+    Remove files that are not the master JPG or the standard WebP (with its
+    responsive widths and AVIF siblings).
     E.g. *_web.jpg, *_web.webp, etc.
     """
     path = Path(directory)
@@ -159,11 +248,15 @@ def cleanup_directory(directory):
         if file.suffix.lower() == '.jpg' and '_' not in file.stem:
             continue
             
-        # Is it a standard WebP? (No _, ends in .webp, corresponding JPG exists)
-        if file.suffix.lower() == '.webp' and '_' not in file.stem:
+        # Is it a standard WebP or its AVIF sibling? (No _, corresponding JPG exists)
+        if file.suffix.lower() in ('.webp', '.avif') and '_' not in file.stem:
             # check if corresponding jpg exists
             if file.with_suffix('.jpg').exists() or file.with_suffix('.JPG').exists():
                 continue
+            # Responsive width variant (DSCFxxxx-480w.webp / .avif) of a master JPG
+            m = pipeline.VARIANT_RE.match(file.stem)
+            if m and any((path / f"{m.group('base')}{ext}").exists() for ext in ('.jpg', '.JPG')):
+                continue
                 
         # If we are here, it's likely a derivative file we want to remove
         # e.g. DSCFxxxx_web.webp, DSCFxxxx_web.jpg
@@ -172,26 +265,59 @@ def cleanup_directory(directory):
         print(f"   🗑 Removing: {file.name}")
         os.remove(file)
 
-def main():
+def is_master(path):
+    """Master JPGs in a series directory (derivatives contain '_')."""
+    # Ignore already compressed or derivative files that we might clean up later
+    return "_" not in path.stem
+
+HIRES_JPGS = pipeline.AssetClass("compress_hires_jpg", compress_jpg_in_place, JPG_SETTINGS, roots=TARGET_DIRS,
+                                 extensions={".jpg"}, include=is_master, outputs=pipeline.in_place)
+HIRES_WEBPS = pipeline.AssetClass("compress_hires_webp", generate_standard_webp, WEBP_SETTINGS, roots=TARGET_DIRS,
+                                  extensions={".jpg"}, include=is_master)
+
+def main(force=False, workers=1, target_ssim=None):
     print("🚀 Starting Optimization for Photography Series...")
-    
-    # 1. Compress & Generate
+    manifest = pipeline.BuildManifest()
+
+    series_dirs = []
     for d in TARGET_DIRS:
         if not os.path.exists(d):
             print(f"Directory not found: {d}")
             continue
-            
-        for file in Path(d).rglob("*.JPG"): # Case sensitive check usually on Mac works either way but let's match exact
-            # Ignore already compressed or derivative files that we might clean up later
-            if "_" in file.stem: 
-                continue
-                
-            print(f"\nProcessing {file.name}...")
-            compress_jpg_in_place(file)
-            generate_standard_webp(file)
-            
-        # 2. Cleanup
+        series_dirs.append(d)
+    print(f"Found {sum(1 for _ in HIRES_JPGS.sources())} masters in {len(series_dirs)} series.")
+
+    # 1. Compress & Generate
+    # Jobs from all series share one pool; WebPs are built from the compressed JPG,
+    # so the compress pass finishes before the WebP pass starts.
+    jpg_results = pipeline.run_asset_classes([HIRES_JPGS], manifest, force=force, workers=workers)
+    update_size_model(jpg_results)
+    webp_results = pipeline.run_asset_classes([HIRES_WEBPS], manifest, force=force, workers=workers,
+                                              target_ssim=target_ssim)
+    pipeline.update_asset_manifest(webp_results)
+
+    # 2. Cleanup
+    for d in series_dirs:
         cleanup_directory(d)
 
+    print_summary(jpg_results, webp_results)
+
+def print_summary(jpg_results, webp_results):
+    print("\n--- Photography Summary ---")
+    print(f"{'File':<30} | {'JPG':<18} | {'WebP Dims':<11} | {'WebP Size'}")
+    print("-" * 80)
+    for jpg, webp in zip(jpg_results, webp_results):
+        if jpg.get("status") == "failed" or webp.get("status") == "failed":
+            print(f"{Path(jpg.get('source', webp.get('source', '?'))).name:<30} | Error: {jpg.get('error') or webp.get('error')}")
+            continue
+        jpg_note = f"{jpg['size_mb']:.1f}MB" + (f" @Q{jpg['quality']}" if jpg["quality"] else "")
+        dims = f"{webp['width']}x{webp['height']}"
+        print(f"{jpg['name']:<30} | {jpg_note:<18} | {dims:<11} | {webp['webp_kb']:.1f}KB @Q{webp.get('webp_quality', WEBP_QUALITY)}")
+    pipeline.print_run_stats(jpg_results + webp_results)
+
 if __name__ == "__main__":
-    main()
+    parser = pipeline.add_pipeline_args(argparse.ArgumentParser(description=__doc__))
+    args = parser.parse_args()
+    telemetry.configure(args.telemetry, args.profile)
+    main(force=args.force, workers=args.workers, target_ssim=args.target_ssim)
+    telemetry.finish()
@@ -0,0 +1,4 @@
+"""pytest setup for the pipeline scripts: run with `python3 -m pytest scripts`."""
+
+# A manual check that writes into static/img, not a test module
+collect_ignore = ["test_webp.py"]
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Find duplicate and near-duplicate images under static/ and propose one canonical
+asset per group (nothing is deleted or rewritten).
+
+1. Byte-identical files: grouped by BLAKE2b content hash.
+2. Near-duplicates (re-exports, backups, other quality/format): 64-bit pHash
+   (DCT of a 32x32 luma thumbnail) and dHash (9x8 gradient) computed with NumPy.
+   pHashes go into a BK-tree, so each lookup only visits hashes that can be within
+   the Hamming threshold; candidates must also agree on dHash and aspect ratio,
+   and no 16x16-pixel tile of their 256px thumbnails may differ by more than TILE_THRESHOLD
+   (global hashes miss local edits, e.g. an artwork variant with one detail changed).
+3. Hashes are cached in .asset-cache/image-hashes.json and reused while a file's
+   size + mtime are unchanged.
+4. The canonical asset is the one the site references (reference_index), outside
+   backup folders, with the most pixels. Every other member gets the references
+   to rewrite and the bytes it would free.
+
+Generated siblings (name-480w.webp, name.avif next to name.webp) are not compared,
+and neither are a source and the files the pipeline built from it (per the build
+manifest, e.g. a PNG and its optimized WebP).
+
+Usage: python scripts/dedupe_assets.py [--threshold 6] [--json plan.json]
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+import asset_pipeline as pipeline
+from reference_index import load_index, resolve_reference
+
+HASH_CACHE_FILE = pipeline.CACHE_DIR / "image-hashes.json"
+HASH_CACHE_VERSION = 1
+
+EXTENSIONS = {".webp", ".png", ".jpg", ".jpeg", ".gif", ".avif", ".bak"}
+# Copies kept "just in case"; never chosen as canonical while another member exists
+BACKUP_DIRS = {"artworks_backup", "digital_Resource"}
+# Content-hashed copies made by fingerprint_assets.py (identical by design),
+# deep-zoom tiles made by build_tiles.py (crops of a master) and thumbnail sheets
+# made by build_atlas.py
+EXCLUDE_DIRS = {"hashed", "tiles", "atlas"}
+# Hamming distances (of 64 bits) for a near-duplicate: pHash finds candidates, dHash confirms
+PHASH_THRESHOLD = 6
+DHASH_THRESHOLD = 10
+ASPECT_TOLERANCE = 0.02
+# Max mean absolute luma difference (0-255) of any tile; re-encodes stay around 1
+TILE_SIZE = 16
+TILE_THRESHOLD = 8
+THUMBNAIL_DIM = 256
+PHASH_SIZE = 32
+HASH_SIZE = 8
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)
+    return np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+
+
+_DCT = _dct_matrix(PHASH_SIZE)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int("".join("1" if b else "0" for b in bits.ravel()), 2)
+
+
+def _gray(img) -> Image.Image:
+    if img.mode in ("RGBA", "LA", "P", "PA"):
+        img = img.convert("RGBA")
+        # Composite on white so transparent regions hash like the page background
+        background = Image.new("RGBA", img.size, (255, 255, 255, 255))
+        img = Image.alpha_composite(background, img)
+    return img.convert("L")
+
+
+def phash(gray) -> int:
+    """64-bit pHash: signs of the 8x8 lowest DCT frequencies against their median."""
+    pixels = np.asarray(gray.resize((PHASH_SIZE, PHASH_SIZE), Image.Resampling.LANCZOS), dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:HASH_SIZE, :HASH_SIZE]
+    # The DC term only encodes overall brightness
+    return _bits_to_int(low > np.median(low.ravel()[1:]))
+
+
+def dhash(gray) -> int:
+    """64-bit dHash: is each pixel brighter than its right neighbour (9x8 thumbnail)."""
+    pixels = np.asarray(gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS), dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """Burkhard-Keller tree over Hamming distance: range queries without comparing every pair."""
+
+    def __init__(self):
+        self.root = None  # [value, item, {distance: child}]
+
+    def add(self, value: int, item):
+        node = [value, item, {}]
+        if self.root is None:
+            self.root = node
+            return
+        current = self.root
+        while True:
+            d = hamming(value, current[0])
+            child = current[2].get(d)
+            if child is None:
+                current[2][d] = node
+                return
+            current = child
+
+    def query(self, value: int, radius: int) -> list:
+        """[(distance, item)] for every stored value within radius."""
+        found = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node_value, item, children = stack.pop()
+            d = hamming(value, node_value)
+            if d <= radius:
+                found.append((d, item))
+            # Triangle inequality: only subtrees at distance d-radius..d+radius can match
+            stack.extend(child for dist, child in children.items() if d - radius <= dist <= d + radius)
+        return found
+
+
+def is_generated(path: Path) -> bool:
+    """Responsive widths and AVIF siblings of another asset (duplicates by design)."""
+    if path.suffix.lower() == ".avif" and path.with_suffix(".webp").exists():
+        return True
+    m = pipeline.VARIANT_RE.match(path.stem)
+    return bool(m) and path.with_name(m.group("base") + path.suffix).exists()
+
+
+def build_roots() -> dict:
+    """
+    {rel path of a build output: rel path of the source it was ultimately built from},
+    from the build manifest (keys are "stage:rel source"). In-place outputs are skipped.
+    """
+    sources = {}
+    for key, entry in pipeline.BuildManifest().entries.items():
+        source = key.partition(":")[2]
+        for output in entry.get("outputs", {}):
+            if output != source:
+                sources[output] = source
+    roots = {}
+    for output in sources:
+        root, seen = output, set()
+        while root in sources and root not in seen:
+            seen.add(root)
+            root = sources[root]
+        roots[output] = root
+    return roots
+
+
+def _describe(path: Path) -> dict:
+    entry = {"hash": pipeline.file_hash(path)}
+    try:
+        img, size = pipeline.load_resized(path, THUMBNAIL_DIM, THUMBNAIL_DIM)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return entry  # not decodable (e.g. an unknown .bak): exact matching only
+    gray = _gray(img)
+    entry.update(width=size[0], height=size[1], phash=phash(gray), dhash=dhash(gray))
+    return entry
+
+
+def max_tile_difference(a, b) -> float:
+    """Largest per-tile mean absolute difference between two grayscale thumbnails."""
+    x = np.asarray(a, dtype=np.float64)
+    y = np.asarray(b.resize(a.size, Image.Resampling.LANCZOS), dtype=np.float64)
+    h, w = (x.shape[0] // TILE_SIZE) * TILE_SIZE, (x.shape[1] // TILE_SIZE) * TILE_SIZE
+    diff = np.abs(x[:h, :w] - y[:h, :w])
+    return float(diff.reshape(h // TILE_SIZE, TILE_SIZE, w // TILE_SIZE, TILE_SIZE).mean(axis=(1, 3)).max())
+
+
+def load_hashes(paths, threads=pipeline.DEFAULT_IO_THREADS) -> dict:
+    """{rel path: {hash, width, height, phash, dhash, size}} using and updating the cache."""
+    cache = {}
+    try:
+        with open(HASH_CACHE_FILE, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == HASH_CACHE_VERSION:
+            cache = data.get("entries", {})
+    except (OSError, ValueError):
+        pass
+
+    entries, stale = {}, []
+    for path in paths:
+        key = pipeline.rel_path(path)
+        st = os.stat(path)
+        entry = cache.get(key)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            entries[key] = entry
+        else:
+            stale.append((key, path, st))
+
+    # Decoding a thumbnail is mostly libjpeg / libwebp time, which releases the GIL
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for (key, path, st), entry in zip(stale, pool.map(lambda item: _describe(item[1]), stale)):
+            entries[key] = dict(entry, size=st.st_size, mtime_ns=st.st_mtime_ns)
+
+    if stale or set(cache) != set(entries):
+        HASH_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": HASH_CACHE_VERSION, "entries": entries}
+        pipeline.write_atomic(HASH_CACHE_FILE, json.dumps(data, sort_keys=True).encode("utf-8"))
+    print(f"🔎 Hashed {len(entries)} images ({len(stale)} re-read)")
+    return entries
+
+
+def _unrelated(groups, roots) -> list:
+    """Groups with members from at least two build lineages (not just a source and its outputs)."""
+    return [members for members in groups if len({roots.get(k, k) for k in members}) > 1]
+
+
+def exact_groups(entries: dict, roots=None) -> list:
+    roots = roots or {}
+    by_hash = {}
+    for key, entry in entries.items():
+        by_hash.setdefault(entry["hash"], []).append(key)
+    return _unrelated([sorted(keys) for keys in by_hash.values() if len(keys) > 1], roots)
+
+
+def near_groups(entries: dict, exact: list, threshold=PHASH_THRESHOLD, roots=None) -> list:
+    """
+    Clusters of perceptually similar images (one representative per exact group).
+    A source and its build outputs are never linked directly.
+    """
+    roots = roots or {}
+    duplicate_of = {key: group[0] for group in exact for key in group[1:]}
+    keys = [k for k, e in entries.items() if "phash" in e and k not in duplicate_of]
+    tree = BKTree()
+    for key in keys:
+        tree.add(entries[key]["phash"], key)
+
+    parent = {key: key for key in keys}
+    thumbnails = {}
+
+    def thumbnail(key):
+        if key not in thumbnails:
+            thumbnails[key] = _gray(pipeline.load_resized(pipeline.PROJECT_ROOT / key, THUMBNAIL_DIM, THUMBNAIL_DIM)[0])
+        return thumbnails[key]
+
+    def find(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    for key in keys:
+        a = entries[key]
+        for _, other in tree.query(a["phash"], threshold):
+            b = entries[other]
+            if roots.get(other, other) == roots.get(key, key) or hamming(a["dhash"], b["dhash"]) > DHASH_THRESHOLD:
+                continue
+            if abs(a["width"] / a["height"] - b["width"] / b["height"]) > ASPECT_TOLERANCE * a["width"] / a["height"]:
+                continue
+            if find(other) == find(key) or max_tile_difference(thumbnail(key), thumbnail(other)) > TILE_THRESHOLD:
+                continue
+            parent[find(other)] = find(key)
+
+    clusters = {}
+    for key in keys:
+        clusters.setdefault(find(key), []).append(key)
+    return _unrelated([sorted(members) for members in clusters.values() if len(members) > 1], roots)
+
+
+def references_to(index) -> dict:
+    """{rel path of a static file: sorted source files referencing it}"""
+    refs = {}
+    for ref, sources in index.references().items():
+        for source in sources:
+            target = resolve_reference(ref, source)
+            if target is not None:
+                refs.setdefault(pipeline.rel_path(target), set()).add(source)
+    return {k: sorted(v) for k, v in refs.items()}
+
+
+def choose_canonical(members, entries, refs) -> str:
+    def rank(key):
+        in_backup = bool(BACKUP_DIRS & set(Path(key).parts)) or key.endswith(".bak")
+        e = entries[key]
+        return (not refs.get(key), in_backup, -(e.get("width", 0) * e.get("height", 0)), len(key), key)
+    return min(members, key=rank)
+
+
+def propose(groups, entries, refs, kind, roots=None) -> list:
+    """One entry per group; the canonical asset's own source / outputs are not listed as duplicates."""
+    roots = roots or {}
+    plan = []
+    for members in groups:
+        canonical = choose_canonical(members, entries, refs)
+        lineage = roots.get(canonical, canonical)
+        duplicates = [{
+            "path": key,
+            "bytes": entries[key]["size"],
+            "references": refs.get(key, []),
+            **({"phash_distance": hamming(entries[key]["phash"], entries[canonical]["phash"])}
+               if kind == "near" else {}),
+        } for key in members if roots.get(key, key) != lineage]
+        plan.append({"kind": kind, "canonical": canonical, "duplicates": duplicates})
+    return plan
+
+
+def print_plan(plan, title):
+    reclaimable = sum(d["bytes"] for group in plan for d in group["duplicates"])
+    print(f"\n{title}: {len(plan)} group(s), {reclaimable / 1024:.1f}KB reclaimable")
+    for group in plan:
+        print(f"  keep {group['canonical']}")
+        for d in group["duplicates"]:
+            distance = f", distance {d['phash_distance']}" if "phash_distance" in d else ""
+            print(f"    - {d['path']} ({d['bytes'] / 1024:.1f}KB{distance})")
+            if d["references"]:
+                print(f"      rewrite references in: {', '.join(d['references'])}")
+
+
+def main(threshold=PHASH_THRESHOLD, plan_path=None):
+    print(f"🧮 Scanning {pipeline.STATIC_DIR} for duplicate images...")
+    paths = [p for p in pipeline.scan_images(pipeline.STATIC_DIR, EXTENSIONS, EXCLUDE_DIRS) if not is_generated(p)]
+    entries = load_hashes(paths)
+    refs = references_to(load_index())
+    roots = build_roots()
+
+    exact = exact_groups(entries, roots)
+    plan = propose(exact, entries, refs, "exact", roots)
+    print_plan(plan, "🔁 Byte-identical")
+    near = propose(near_groups(entries, exact, threshold, roots), entries, refs, "near", roots)
+    print_plan(near, f"🪞 Near-duplicates (pHash distance <= {threshold})")
+    plan += near
+
+    if plan_path:
+        Path(plan_path).write_text(json.dumps(plan, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"\nPlan written to {plan_path}")
+    return plan
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Propose canonical assets for duplicate images in static/")
+    parser.add_argument("--threshold", type=int, default=PHASH_THRESHOLD,
+                        help=f"max pHash Hamming distance for near-duplicates (default: {PHASH_THRESHOLD})")
+    parser.add_argument("--json", dest="plan_path", metavar="PATH", help="also write the proposal as JSON")
+    args = parser.parse_args()
+    main(args.threshold, args.plan_path)
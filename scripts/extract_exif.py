@@ -5,101 +5,147 @@ extract_exif.py - 构建时预提取 EXIF 数据
 用途：避免运行时为每张图片发起 Range Request，
 通过预提取 EXIF 到 JSON 文件加速页面加载。
 
-运行：python scripts/extract_exif.py
+运行：python scripts/extract_exif.py [--telemetry report.jsonl] [--profile cprofile|tracemalloc]
 
-输出：static/photography/exif.json
+输出：static/photography/exif.json（完整字段）
+      static/photography/exif/<系列>.json（按系列分片、压缩、仅展示字段，供 useExif 按需加载）
+      static/photography/exif/index.json（分片索引）
+
+富士机身的胶片模拟、颗粒效果与动态范围由 scripts/fuji_makernote.py
+从 MakerNote 解析（只读文件头，不解码图像）。
+
+元数据来自 scripts/metadata_index.py 的增量索引（按 路径 + mtime/大小/哈希 缓存），
+未变化的文件不会被重新读取。
 """
 
-import os
+import argparse
+import hashlib
 import json
 from pathlib import Path
-from PIL import Image
-from PIL.ExifTags import TAGS, GPSTAGS
+
+import asset_pipeline as pipeline
+import telemetry
+from metadata_index import MetadataIndex, merged_tags, rational
 
 # 配置
-PHOTOGRAPHY_DIR = Path("/Users/yukari/Code/sukima-ml/static/photography")
+PHOTOGRAPHY_DIR = pipeline.PHOTOGRAPHY_DIR
 OUTPUT_FILE = PHOTOGRAPHY_DIR / "exif.json"
 
+# 按系列分片输出（useExif 只加载当前系列的分片）
+SHARD_DIR = PHOTOGRAPHY_DIR / "exif"
+SHARD_INDEX_FILE = SHARD_DIR / "index.json"
+# 不属于任何系列目录的照片
+ROOT_SHARD = "_root"
+# 分片只保留页面展示所需字段（序列号、版权等仅保留在完整的 exif.json 中）
+DISPLAY_FIELDS = [
+    "make", "camera", "lens",
+    "aperture", "shutterSpeed", "iso", "exposureCompensation", "focalLength",
+    "dateTime", "artist",
+    "filmSimulation", "grainEffect", "grainSize", "dynamicRange",
+    "width", "height",
+]
+
 # 是否在输出中包含 GPS 数据（隐私考量）
+# 元数据索引本身不收录 GPS IFD，因此这里始终排除
 INCLUDE_GPS = False
 
-def get_exif_data(image_path: Path) -> dict:
-    """从图片提取 EXIF 数据"""
-    try:
-        with Image.open(image_path) as img:
-            exif_raw = img._getexif()
-            if not exif_raw:
-                return {}
-            
-            exif_data = {}
-            
-            for tag_id, value in exif_raw.items():
-                tag = TAGS.get(tag_id, tag_id)
-                
-                # 跳过二进制数据
-                if isinstance(value, bytes):
-                    continue
-                
-                # GPS 数据处理
-                if tag == "GPSInfo" and not INCLUDE_GPS:
-                    # 跳过 GPS 以保护隐私
-                    continue
-                
-                # 关键 EXIF 字段
-                if tag in [
-                    "Make", "Model", "LensModel", 
-                    "FocalLength", "FNumber", "ExposureTime", 
-                    "ISOSpeedRatings", "ExposureBiasValue",
-                    "DateTimeOriginal", "DateTime",
-                    "Artist", "Copyright",
-                    "ImageWidth", "ImageLength",
-                    "BodySerialNumber", "LensSerialNumber"
-                ]:
-                    # 格式化特定字段
-                    if tag == "FNumber" and hasattr(value, 'numerator'):
-                        exif_data["aperture"] = f"f/{float(value):.1f}"
-                    elif tag == "ExposureTime" and hasattr(value, 'numerator'):
-                        if value < 1:
-                            exif_data["shutterSpeed"] = f"1/{int(1/float(value))}"
-                        else:
-                            exif_data["shutterSpeed"] = f"{float(value)}s"
-                    elif tag == "FocalLength" and hasattr(value, 'numerator'):
-                        exif_data["focalLength"] = f"{int(float(value))}mm"
-                    elif tag == "ExposureBiasValue" and hasattr(value, 'numerator'):
-                        bias = float(value)
-                        if bias > 0:
-                            exif_data["exposureCompensation"] = f"+{bias:.1f} EV"
-                        elif bias < 0:
-                            exif_data["exposureCompensation"] = f"{bias:.1f} EV"
-                        else:
-                            exif_data["exposureCompensation"] = "0 EV"
-                    elif tag == "ISOSpeedRatings":
-                        exif_data["iso"] = str(value)
-                    elif tag == "Model":
-                        exif_data["camera"] = str(value)
-                    elif tag == "Make":
-                        exif_data["make"] = str(value)
-                    elif tag == "LensModel":
-                        exif_data["lens"] = str(value).rstrip('\x00 ')
-                    elif tag in ["DateTimeOriginal", "DateTime"]:
-                        exif_data["dateTime"] = str(value)
-                    elif tag == "Artist":
-                        exif_data["artist"] = str(value).rstrip('\x00 ')
-                    elif tag == "Copyright":
-                        exif_data["copyright"] = str(value).rstrip('\x00 ')
-                    elif tag == "ImageWidth":
-                        exif_data["width"] = int(value)
-                    elif tag == "ImageLength":
-                        exif_data["height"] = int(value)
-                    elif tag == "BodySerialNumber":
-                        exif_data["bodySerial"] = str(value).rstrip('\x00 ')
-                    elif tag == "LensSerialNumber":
-                        exif_data["lensSerial"] = str(value).rstrip('\x00 ')
-            
-            return exif_data
-    except Exception as e:
-        print(f"  警告: 无法读取 {image_path.name}: {e}")
-        return {}
+def format_exif(tags: dict) -> dict:
+    """将索引中的原始 EXIF 标签格式化为展示字段"""
+    exif_data = {}
+
+    for tag, value in tags.items():
+        # 关键 EXIF 字段
+        if tag == "FNumber":
+            exif_data["aperture"] = f"f/{rational(value):.1f}"
+        elif tag == "ExposureTime":
+            seconds = rational(value)
+            if 0 < seconds < 1:
+                exif_data["shutterSpeed"] = f"1/{int(1 / seconds)}"
+            else:
+                exif_data["shutterSpeed"] = f"{seconds}s"
+        elif tag == "FocalLength":
+            exif_data["focalLength"] = f"{int(rational(value))}mm"
+        elif tag == "ExposureBiasValue":
+            bias = rational(value)
+            if bias > 0:
+                exif_data["exposureCompensation"] = f"+{bias:.1f} EV"
+            elif bias < 0:
+                exif_data["exposureCompensation"] = f"{bias:.1f} EV"
+            else:
+                exif_data["exposureCompensation"] = "0 EV"
+        elif tag == "ISOSpeedRatings":
+            exif_data["iso"] = str(value)
+        elif tag == "Model":
+            exif_data["camera"] = str(value)
+        elif tag == "Make":
+            exif_data["make"] = str(value)
+        elif tag == "LensModel":
+            exif_data["lens"] = str(value).rstrip('\x00 ')
+        elif tag in ["DateTimeOriginal", "DateTime"]:
+            exif_data["dateTime"] = str(value)
+        elif tag == "Artist":
+            exif_data["artist"] = str(value).rstrip('\x00 ')
+        elif tag == "Copyright":
+            exif_data["copyright"] = str(value).rstrip('\x00 ')
+        elif tag == "ImageWidth":
+            exif_data["width"] = int(value)
+        elif tag == "ImageLength":
+            exif_data["height"] = int(value)
+        elif tag == "BodySerialNumber":
+            exif_data["bodySerial"] = str(value).rstrip('\x00 ')
+        elif tag == "LensSerialNumber":
+            exif_data["lensSerial"] = str(value).rstrip('\x00 ')
+
+    return exif_data
+
+def write_if_changed(path: Path, content: str) -> bool:
+    """内容未变化时不重写（保持 mtime，避免无意义的部署差异）"""
+    if path.exists() and path.read_text(encoding='utf-8') == content:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pipeline.write_atomic(path, content.encode('utf-8'))
+    return True
+
+def build_shards(exif_db: dict) -> dict:
+    """
+    按系列拆分并压缩：
+    {"defaults": {系列内所有照片相同的字段}, "photos": {"DSCF0192.JPG": {其余字段}}}
+    """
+    series_photos = {}
+    for key, exif_data in exif_db.items():
+        parts = key.strip("/").split("/", 1)
+        series, name = (parts[0], parts[1]) if len(parts) == 2 else (ROOT_SHARD, parts[0])
+        series_photos.setdefault(series, {})[name] = {k: exif_data[k] for k in DISPLAY_FIELDS if k in exif_data}
+
+    shards = {}
+    for series, photos in series_photos.items():
+        items = list(photos.values())
+        defaults = {k: v for k, v in items[0].items() if all(p.get(k) == v for p in items[1:])} if len(items) > 1 else {}
+        shards[series] = {
+            "defaults": defaults,
+            "photos": {name: {k: v for k, v in p.items() if k not in defaults} for name, p in sorted(photos.items())},
+        }
+    return shards
+
+def write_shards(shards: dict):
+    index = {}
+    for series, shard in sorted(shards.items()):
+        content = json.dumps(shard, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+        write_if_changed(SHARD_DIR / f"{series}.json", content)
+        index[series] = {
+            "count": len(shard["photos"]),
+            "bytes": len(content.encode('utf-8')),
+            "hash": hashlib.blake2b(content.encode('utf-8'), digest_size=4).hexdigest(),
+        }
+
+    # 删除已不存在系列的旧分片
+    if SHARD_DIR.exists():
+        for old in SHARD_DIR.glob("*.json"):
+            if old != SHARD_INDEX_FILE and old.stem not in shards:
+                old.unlink()
+
+    write_if_changed(SHARD_INDEX_FILE, json.dumps(index, ensure_ascii=False, separators=(',', ':'), sort_keys=True))
+    return index
 
 def main():
     print("=" * 60)
@@ -111,35 +157,51 @@ def main():
         return
     
     exif_db = {}
-    image_extensions = {'.jpg', '.jpeg', '.JPG', '.JPEG'}
+    image_extensions = {'.jpg', '.jpeg'}
+
+    # 增量索引：只解析新增/修改过的文件，且只读取文件头
+    index = MetadataIndex()
+    with telemetry.stage("index_refresh"):
+        records = index.refresh(pipeline.scan_images(PHOTOGRAPHY_DIR, image_extensions))
+        index.prune(PHOTOGRAPHY_DIR)
+        index.save()
+    print(f"索引: {len(records)} 张图片, 重新解析 {index.parsed} 张")
     
-    # 扫描所有图片
-    for img_path in PHOTOGRAPHY_DIR.rglob("*"):
-        if img_path.suffix not in image_extensions:
-            continue
+    with telemetry.stage("format"):
+        for img_path, entry in sorted(records.items()):
+            # 获取相对路径作为 key
+            rel_path = img_path.relative_to(PHOTOGRAPHY_DIR)
+            key = "/" + str(rel_path).replace("\\", "/")
         
-        # 获取相对路径作为 key
-        rel_path = img_path.relative_to(PHOTOGRAPHY_DIR)
-        key = "/" + str(rel_path).replace("\\", "/")
+            exif_data = format_exif(merged_tags(entry))
+            # 富士 MakerNote：胶片模拟 / 颗粒效果 / 动态范围
+            exif_data.update(entry.get("makernote", {}))
         
-        print(f"处理: {rel_path}")
-        exif_data = get_exif_data(img_path)
-        
-        if exif_data:
-            exif_db[key] = exif_data
-            print(f"  ✓ 提取到 {len(exif_data)} 个字段")
-        else:
-            print(f"  - 无 EXIF 数据")
-    
-    # 写入 JSON
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(exif_db, f, ensure_ascii=False, indent=2)
+            if exif_data:
+                exif_db[key] = exif_data
+            else:
+                print(f"  - 无 EXIF 数据: {rel_path}")
+
+    # 写入完整 JSON（内容未变化时不重写）
+    with telemetry.stage("write_json"):
+        if not write_if_changed(OUTPUT_FILE, json.dumps(exif_db, ensure_ascii=False, indent=2)):
+            print("exif.json 无变化，跳过写入")
+
+    # 写入按系列分片的精简 JSON
+    with telemetry.stage("write_shards"):
+        shard_index = write_shards(build_shards(exif_db))
     
     print("=" * 60)
     print(f"完成! 共处理 {len(exif_db)} 张图片")
     print(f"输出: {OUTPUT_FILE}")
+    for series, info in shard_index.items():
+        print(f"分片: exif/{series}.json ({info['count']} 张, {info['bytes']} 字节)")
     print(f"GPS 数据: {'包含' if INCLUDE_GPS else '已排除 (隐私保护)'}")
     print("=" * 60)
 
 if __name__ == "__main__":
+    parser = telemetry.add_telemetry_args(argparse.ArgumentParser(description="构建时预提取 EXIF 数据"))
+    args = parser.parse_args()
+    telemetry.configure(args.telemetry, args.profile)
     main()
+    telemetry.finish()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Content-hashed copies of the optimized assets, for immutable caching.
+
+1. Every web asset under static/img and static/photography (WebP, AVIF, PNG, SVG;
+   not the hi-res JPG downloads) is copied to static/hashed/ with its content hash
+   in the name: photography/Skitting/DSCF0192.webp ->
+   /hashed/photography/Skitting/DSCF0192.3fa9c1.webp
+2. The mapping is written to src/data/asset-paths.json; assetUrl() in
+   src/data/assetManifest.ts resolves stable paths through it (srcset, GfxPhoto,
+   galleries) and logicalPath() maps hashed URLs back (useExif keys).
+3. static/_headers marks /hashed/* (and Docusaurus' own hashed /assets/*, the
+   content-tagged deep-zoom tiles under /tiles/* and thumbnail atlases under /atlas/*)
+   as immutable, and /sw.js as no-cache. All hashed files share one prefix, so one
+   rule covers them (Cloudflare allows at most 100 _headers rules).
+4. Hashed files that are no longer mapped are removed.
+
+A changed image gets a new URL, so browsers and the CDN never serve a stale copy.
+The stable names stay deployed for pages that use literal paths, so web assets
+ship twice; bundle_budget.py's max_files check counts both copies.
+Standard library only; the deploy workflow runs it before `npm run build`.
+
+Usage: python scripts/fingerprint_assets.py
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path, PurePosixPath
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+STATIC_DIR = PROJECT_ROOT / "static"
+HASHED_DIR = STATIC_DIR / "hashed"
+HEADERS_FILE = STATIC_DIR / "_headers"
+PATHS_FILE = PROJECT_ROOT / "src" / "data" / "asset-paths.json"
+
+SOURCE_DIRS = ["img", "photography"]
+EXTENSIONS = {".webp", ".avif", ".png", ".svg", ".gif"}
+FINGERPRINT_LENGTH = 6
+HASH_CHUNK_BYTES = 1024 * 1024
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+HEADER_RULES = [
+    ("/hashed/*", IMMUTABLE),
+    # Docusaurus already content-hashes its JS/CSS/image bundles
+    ("/assets/*", IMMUTABLE),
+    # Deep-zoom pyramids carry a content tag in their names (build_tiles.py)
+    ("/tiles/*", IMMUTABLE),
+    # Thumbnail sheets carry a content hash in their names (build_atlas.py)
+    ("/atlas/*", IMMUTABLE),
+    # The photo service worker (build_precache.py) must be revalidated so updates ship
+    ("/sw.js", "no-cache"),
+]
+
+
+def content_fingerprint(path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_BYTES)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()[:FINGERPRINT_LENGTH]
+
+
+def fingerprinted_name(rel: PurePosixPath, digest: str) -> PurePosixPath:
+    """img/yukari.webp -> img/yukari.3fa9c1.webp"""
+    return rel.with_name(f"{rel.stem}.{digest}{rel.suffix}")
+
+
+def web_assets():
+    for name in SOURCE_DIRS:
+        for dirpath, _, filenames in os.walk(STATIC_DIR / name):
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1].lower() in EXTENSIONS:
+                    yield Path(dirpath) / filename
+
+
+def write_text(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def build_headers() -> str:
+    lines = ["# Generated by scripts/fingerprint_assets.py; do not edit"]
+    for pattern, cache_control in HEADER_RULES:
+        lines += [pattern, f"  Cache-Control: {cache_control}"]
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    print("🔏 Fingerprinting web assets...")
+    mapping = {}
+    copied = 0
+    for path in web_assets():
+        rel = PurePosixPath(path.relative_to(STATIC_DIR).as_posix())
+        hashed_rel = fingerprinted_name(rel, content_fingerprint(path))
+        target = HASHED_DIR / hashed_rel
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(path, target)
+            copied += 1
+        mapping[f"/{rel}"] = f"/hashed/{hashed_rel}"
+
+    # Drop copies of old content (and of deleted assets)
+    current = {HASHED_DIR / url[len("/hashed/"):] for url in mapping.values()}
+    removed = 0
+    for dirpath, _, filenames in os.walk(HASHED_DIR, topdown=False):
+        for filename in filenames:
+            path = Path(dirpath) / filename
+            if path not in current:
+                path.unlink()
+                removed += 1
+        if dirpath != str(HASHED_DIR) and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+
+    write_text(PATHS_FILE, json.dumps(mapping, ensure_ascii=False, indent=2, sort_keys=True) + "\n")
+    write_text(HEADERS_FILE, build_headers())
+    print(f"✅ {len(mapping)} assets mapped ({copied} new copies, {removed} stale removed)")
+    print(f"   Mapping -> {PATHS_FILE.relative_to(PROJECT_ROOT)}, headers -> {HEADERS_FILE.relative_to(PROJECT_ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
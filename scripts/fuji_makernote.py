@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Minimal Fujifilm MakerNote reader (GFX / X-series JPEGs).
+
+Reads only the JPEG header: walks the markers up to the APP1 "Exif" segment,
+follows IFD0 -> Exif IFD -> MakerNote (0x927C), and decodes the Fuji IFD in it.
+The 100MP image data is never read or decoded.
+
+MakerNote layout: "FUJIFILM" + uint32 LE offset to the IFD; the IFD is always
+little-endian and its value offsets are relative to the start of the MakerNote.
+
+Usage: python scripts/fuji_makernote.py <file.JPG> [...]
+"""
+
+import struct
+import sys
+
+EXIF_IFD_POINTER = 0x8769
+MAKERNOTE_TAG = 0x927C
+
+# Fuji MakerNote tag ids
+TAG_SATURATION = 0x1003          # also carries the B&W / ACROS film simulations
+TAG_GRAIN_ROUGHNESS = 0x1047
+TAG_GRAIN_SIZE = 0x104C
+TAG_DYNAMIC_RANGE = 0x1400
+TAG_FILM_MODE = 0x1401
+TAG_DYNAMIC_RANGE_SETTING = 0x1402
+TAG_DEVELOPMENT_DYNAMIC_RANGE = 0x1403
+WANTED_TAGS = {TAG_SATURATION, TAG_GRAIN_ROUGHNESS, TAG_GRAIN_SIZE, TAG_DYNAMIC_RANGE,
+               TAG_FILM_MODE, TAG_DYNAMIC_RANGE_SETTING, TAG_DEVELOPMENT_DYNAMIC_RANGE}
+
+FILM_MODES = {
+    0x000: "Provia (Standard)",
+    0x100: "Studio Portrait",
+    0x110: "Studio Portrait Enhanced Saturation",
+    0x120: "Astia (Soft)",
+    0x130: "Studio Portrait Increased Sharpness",
+    0x200: "Velvia (Vivid)",
+    0x300: "Studio Portrait Ex",
+    0x400: "Velvia",
+    0x500: "Pro Neg. Std",
+    0x501: "Pro Neg. Hi",
+    0x600: "Classic Chrome",
+    0x700: "Eterna",
+    0x800: "Classic Negative",
+    0x900: "Eterna Bleach Bypass",
+    0xA00: "Nostalgic Neg",
+    0xB00: "Reala Ace",
+}
+
+# Monochrome simulations are stored in the Saturation tag instead of FilmMode
+MONOCHROME_MODES = {
+    0x300: "Monochrome",
+    0x301: "Monochrome + R Filter",
+    0x302: "Monochrome + Ye Filter",
+    0x303: "Monochrome + G Filter",
+    0x310: "Sepia",
+    0x500: "Acros",
+    0x501: "Acros + R Filter",
+    0x502: "Acros + Ye Filter",
+    0x503: "Acros + G Filter",
+}
+
+GRAIN_ROUGHNESS = {0: "Off", 32: "Weak", 64: "Strong"}
+GRAIN_SIZE = {0: "Off", 16: "Small", 32: "Large"}
+DYNAMIC_RANGE_SETTING = {0x000: "Auto", 0x001: "Manual", 0x100: "DR100", 0x200: "DR200", 0x201: "DR400"}
+
+# TIFF type id -> (struct code, size)
+_TYPES = {1: ("B", 1), 2: ("s", 1), 3: ("H", 2), 4: ("I", 4), 7: ("B", 1), 8: ("h", 2), 9: ("i", 4)}
+
+
+def read_exif_segment(path) -> bytes:
+    """Return the TIFF payload of the APP1 Exif segment, reading only the header markers."""
+    with open(path, "rb") as f:
+        if f.read(2) != b"\xff\xd8":
+            return b""
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return b""
+            if marker[1] in (0xDA, 0xD9):  # start of scan / end of image: no Exif before pixels
+                return b""
+            (length,) = struct.unpack(">H", f.read(2))
+            if length < 2:
+                raise ValueError(f"bad JPEG segment length {length}")
+            if marker[1] == 0xE1:
+                payload = f.read(length - 2)
+                if payload.startswith(b"Exif\x00\x00"):
+                    return payload[6:]
+            else:
+                f.seek(length - 2, 1)
+
+
+def _ifd_entries(data, offset, endian):
+    """Yield (tag, type, count, value_or_offset_bytes) for one IFD."""
+    if offset + 2 > len(data):
+        return
+    (count,) = struct.unpack_from(endian + "H", data, offset)
+    for i in range(count):
+        pos = offset + 2 + i * 12
+        if pos + 12 > len(data):
+            return
+        tag, typ, n = struct.unpack_from(endian + "HHI", data, pos)
+        yield tag, typ, n, data[pos + 8:pos + 12]
+
+
+def _find_makernote(tiff: bytes) -> bytes:
+    if len(tiff) < 8:
+        return b""
+    endian = "<" if tiff[:2] == b"II" else ">"
+    (ifd0,) = struct.unpack_from(endian + "I", tiff, 4)
+    exif_ifd = None
+    for tag, _typ, _n, raw in _ifd_entries(tiff, ifd0, endian):
+        if tag == EXIF_IFD_POINTER:
+            (exif_ifd,) = struct.unpack(endian + "I", raw)
+    if exif_ifd is None:
+        return b""
+    for tag, _typ, n, raw in _ifd_entries(tiff, exif_ifd, endian):
+        if tag == MAKERNOTE_TAG:
+            (offset,) = struct.unpack(endian + "I", raw)
+            return tiff[offset:offset + n]
+    return b""
+
+
+def parse_makernote(note: bytes) -> dict:
+    """Decode the wanted Fuji MakerNote tags to raw integer values."""
+    if not note.startswith(b"FUJIFILM") or len(note) < 12:
+        return {}
+    (ifd_offset,) = struct.unpack_from("<I", note, 8)
+    values = {}
+    for tag, typ, n, raw in _ifd_entries(note, ifd_offset, "<"):
+        if tag not in WANTED_TAGS or typ not in _TYPES or n < 1:
+            continue
+        code, size = _TYPES[typ]
+        if size * n > 4:
+            (offset,) = struct.unpack("<I", raw)
+            raw = note[offset:offset + size]
+        values[tag] = struct.unpack_from("<" + code, raw)[0]
+    return values
+
+
+def film_simulation(values: dict):
+    saturation = values.get(TAG_SATURATION)
+    if saturation in MONOCHROME_MODES:
+        return MONOCHROME_MODES[saturation]
+    mode = values.get(TAG_FILM_MODE)
+    if mode is None:
+        return None
+    return FILM_MODES.get(mode, f"Unknown (0x{mode:x})")
+
+
+def dynamic_range(values: dict):
+    development = values.get(TAG_DEVELOPMENT_DYNAMIC_RANGE)
+    if development:
+        return f"DR{development}"
+    setting = values.get(TAG_DYNAMIC_RANGE_SETTING)
+    if setting in DYNAMIC_RANGE_SETTING:
+        return DYNAMIC_RANGE_SETTING[setting]
+    if values.get(TAG_DYNAMIC_RANGE) == 3:
+        return "Wide"
+    return None
+
+
+def read_fuji_makernote(path) -> dict:
+    """
+    Film simulation, grain and dynamic range from a Fujifilm JPEG header.
+    Returns only the fields present; {} for non-Fuji or MakerNote-less files.
+    Raises ValueError for a truncated or malformed header.
+    """
+    try:
+        values = parse_makernote(_find_makernote(read_exif_segment(path)))
+    except struct.error as e:
+        raise ValueError(f"malformed Exif/MakerNote in {path}: {e}") from e
+    if not values:
+        return {}
+    fields = {
+        "filmSimulation": film_simulation(values),
+        "grainEffect": GRAIN_ROUGHNESS.get(values.get(TAG_GRAIN_ROUGHNESS)),
+        "grainSize": GRAIN_SIZE.get(values.get(TAG_GRAIN_SIZE)),
+        "dynamicRange": dynamic_range(values),
+    }
+    return {k: v for k, v in fields.items() if v is not None}
+
+
+if __name__ == "__main__":
+    for arg in sys.argv[1:]:
+        print(arg, read_fuji_makernote(arg))
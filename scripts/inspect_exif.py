@@ -1,55 +1,53 @@
 #!/usr/bin/env python3
 import os
-from PIL import Image, ExifTags
 
-def get_exif_data(image_path):
-    print(f"\n--- Inspcting {os.path.basename(image_path)} ---")
+import asset_pipeline as pipeline
+from metadata_index import MetadataIndex
+
+# Tags of interest, looked up in the metadata index (no re-parsing of unchanged files)
+TOP_LEVEL_TAGS = ['Make', 'Model', 'Orientation', 'DateTime']
+SUB_IFD_TAGS = ['ExposureTime', 'FNumber', 'ISOSpeedRatings', 'FocalLength', 'DateTimeOriginal', 'LensModel']
+
+def format_value(val):
+    # Rationals are stored as [numerator, denominator]
+    if isinstance(val, list) and len(val) == 2 and all(isinstance(v, int) for v in val):
+        return f"{val[0]}/{val[1]}"
+    return val
+
+def get_exif_data(index, image_path):
+    print(f"\n--- Inspecting {os.path.basename(image_path)} ---")
     try:
-        img = Image.open(image_path)
-        exif = img.getexif()
-        
-        if not exif:
+        entry = index.get(image_path)
+        tags = entry["tags"]
+
+        if not tags["ifd0"] and not tags["exif"]:
             print("No EXIF data found!")
             return
 
-        # Basic tags
-        lookup = {
-            33434: 'ExposureTime',
-            33437: 'FNumber',
-            34855: 'ISOSpeedRatings',
-            306: 'DateTime',
-            274: 'Orientation',
-            271: 'Make',
-            272: 'Model',
-            37386: 'FocalLength',
-        }
-        
-        # Traverse IFDs
-        from PIL.ExifTags import TAGS
-        
+        print(f"Dimensions: {entry['width']}x{entry['height']} (orientation {entry['orientation']})")
+
         # Top level
         print("Top Level:")
-        for tag_id, val in exif.items():
-            tag = TAGS.get(tag_id, tag_id)
-            if tag_id in lookup or tag in ['Make', 'Model', 'Orientation', 'DateTime']:
-                 print(f"  {tag} ({tag_id}): {val}")
-
-        # SubIFD (ExifOffset)
-        # 0x8769 = 34665
-        if 34665 in exif:
+        for tag in TOP_LEVEL_TAGS:
+            if tag in tags["ifd0"]:
+                print(f"  {tag}: {format_value(tags['ifd0'][tag])}")
+
+        # SubIFD (ExifOffset, 0x8769)
+        if tags["exif"]:
             print("SubIFD (0x8769):")
-            sub_ifd = exif.get_ifd(34665)
-            for tag_id, val in sub_ifd.items():
-                tag = TAGS.get(tag_id, tag_id)
-                # print(f"  {tag} ({tag_id}): {val}")
-                if tag in ['ExposureTime', 'FNumber', 'ISOSpeedRatings', 'FocalLength', 'DateTimeOriginal', 'LensModel']:
-                    print(f"  {tag}: {val}")
+            for tag in SUB_IFD_TAGS:
+                if tag in tags["exif"]:
+                    print(f"  {tag}: {format_value(tags['exif'][tag])}")
                     
     except Exception as e:
         print(f"Error reading EXIF: {e}")
 
-DIR = "static/photography/flying-seimei"
-files = sorted([f for f in os.listdir(DIR) if f.lower().endswith('.jpg')])
+DIR = pipeline.PHOTOGRAPHY_DIR / "flying-seimei"
+
+if __name__ == "__main__":
+    index = MetadataIndex()
+    files = sorted(pipeline.scan_images(DIR, {'.jpg'}, recursive=False))
 
-for f in files:
-    get_exif_data(os.path.join(DIR, f))
+    for f in files:
+        get_exif_data(index, f)
+    index.save()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Lossless recompression for PNG, SVG and lossless WebP files.
+
+PNG: the pixels are re-encoded by our own PNG writer so every option is open:
+1. Reduction: exact palette when the image has <= 256 colours (packed to 1/2/4
+   bits when few enough), grayscale when R == G == B, alpha dropped when opaque.
+2. Every PNG row filter (none/sub/up/average/paeth, plus per-row adaptive) is
+   computed for the whole image at once with NumPy.
+3. Each filtered stream is deflated with several zlib strategies at level 6 (level 9
+   costs ~15x more on photographic data), and the best FINAL_CANDIDATES
+   combinations are deflated again at level 9.
+The smallest candidate is decoded again and kept only if its RGBA pixels equal
+the original's. ICC profile, gamma, sRGB intent and DPI are carried over.
+
+SVG: structural minification with minidom (comments, editor metadata, whitespace
+between elements, default style declarations, long hex colours).
+
+WebP: files that are already lossless (VP8L) are re-encoded at the slowest, best
+lossless method; lossy WebPs are never touched.
+"""
+
+import io
+import re
+import struct
+import zlib
+from xml.dom import minidom
+
+import numpy as np
+from PIL import Image
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+FILTERS = ("none", "sub", "up", "average", "paeth")
+ZLIB_STRATEGIES = {"default": zlib.Z_DEFAULT_STRATEGY, "filtered": zlib.Z_FILTERED, "rle": zlib.Z_RLE}
+# Above this many pixels only the usual winners are tried (paeth / adaptive x default / filtered)
+EXHAUSTIVE_MAX_PIXELS = 4_000_000
+SCREEN_LEVEL = 6
+FINAL_CANDIDATES = 2
+WEBP_LOSSLESS_METHOD = 6
+
+# PNG colour types
+GRAY, RGB, PALETTE, GRAY_ALPHA, RGBA = 0, 2, 3, 4, 6
+
+
+def _chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+
+def _pack_bits(indices: np.ndarray, depth: int) -> np.ndarray:
+    """Pack 8-bit palette indices into depth-bit samples, rows padded to whole bytes."""
+    if depth == 8:
+        return indices
+    per_byte = 8 // depth
+    h, w = indices.shape
+    padded = np.zeros((h, -(-w // per_byte) * per_byte), dtype=np.uint8)
+    padded[:, :w] = indices
+    groups = padded.reshape(h, -1, per_byte).astype(np.uint16)
+    shifts = np.array([8 - depth * (k + 1) for k in range(per_byte)], dtype=np.uint16)
+    return (groups << shifts).sum(axis=2).astype(np.uint8)
+
+
+def _representations(rgba: np.ndarray) -> list:
+    """
+    Exact re-encodings of an RGBA array:
+    [(color_type, bit_depth, scanline bytes HxN, filter bpp, PLTE, tRNS)].
+    """
+    h, w, _ = rgba.shape
+    opaque = bool((rgba[..., 3] == 255).all())
+    gray = bool(((rgba[..., 0] == rgba[..., 1]) & (rgba[..., 1] == rgba[..., 2])).all())
+    reps = []
+
+    keys = rgba.reshape(-1, 4).view(np.uint32).ravel()
+    colors = np.unique(keys)
+    if len(colors) <= 256:
+        entries = colors.view(np.uint8).reshape(-1, 4)
+        # Translucent entries first, so tRNS can stop at the last one
+        order = np.argsort(entries[:, 3] == 255, kind="stable")
+        colors, entries = colors[order], entries[order]
+        lookup = np.argsort(colors)
+        indices = lookup[np.searchsorted(colors[lookup], keys)].astype(np.uint8).reshape(h, w)
+        depth = next(d for d in (1, 2, 4, 8) if len(colors) <= 1 << d)
+        alphas = entries[:, 3]
+        translucent = np.nonzero(alphas != 255)[0]
+        trns = alphas[:translucent[-1] + 1].tobytes() if len(translucent) else None
+        reps.append((PALETTE, depth, _pack_bits(indices, depth), 1, entries[:, :3].tobytes(), trns))
+
+    if gray and opaque:
+        reps.append((GRAY, 8, rgba[..., 0], 1, None, None))
+    elif gray:
+        reps.append((GRAY_ALPHA, 8, rgba[..., [0, 3]].reshape(h, w * 2), 2, None, None))
+    elif opaque:
+        reps.append((RGB, 8, rgba[..., :3].reshape(h, w * 3), 3, None, None))
+    else:
+        reps.append((RGBA, 8, rgba.reshape(h, w * 4), 4, None, None))
+    return reps
+
+
+def _filtered(rows: np.ndarray, bpp: int) -> dict:
+    """{filter name: HxN filtered bytes} for each PNG filter applied to every row."""
+    x = rows.astype(np.int16)
+    a = np.zeros_like(x)
+    a[:, bpp:] = x[:, :-bpp]
+    b = np.zeros_like(x)
+    b[1:] = x[:-1]
+    c = np.zeros_like(x)
+    c[1:, bpp:] = x[:-1, :-bpp]
+    p = a + b - c
+    pa, pb, pc = np.abs(p - a), np.abs(p - b), np.abs(p - c)
+    paeth = np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c))
+    residuals = [x, x - a, x - b, x - (a + b) // 2, x - paeth]
+    return {name: (r & 0xFF).astype(np.uint8) for name, r in zip(FILTERS, residuals)}
+
+
+def _streams(rows: np.ndarray, bpp: int, exhaustive: bool) -> dict:
+    """{filter choice: zlib input (filter byte + filtered row, per row)}"""
+    filtered = _filtered(rows, bpp)
+    # Adaptive: per row, the filter with the smallest sum of absolute signed residuals
+    costs = np.stack([np.abs(f.view(np.int8).astype(np.int32)).sum(axis=1) for f in filtered.values()])
+    best = costs.argmin(axis=0)
+    stacked = np.stack(list(filtered.values()))
+    choices = {"adaptive": (best, stacked[best, np.arange(rows.shape[0])])}
+    for i, name in enumerate(FILTERS):
+        if exhaustive or name == "paeth":
+            choices[name] = (np.full(rows.shape[0], i), filtered[name])
+    return {name: np.concatenate([types.astype(np.uint8)[:, None], data], axis=1).tobytes()
+            for name, (types, data) in choices.items()}
+
+
+def _deflate(raw: bytes, strategy: int, level=9) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 15, 9, strategy)
+    return compressor.compress(raw) + compressor.flush()
+
+
+def _png_bytes(width, height, color_type, depth, idat, palette, trns, info) -> bytes:
+    chunks = [_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, depth, color_type, 0, 0, 0))]
+    if info.get("icc_profile"):
+        chunks.append(_chunk(b"iCCP", b"icc\x00\x00" + zlib.compress(info["icc_profile"], 9)))
+    elif "srgb" in info:
+        chunks.append(_chunk(b"sRGB", bytes([info["srgb"]])))
+    if "gamma" in info:
+        chunks.append(_chunk(b"gAMA", struct.pack(">I", round(info["gamma"] * 100000))))
+    if "dpi" in info:
+        # pHYs is in pixels per metre
+        x, y = (round(d / 0.0254) for d in info["dpi"])
+        chunks.append(_chunk(b"pHYs", struct.pack(">IIB", x, y, 1)))
+    if palette is not None:
+        chunks.append(_chunk(b"PLTE", palette))
+    if trns is not None:
+        chunks.append(_chunk(b"tRNS", trns))
+    chunks += [_chunk(b"IDAT", idat), _chunk(b"IEND", b"")]
+    return PNG_SIGNATURE + b"".join(chunks)
+
+
+def _rgba_pixels(data: bytes) -> np.ndarray:
+    with Image.open(io.BytesIO(data)) as img:
+        return np.asarray(img.convert("RGBA"))
+
+
+def png_bit_depth(data: bytes):
+    """Bit depth from the IHDR chunk (always first, at byte 24), or None if data is not a PNG."""
+    if len(data) < 25 or not data.startswith(PNG_SIGNATURE) or data[12:16] != b"IHDR":
+        return None
+    return data[24]
+
+
+def optimize_png(data: bytes):
+    """
+    Smallest exact re-encoding of a PNG. Returns (bytes, description); the input
+    is returned unchanged (description None) when nothing beats it.
+    16-bit PNGs are left alone: Pillow decodes 16-bit RGB/RGBA to 8-bit "RGB"/"RGBA",
+    so neither the mode nor the pixel comparison can see the lost precision.
+    """
+    if png_bit_depth(data) == 16:
+        return data, None
+    with Image.open(io.BytesIO(data)) as img:
+        if img.format != "PNG" or img.mode in ("I", "I;16", "I;16B", "F") or getattr(img, "n_frames", 1) > 1:
+            return data, None  # 16-bit and animated PNGs are left alone
+        info = {k: img.info[k] for k in ("icc_profile", "srgb", "gamma", "dpi") if k in img.info}
+        rgba = np.asarray(img.convert("RGBA"))
+    h, w, _ = rgba.shape
+    exhaustive = h * w <= EXHAUSTIVE_MAX_PIXELS
+    strategies = ZLIB_STRATEGIES if exhaustive else {k: ZLIB_STRATEGIES[k] for k in ("default", "filtered")}
+
+    screened = []
+    for color_type, depth, rows, bpp, palette, trns in _representations(rgba):
+        for filter_name, raw in _streams(rows, bpp, exhaustive).items():
+            for strategy_name, strategy in strategies.items():
+                idat = _deflate(raw, strategy, SCREEN_LEVEL)
+                desc = f"type {color_type}/{depth}-bit, {filter_name} filter, {strategy_name} zlib"
+                screened.append((len(idat), desc, idat, raw, strategy, (color_type, depth, palette, trns)))
+    screened.sort(key=lambda c: c[0])
+
+    best, best_desc = data, None
+    for _, desc, idat, raw, strategy, (color_type, depth, palette, trns) in screened[:FINAL_CANDIDATES]:
+        idat = min(idat, _deflate(raw, strategy), key=len)
+        candidate = _png_bytes(w, h, color_type, depth, idat, palette, trns, info)
+        if len(candidate) < len(best):
+            best, best_desc = candidate, desc
+    if best_desc is not None and not np.array_equal(_rgba_pixels(best), rgba):
+        return data, None  # should never happen; never write an image that decodes differently
+    return best, best_desc
+
+
+_DEFAULT_STYLE = re.compile(r"^(?:stop-opacity|fill-opacity|stroke-opacity|opacity):\s*1(?:\.0*)?$")
+_LONG_HEX = re.compile(r"#([0-9a-fA-F])\1([0-9a-fA-F])\2([0-9a-fA-F])\3\b")
+_EDITOR_PREFIXES = ("inkscape:", "sodipodi:", "sketch:")
+# Whitespace inside these is content
+_TEXT_ELEMENTS = {"text", "tspan", "textPath", "style", "script", "title", "desc"}
+
+
+def _minify_style(style: str, drop_defaults=True) -> str:
+    declarations = [d.strip() for d in style.split(";") if d.strip()]
+    return ";".join(_LONG_HEX.sub(r"#\1\2\3", d) for d in declarations
+                    if not (drop_defaults and _DEFAULT_STYLE.match(d)))
+
+
+def _has_stylesheet(doc) -> bool:
+    """A <style> element or class attribute: an inline opacity:1 may be overriding it."""
+    if doc.getElementsByTagName("style"):
+        return True
+    return any(e.hasAttribute("class") for e in doc.getElementsByTagName("*"))
+
+
+def _minify_node(node, drop_defaults=True):
+    for child in list(node.childNodes):
+        if child.nodeType == child.COMMENT_NODE:
+            node.removeChild(child)
+        elif child.nodeType == child.TEXT_NODE and not child.data.strip() and node.nodeName not in _TEXT_ELEMENTS:
+            node.removeChild(child)
+        elif child.nodeType == child.ELEMENT_NODE:
+            if child.nodeName in ("metadata", "sodipodi:namedview") or child.nodeName.startswith(_EDITOR_PREFIXES):
+                node.removeChild(child)
+                continue
+            if child.getAttribute("xml:space") == "preserve":
+                continue  # whitespace and everything else below it is left exactly as written
+            for name in list(child.attributes.keys()):
+                value = child.getAttribute(name)
+                if name.startswith(_EDITOR_PREFIXES) or name.startswith(("xmlns:inkscape", "xmlns:sodipodi")):
+                    child.removeAttribute(name)
+                elif name == "style":
+                    style = _minify_style(value, drop_defaults)
+                    if style:
+                        child.setAttribute(name, style)
+                    else:
+                        child.removeAttribute(name)
+                elif name in ("fill", "stroke", "stop-color", "flood-color", "color"):
+                    child.setAttribute(name, _LONG_HEX.sub(r"#\1\2\3", value.strip()))
+                elif value != value.strip():
+                    child.setAttribute(name, " ".join(value.split()))
+            _minify_node(child, drop_defaults)
+
+
+def minify_svg(data: bytes):
+    """
+    Structurally minified SVG. Returns (bytes, description) like optimize_png.
+    Default opacities are only dropped from inline styles when no stylesheet or class
+    could be setting another value, and xml:space="preserve" subtrees are not touched.
+    """
+    doc = minidom.parseString(data)
+    if doc.documentElement.getAttribute("xml:space") == "preserve":
+        return data, None
+    _minify_node(doc.documentElement, drop_defaults=not _has_stylesheet(doc))
+    minified = doc.documentElement.toxml().encode("utf-8")
+    minidom.parseString(minified)  # must still be well-formed
+    if len(minified) < len(data):
+        return minified, "minified"
+    return data, None
+
+
+def is_lossless_webp(data: bytes) -> bool:
+    """True when the WebP's image chunk is VP8L (lossless) rather than VP8 (lossy)."""
+    if data[:4] != b"RIFF" or data[8:12] != b"WEBP":
+        return False
+    offset = 12
+    while offset + 8 <= len(data):
+        fourcc = data[offset:offset + 4]
+        size = struct.unpack("<I", data[offset + 4:offset + 8])[0]
+        if fourcc in (b"VP8L", b"VP8 "):
+            return fourcc == b"VP8L"
+        offset += 8 + size + (size & 1)
+    return False
+
+
+def optimize_webp(data: bytes):
+    """Re-encode a lossless WebP at the best lossless method. Returns (bytes, description)."""
+    if not is_lossless_webp(data):
+        return data, None
+    with Image.open(io.BytesIO(data)) as img:
+        if getattr(img, "n_frames", 1) > 1:
+            return data, None
+        img.load()
+        kwargs = {k: img.info[k] for k in ("exif", "icc_profile") if img.info.get(k)}
+        buf = io.BytesIO()
+        # exact keeps the RGB of fully transparent pixels, so the result is bit-identical
+        img.save(buf, "WEBP", lossless=True, quality=100, method=WEBP_LOSSLESS_METHOD, exact=True, **kwargs)
+        reference = np.asarray(img.convert("RGBA"))
+    candidate = buf.getvalue()
+    if len(candidate) < len(data) and np.array_equal(_rgba_pixels(candidate), reference):
+        return candidate, f"lossless method {WEBP_LOSSLESS_METHOD}"
+    return data, None
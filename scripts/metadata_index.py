@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Incremental image metadata index shared by extract_exif.py, inspect_exif.py and
+check_image_dims.py.
+
+1. Each file is keyed by its project-relative path; size + mtime (and a content
+   hash when those change) decide whether the stored record is still valid.
+2. Only new or changed files are parsed. Parsing is header-only: Image.open reads
+   the dimensions and the EXIF segment without decoding any pixel data.
+3. Records hold format, dimensions, orientation and the EXIF tags (IFD0 + Exif IFD)
+   as JSON-friendly values; rationals are kept exact as [numerator, denominator].
+   Fujifilm files also get their decoded MakerNote fields (see fuji_makernote.py).
+
+Index file: .asset-cache/metadata-index.json
+"""
+
+import json
+import os
+from pathlib import Path
+
+from PIL import ExifTags, Image
+
+import asset_pipeline as pipeline
+import telemetry
+from fuji_makernote import read_fuji_makernote
+
+INDEX_FILE = pipeline.CACHE_DIR / "metadata-index.json"
+INDEX_VERSION = 2
+
+
+def _json_value(value):
+    """Convert an EXIF value to JSON; returns None for binary blobs."""
+    if isinstance(value, bytes):
+        return None
+    if hasattr(value, "numerator") and hasattr(value, "denominator") and not isinstance(value, int):
+        return [int(value.numerator), int(value.denominator)]
+    if isinstance(value, (tuple, list)):
+        items = [_json_value(v) for v in value]
+        return None if any(v is None for v in items) else items
+    if isinstance(value, (int, float, str)):
+        return value
+    return str(value)
+
+
+def _named_tags(ifd) -> dict:
+    tags = {}
+    for tag_id, value in ifd.items():
+        value = _json_value(value)
+        if value is None:
+            continue
+        tags[ExifTags.TAGS.get(tag_id, str(tag_id))] = value
+    return tags
+
+
+def read_header(path) -> dict:
+    """Parse dimensions and EXIF from the file header (no pixel decode)."""
+    with Image.open(path) as img:
+        exif = img.getexif()
+        ifd0 = {k: v for k, v in exif.items() if k not in (ExifTags.IFD.Exif, ExifTags.IFD.GPSInfo)}
+        record = {
+            "format": img.format,
+            "mode": img.mode,
+            "width": img.width,
+            "height": img.height,
+            "orientation": int(exif.get(ExifTags.Base.Orientation, 1) or 1),
+            "tags": {
+                "ifd0": _named_tags(ifd0),
+                "exif": _named_tags(exif.get_ifd(ExifTags.IFD.Exif)),
+            },
+        }
+    # Fujifilm film simulation / grain / DR live in the MakerNote, which getexif() leaves opaque
+    make = str(record["tags"]["ifd0"].get("Make", ""))
+    record["makernote"] = read_fuji_makernote(path) if make.upper().startswith("FUJIFILM") else {}
+    if record["orientation"] in pipeline.TRANSPOSED_ORIENTATIONS:
+        record["display_width"], record["display_height"] = record["height"], record["width"]
+    else:
+        record["display_width"], record["display_height"] = record["width"], record["height"]
+    return record
+
+
+class MetadataIndex:
+    """Persistent path -> metadata record map, refreshed incrementally."""
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = Path(path)
+        self.entries = {}
+        self.dirty = False
+        self.parsed = 0
+        if self.path.exists():
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == INDEX_VERSION:
+                    self.entries = data.get("entries", {})
+            except (OSError, ValueError) as e:
+                print(f"Warning: ignoring unreadable metadata index {self.path}: {e}")
+
+    def get(self, path) -> dict:
+        """Metadata record for path, re-parsing only if the file changed."""
+        path = Path(path)
+        key = pipeline.rel_path(path)
+        st = os.stat(path)
+        entry = self.entries.get(key)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry
+
+        digest = pipeline.file_hash(path)
+        if entry and entry.get("hash") == digest:
+            # Touched but identical content: keep the parsed record, refresh the stat key
+            entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+        else:
+            with telemetry.track_file(key, "metadata_index"):
+                entry = dict(read_header(path), size=st.st_size, mtime_ns=st.st_mtime_ns, hash=digest)
+            self.parsed += 1
+        self.entries[key] = entry
+        self.dirty = True
+        return entry
+
+    def refresh(self, paths) -> dict:
+        """Bring records for paths up to date; returns {path: record}."""
+        records = {}
+        for path in paths:
+            try:
+                records[Path(path)] = self.get(path)
+            except (OSError, ValueError) as e:
+                print(f"Warning: cannot read {path}: {e}")
+        return records
+
+    def prune(self, root=None):
+        """Drop records for files that no longer exist (optionally only under root)."""
+        prefix = pipeline.rel_path(root) + "/" if root else ""
+        for key in [k for k in self.entries if k.startswith(prefix)]:
+            if not (pipeline.PROJECT_ROOT / key).exists():
+                del self.entries[key]
+                self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": INDEX_VERSION, "entries": self.entries}
+        pipeline.write_atomic(self.path, json.dumps(data, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+        self.dirty = False
+
+
+def merged_tags(entry: dict) -> dict:
+    """IFD0 and Exif IFD tags in one dict (Exif IFD wins on duplicates)."""
+    tags = dict(entry["tags"]["ifd0"])
+    tags.update(entry["tags"]["exif"])
+    return tags
+
+
+def rational(value) -> float:
+    """Float from a stored [num, den] rational (or a plain number)."""
+    if isinstance(value, list):
+        num, den = value
+        return num / den if den else 0.0
+    return float(value)
@@ -4,112 +4,116 @@ Batch optimize all assets in static/img and static/photography:
 1. Recursive scan
 2. Skip 'artworks' (already done)
 3. Resize logic:
-   - 'photography' or 'hero' images: Max width 1920px
+   - 'photography' images: Max width 2912px
+   - 'hero' / 'banner' images: Max width 1920px
    - Others: Max width 1200px
-4. Convert to WebP (q=80)
-5. Print mapping for code updates
+4. Convert to WebP (q=80, or the lowest quality reaching --target-ssim), plus smaller responsive widths (name-480w.webp, ...);
+   images with alpha use a lossless WebP instead wherever it is smaller
+5. Record widths/heights/bytes in src/data/asset-manifest.json for srcset
+6. Print mapping for code updates
+
+Runs through the shared asset pipeline: unchanged sources are skipped
+(use --force to rebuild everything).
 """
 
-import os
-from PIL import Image, ImageOps
+import argparse
 from pathlib import Path
 
+import asset_pipeline as pipeline
+import telemetry
+
 # Config
 ROOT_DIRS = [
-    "/Users/yukari/Code/sukima-ml/static/img",
-    "/Users/yukari/Code/sukima-ml/static/photography"
+    pipeline.IMG_DIR,
+    pipeline.PHOTOGRAPHY_DIR,
 ]
 EXCLUDE_DIRS = {"artworks"}
 EXTENSIONS = {'.jpg', '.jpeg', '.png'}
 QUALITY = 80
+STAGE = "optimize_all_assets"
 
-def optimize_assets():
-    results = []
-    
-    for root_dir in ROOT_DIRS:
-        root_path = Path(root_dir)
-        if not root_path.exists():
-            print(f"Warning: {root_dir} not found.")
-            continue
 
-        print(f"Scanning {root_dir}...")
-        
-        for file_path in root_path.rglob("*"):
-            if file_path.suffix.lower() not in EXTENSIONS:
-                continue
-            
-            # Check exclusions
-            # If any part of the relative path is in EXCLUDE_DIRS
-            rel_path = file_path.relative_to(root_path)
-            if any(part in EXCLUDE_DIRS for part in rel_path.parts):
-                continue
-                
-            # Determine Max Width
-            # Photography or typically large images -> 1920
-            # Else -> 1200
-            if "photography" in str(file_path):
-                max_width = 2912
-            elif "hero" in file_path.name.lower() or "banner" in file_path.name.lower():
-                max_width = 1920
-            else:
-                max_width = 1200
-                
-            try:
-                with Image.open(file_path) as img:
-                    # Fix orientation
-                    img = ImageOps.exif_transpose(img)
-                    
-                    # Calculate new size
-                    w, h = img.size
-                    if w > max_width:
-                        new_w = max_width
-                        new_h = int(h * (max_width / w))
-                    else:
-                        new_w = w
-                        new_h = h
-                    
-                    # Convert coloring
-                    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
-                         # Keep alpha for PNGs that might have transparency
-                         pass
-                    else:
-                         img = img.convert("RGB")
-
-                    # Resize
-                    img_resized = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-                    
-                    # Save as WebP
-                    new_filename = file_path.with_suffix('.webp')
-                    
-                    # Skip if webp already exists and is newer? 
-                    # For now, overwrite/create to ensure optimization
-                    
-                    img_resized.save(new_filename, "WEBP", quality=QUALITY)
-                    
-                    # Stats
-                    original_size = file_path.stat().st_size / 1024
-                    new_size = new_filename.stat().st_size / 1024
-                    
-                    results.append({
-                        "original_path": str(file_path),
-                        "new_path": str(new_filename),
-                        "width": new_w,
-                        "height": new_h,
-                        "original_kb": original_size,
-                        "new_kb": new_size
-                    })
-                    
-                    print(f"Optimized: {file_path.name} -> {new_filename.name} ({new_w}x{new_h})")
-            except Exception as e:
-                print(f"Failed to process {file_path}: {e}")
+def max_width_for(file_path: Path) -> int:
+    # Photography -> 2912 (2x iPad Pro 11"), hero/banner -> 1920, else -> 1200
+    if "photography" in pipeline.rel_path(file_path):
+        return 2912
+    if "hero" in file_path.name.lower() or "banner" in file_path.name.lower():
+        return 1920
+    return 1200
+
+
+def optimize_one(source, outputs, settings):
+    """Resize + convert one source image to WebP."""
+    new_filename = outputs[0]
+    # Decode oriented and already fitted to max_width (JPEGs via DCT scaling)
+    img, _ = pipeline.load_resized(source, settings["max_width"], transform_ops=settings.get("transforms"))
+    new_w, new_h = img.size
+
+    # Convert coloring
+    if img.mode not in ("RGBA", "LA"):
+        # Keep alpha for PNGs that might have transparency
+        img = img.convert("RGB")
+
+    # Save as WebP plus the smaller responsive widths
+    quality = pipeline.resolve_quality(img, source, settings)
+    asset = pipeline.save_with_variants(img, new_filename, settings["widths"], "WEBP", settings["avif"],
+                                        settings["lossless_alpha"], quality=quality)
+
+    print(f"Optimized: {source.name} -> {new_filename.name} ({new_w}x{new_h}, {len(asset['variants'])} widths)")
+    return {
+        "original_path": str(source),
+        "new_path": str(new_filename),
+        "width": new_w,
+        "height": new_h,
+        "original_kb": source.stat().st_size / 1024,
+        "new_kb": asset["bytes"] / 1024,
+        "quality": quality,
+        "asset": asset,
+        "extra_outputs": pipeline.asset_extra_outputs(asset),
+    }
+
 
+def asset_settings(file_path: Path) -> dict:
+    return {"format": "WEBP", "quality": QUALITY, "max_width": max_width_for(file_path),
+            "widths": list(pipeline.RESPONSIVE_WIDTHS), "avif": pipeline.AVIF_AVAILABLE, "lossless_alpha": True,
+            "placeholder": pipeline.PLACEHOLDERS_AVAILABLE,
+            "draft": pipeline.DRAFT_OVERSAMPLE, "target_ssim": None}
+
+
+ASSETS = pipeline.AssetClass(STAGE, optimize_one, asset_settings, roots=ROOT_DIRS,
+                             extensions=EXTENSIONS, exclude_dirs=EXCLUDE_DIRS)
+
+
+def print_summary(results):
     print("\n--- Optimization Summary ---")
     print(f"{'File':<40} | {'Dims':<10} | {'Size Change'}")
     print("-" * 90)
     for r in results:
+        if r.get("status") == "failed":
+            continue
         name = Path(r['original_path']).name
-        size_change = f"{r['original_kb']:.1f}KB -> {r['new_kb']:.1f}KB"
+        size_change = f"{r['original_kb']:.1f}KB -> {r['new_kb']:.1f}KB (Q{r['quality']})"
+        if r.get("status") == "skipped":
+            size_change += " (unchanged)"
         print(f"{name:<40} | {r['width']}x{r['height']:<5} | {size_change}")
+    pipeline.print_run_stats(results)
+
+
+def optimize_assets(force=False, workers=1, target_ssim=None):
+    for root_dir in ROOT_DIRS:
+        if not Path(root_dir).exists():
+            print(f"Warning: {root_dir} not found.")
+        else:
+            print(f"Scanning {root_dir}...")
+    results = pipeline.run_asset_classes([ASSETS], force=force, workers=workers, target_ssim=target_ssim)
+    pipeline.update_asset_manifest(results)
+    print_summary(results)
+    return results
+
 
 if __name__ == "__main__":
-    optimize_assets()
+    parser = pipeline.add_pipeline_args(argparse.ArgumentParser(description=__doc__))
+    args = parser.parse_args()
+    telemetry.configure(args.telemetry, args.profile)
+    optimize_assets(force=args.force, workers=args.workers, target_ssim=args.target_ssim)
+    telemetry.finish()
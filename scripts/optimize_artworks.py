@@ -2,73 +2,88 @@
 """
 Batch optimize images in static/img/artworks:
 1. Resize to max width 1200px
-2. Convert to WebP (q=85)
+2. Convert to WebP (q=85, or the lowest quality reaching --target-ssim), plus smaller responsive widths recorded in src/data/asset-manifest.json
 3. Print original vs new size and dimensions for updating data
+
+Runs through the shared asset pipeline: unchanged sources are skipped
+(use --force to rebuild everything).
 """
 
-import os
-from PIL import Image
+import argparse
 from pathlib import Path
 
+import asset_pipeline as pipeline
+import telemetry
+
 # Config
-SOURCE_DIR = "/Users/yukari/Code/sukima-ml/static/img/artworks"
+SOURCE_DIR = pipeline.IMG_DIR / "artworks"
 MAX_WIDTH = 1200
 QUALITY = 85
+STAGE = "optimize_artworks"
+
+
+def optimize_one(source, outputs, settings):
+    """Resize one artwork to MAX_WIDTH and save it as WebP."""
+    output_path = outputs[0]
+    # Decode already fitted to MAX_WIDTH (JPEGs via DCT scaling)
+    img_resized, _ = pipeline.load_resized(source, settings["max_width"], transform_ops=settings.get("transforms"))
+    new_w, new_h = img_resized.size
+
+    # Save as WebP plus the smaller responsive widths
+    quality = pipeline.resolve_quality(img_resized, source, settings)
+    asset = pipeline.save_with_variants(img_resized, output_path, settings["widths"], "WEBP", settings["avif"],
+                                        quality=quality)
 
-def optimize_images():
+    print(f"Processed {source.name} -> {output_path.name} ({new_w}x{new_h})")
+    return {
+        "original_name": source.name,
+        "new_name": output_path.name,
+        "width": new_w,
+        "height": new_h,
+        "original_kb": source.stat().st_size / 1024,
+        "new_kb": asset["bytes"] / 1024,
+        "quality": quality,
+        "asset": asset,
+        "extra_outputs": pipeline.asset_extra_outputs(asset),
+    }
+
+
+ARTWORKS = pipeline.AssetClass(
+    STAGE, optimize_one,
+    {"format": "WEBP", "quality": QUALITY, "max_width": MAX_WIDTH,
+     "widths": list(pipeline.RESPONSIVE_WIDTHS), "avif": pipeline.AVIF_AVAILABLE,
+     "placeholder": pipeline.PLACEHOLDERS_AVAILABLE,
+     "draft": pipeline.DRAFT_OVERSAMPLE, "target_ssim": None},
+    roots=[SOURCE_DIR], recursive=False)
+
+
+def optimize_images(force=False, workers=1, target_ssim=None):
     source_path = Path(SOURCE_DIR)
     if not source_path.exists():
         print(f"Error: Directory {SOURCE_DIR} not found.")
         return
 
     print(f"Scanning {SOURCE_DIR}...")
-    
-    extensions = {'.jpg', '.jpeg', '.png'}
-    files = [f for f in source_path.iterdir() if f.suffix.lower() in extensions]
-    
-    results = []
-
-    for file_path in files:
-        with Image.open(file_path) as img:
-            # Calculate new size
-            w, h = img.size
-            if w > MAX_WIDTH:
-                new_w = MAX_WIDTH
-                new_h = int(h * (MAX_WIDTH / w))
-            else:
-                new_w = w
-                new_h = h
-            
-            # Resize
-            img_resized = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-            
-            # Save as WebP
-            new_filename = file_path.stem + ".webp"
-            output_path = source_path / new_filename
-            
-            img_resized.save(output_path, "WEBP", quality=QUALITY)
-            
-            # Stats
-            original_size = file_path.stat().st_size / 1024
-            new_size = output_path.stat().st_size / 1024
-            
-            results.append({
-                "original_name": file_path.name,
-                "new_name": new_filename,
-                "width": new_w,
-                "height": new_h,
-                "original_kb": original_size,
-                "new_kb": new_size
-            })
-            
-            print(f"Processed {file_path.name} -> {new_filename} ({new_w}x{new_h})")
+    results = pipeline.run_asset_classes([ARTWORKS], force=force, workers=workers, target_ssim=target_ssim)
+    pipeline.update_asset_manifest(results)
 
     print("\n--- Optimization Summary ---")
     print(f"{'Original File':<50} | {'New File':<40} | {'Dims':<10} | {'Size Change'}")
     print("-" * 120)
     for r in results:
-        size_change = f"{r['original_kb']:.1f}KB -> {r['new_kb']:.1f}KB"
+        if r.get("status") == "failed":
+            continue
+        size_change = f"{r['original_kb']:.1f}KB -> {r['new_kb']:.1f}KB (Q{r['quality']})"
+        if r.get("status") == "skipped":
+            size_change += " (unchanged)"
         print(f"{r['original_name']:<50} | {r['new_name']:<40} | {r['width']}x{r['height']:<5} | {size_change}")
+    pipeline.print_run_stats(results)
+    return results
+
 
 if __name__ == "__main__":
-    optimize_images()
+    parser = pipeline.add_pipeline_args(argparse.ArgumentParser(description=__doc__))
+    args = parser.parse_args()
+    telemetry.configure(args.telemetry, args.profile)
+    optimize_images(force=args.force, workers=args.workers, target_ssim=args.target_ssim)
+    telemetry.finish()
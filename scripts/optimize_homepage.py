@@ -1,12 +1,17 @@
 
-import os
+import argparse
 import shutil
 from PIL import Image
 
+import asset_pipeline as pipeline
+import lossless
+import telemetry
+
 # Configuration
 MAX_DIM = 1920
 QUALITY = 80
-BACKUP_DIR = "static/img/artworks_backup"
+BACKUP_DIR = pipeline.IMG_DIR / "artworks_backup"
+STAGE = "optimize_homepage"
 
 files_to_optimize = [
     "static/img/artworks/Variant_B.jpg",
@@ -15,70 +20,83 @@ files_to_optimize = [
     "static/img/artworks/artwork-003.jpg",
 ]
 
-# Ensure backup dir exists
-if not os.path.exists(BACKUP_DIR):
-    os.makedirs(BACKUP_DIR)
+png_file = "static/img/yukari.png"
+
+
+def optimize_jpg(source, outputs, settings):
+    """Backup once, then resize to fit MAX_DIM and re-save the JPEG in place."""
+    backup_path = BACKUP_DIR / source.name
+    if not backup_path.exists():
+        shutil.copy2(source, backup_path)
+
+    original_size = source.stat().st_size / (1024 * 1024)
+
+    with Image.open(source) as src:
+        # Check if resizing is needed
+        new_size = pipeline.fit_within(src.size, settings["max_dim"], settings["max_dim"])
+        if new_size != src.size:
+            img = src.resize(new_size, Image.Resampling.LANCZOS)
+        else:
+            img = src.copy()
+
+    # Save (the pipeline's write stage replaces the source once the encode is done)
+    data = pipeline.encode_image(img, "JPEG", quality=settings["quality"], optimize=True)
+    pipeline.write_atomic(source, data)
+
+    new_size_mb = len(data) / (1024 * 1024)
+    return {"name": source.name, "original_mb": original_size, "new_mb": new_size_mb, "note": "Done"}
+
 
-print(f"{'File':<60} {'Original':<10} {'New':<10} {'Status':<10}")
-print("-" * 100)
+def optimize_png(source, outputs, settings):
+    """Losslessly recompress the PNG in place, no resize to keep edge quality."""
+    backup_path = source.with_name(source.name + ".bak")
+    if not backup_path.exists():
+        shutil.copy2(source, backup_path)
 
-for f in files_to_optimize:
-    try:
-        path = os.path.join(os.getcwd(), f)
-        filename = os.path.basename(path)
-        backup_path = os.path.join(BACKUP_DIR, filename)
+    original_size = source.stat().st_size / (1024 * 1024)
 
-        if not os.path.exists(path):
+    # Pillow can't choose PNG filters or zlib strategies; lossless.optimize_png tries them all
+    data, desc = lossless.optimize_png(source.read_bytes())
+    if desc:
+        pipeline.write_atomic(source, data)
+
+    new_size_mb = len(data) / (1024 * 1024)
+    note = f"Done ({desc})" if desc else "Already optimal"
+    return {"name": source.name, "original_mb": original_size, "new_mb": new_size_mb, "note": note}
+
+
+HOMEPAGE_JPGS = pipeline.AssetClass(
+    STAGE, optimize_jpg, {"format": "JPEG", "quality": QUALITY, "max_dim": MAX_DIM, "optimize": True},
+    files=files_to_optimize, outputs=pipeline.in_place)
+HOMEPAGE_PNG = pipeline.AssetClass(
+    STAGE, optimize_png, {"format": "PNG", "lossless": 1}, files=[png_file], outputs=pipeline.in_place)
+
+
+def main(force=False, workers=1):
+    # Ensure backup dir exists
+    BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+
+    print(f"{'File':<60} {'Original':<10} {'New':<10} {'Status':<10}")
+    print("-" * 100)
+
+    for f in files_to_optimize:
+        if not (pipeline.PROJECT_ROOT / f).exists():
             print(f"{f:<60} NOT FOUND")
+
+    results = pipeline.run_asset_classes([HOMEPAGE_JPGS, HOMEPAGE_PNG], force=force, workers=workers)
+    for r in results:
+        if r["status"] == "failed":
+            print(f"{r['source']:<60} Error: {r['error']}")
             continue
+        note = "Unchanged" if r["status"] == "skipped" else r["note"]
+        print(f"{r['name']:<60} {r['original_mb']:<10.2f} {r['new_mb']:<10.2f} {note}")
+    pipeline.print_run_stats(results)
+    return results
 
-        # Backup
-        if not os.path.exists(backup_path):
-            shutil.copy2(path, backup_path)
-        
-        original_size = os.path.getsize(path) / (1024 * 1024)
-
-        with Image.open(path) as img:
-            # Check if resizing is needed
-            width, height = img.size
-            if width > MAX_DIM or height > MAX_DIM:
-                # Calculate new aspect ratio
-                if width > height:
-                    new_width = MAX_DIM
-                    new_height = int(height * (MAX_DIM / width))
-                else:
-                    new_height = MAX_DIM
-                    new_width = int(width * (MAX_DIM / height))
-                
-                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            # Save
-            img.save(path, "JPEG", quality=QUALITY, optimize=True)
-        
-        new_size = os.path.getsize(path) / (1024 * 1024)
-        print(f"{filename:<60} {original_size:<10.2f} {new_size:<10.2f} Done")
-
-    except Exception as e:
-        print(f"{f:<60} Error: {e}")
-
-# Optimize yukari.png separately (just re-save with optimization, no resize to keep edge quality)
-png_file = "static/img/yukari.png"
-if os.path.exists(png_file):
-    try:
-        backup_path = os.path.join("static/img", "yukari.png.bak")
-        if not os.path.exists(backup_path):
-            shutil.copy2(png_file, backup_path)
-            
-        original_size = os.path.getsize(png_file) / (1024 * 1024)
-        
-        with Image.open(png_file) as img:
-            # Png optimization in PIL is limited, but we'll try
-            # If we really wanted to optimize, we'd use 'pngquant' via subprocess, but we'll stick to PIL for now
-            # 'optimize=True' in save might help a bit
-            img.save(png_file, "PNG", optimize=True)
-            
-        new_size = os.path.getsize(png_file) / (1024 * 1024)
-        print(f"{'yukari.png':<60} {original_size:<10.2f} {new_size:<10.2f} Done (PNG Opt)")
-    except Exception as e:
-        print(f"{png_file:<60} Error: {e}")
 
+if __name__ == "__main__":
+    parser = pipeline.add_pipeline_args(argparse.ArgumentParser(), ssim=False)
+    args = parser.parse_args()
+    telemetry.configure(args.telemetry, args.profile)
+    main(force=args.force, workers=args.workers)
+    telemetry.finish()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Lossless recompression pass over static/img and static/photography:
+1. PNG: best filter / zlib strategy / palette or grayscale reduction (lossless.optimize_png)
+2. SVG: structural minification (comments, editor metadata, whitespace, default styles)
+3. WebP: only files that are already lossless, re-encoded at the best lossless method
+Every file is rewritten in place, and only when the result is smaller and decodes
+to exactly the same pixels. artworks_backup keeps the originals untouched.
+
+favicon.ico is not handled: Pillow can't read every ICO variant, and a favicon
+is a few KB at most.
+
+Runs through the shared asset pipeline: unchanged files are skipped
+(use --force to rebuild everything).
+"""
+
+import argparse
+
+import asset_pipeline as pipeline
+import lossless
+import telemetry
+
+ROOT_DIRS = [
+    pipeline.IMG_DIR,
+    pipeline.PHOTOGRAPHY_DIR,
+]
+# Originals stay as they were
+EXCLUDE_DIRS = {"artworks_backup"}
+STAGE = "optimize_lossless"
+
+
+def _recompress(source, optimize):
+    before = source.read_bytes()
+    data, desc = optimize(before)
+    if desc:
+        pipeline.write_atomic(source, data)
+    return {"name": pipeline.rel_path(source), "before_kb": len(before) / 1024, "after_kb": len(data) / 1024,
+            "note": desc or "already optimal"}
+
+
+def optimize_png(source, outputs, settings):
+    """Re-encode a PNG with the smallest exact filter/zlib/colour-type combination."""
+    return _recompress(source, lossless.optimize_png)
+
+
+def optimize_svg(source, outputs, settings):
+    """Structurally minify an SVG."""
+    return _recompress(source, lossless.minify_svg)
+
+
+def optimize_webp(source, outputs, settings):
+    """Re-encode a lossless WebP at the best lossless method; lossy WebPs are left alone."""
+    return _recompress(source, lossless.optimize_webp)
+
+
+PNGS = pipeline.AssetClass(
+    STAGE, optimize_png, {"format": "PNG", "final_candidates": lossless.FINAL_CANDIDATES},
+    roots=ROOT_DIRS, extensions={".png"}, exclude_dirs=EXCLUDE_DIRS, outputs=pipeline.in_place)
+SVGS = pipeline.AssetClass(
+    STAGE, optimize_svg, {"format": "SVG"},
+    roots=ROOT_DIRS, extensions={".svg"}, exclude_dirs=EXCLUDE_DIRS, outputs=pipeline.in_place)
+LOSSLESS_WEBPS = pipeline.AssetClass(
+    STAGE, optimize_webp, {"format": "WEBP", "method": lossless.WEBP_LOSSLESS_METHOD},
+    roots=ROOT_DIRS, extensions={".webp"}, exclude_dirs=EXCLUDE_DIRS, outputs=pipeline.in_place)
+
+
+def main(force=False, workers=1):
+    print(f"{'File':<60} {'Before':>10} {'After':>10}  Result")
+    print("-" * 110)
+    results = pipeline.run_asset_classes([PNGS, SVGS, LOSSLESS_WEBPS], force=force, workers=workers)
+    saved = 0.0
+    for r in results:
+        if r["status"] == "failed":
+            print(f"{r['source']:<60} Error: {r['error']}")
+            continue
+        note = "unchanged" if r["status"] == "skipped" else r["note"]
+        if r["status"] == "built":
+            saved += r["before_kb"] - r["after_kb"]
+        print(f"{r['name']:<60} {r['before_kb']:>8.1f}KB {r['after_kb']:>8.1f}KB  {note}")
+    print(f"\n💾 Saved {saved:.1f}KB")
+    pipeline.print_run_stats(results)
+    return results
+
+
+if __name__ == "__main__":
+    parser = pipeline.add_pipeline_args(argparse.ArgumentParser(description=__doc__), ssim=False)
+    args = parser.parse_args()
+    telemetry.configure(args.telemetry, args.profile)
+    main(force=args.force, workers=args.workers)
+    telemetry.finish()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Perceptual-quality-targeted encoding for the asset pipeline.
+
+Instead of a fixed quality constant, search for the lowest encoder quality whose
+decoded output still reaches a target SSIM against the resized reference image:
+1. SSIM is computed on luma with NumPy (integral-image box windows, fully vectorized).
+2. Quality is binary-searched over QUALITY_RANGE (in-memory encodes only).
+3. The chosen quality is cached per source content hash + format + target + size,
+   so re-runs (--force, changed widths/AVIF settings) skip the search.
+"""
+
+import io
+import json
+
+import numpy as np
+from PIL import Image
+
+import asset_pipeline as pipeline
+
+QUALITY_RANGE = (40, 95)
+DEFAULT_TARGET_SSIM = 0.985
+SSIM_WINDOW = 8
+QUALITY_CACHE_FILE = pipeline.CACHE_DIR / "quality-cache.json"
+
+_C1 = (0.01 * 255) ** 2
+_C2 = (0.03 * 255) ** 2
+
+
+def _luma(img) -> np.ndarray:
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        # Composite on white so transparent regions compare like the page background
+        background = Image.new("RGBA", img.size, (255, 255, 255, 255))
+        img = Image.alpha_composite(background, img)
+    return np.asarray(img.convert("L"), dtype=np.float64)
+
+
+def _window_mean(x: np.ndarray, k: int) -> np.ndarray:
+    """Mean over every k x k window via an integral image (valid region only)."""
+    s = np.pad(x, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+    return (s[k:, k:] - s[:-k, k:] - s[k:, :-k] + s[:-k, :-k]) / (k * k)
+
+
+def ssim(reference, candidate, window=SSIM_WINDOW) -> float:
+    """Mean SSIM between two images of the same size (computed on luma)."""
+    a = _luma(reference)
+    b = _luma(candidate)
+    k = min(window, a.shape[0], a.shape[1])
+    mu_a = _window_mean(a, k)
+    mu_b = _window_mean(b, k)
+    var_a = _window_mean(a * a, k) - mu_a * mu_a
+    var_b = _window_mean(b * b, k) - mu_b * mu_b
+    cov = _window_mean(a * b, k) - mu_a * mu_b
+    num = (2 * mu_a * mu_b + _C1) * (2 * cov + _C2)
+    den = (mu_a * mu_a + mu_b * mu_b + _C1) * (var_a + var_b + _C2)
+    return float(np.mean(num / den))
+
+
+def _encoded_ssim(img, fmt, quality, save_kwargs) -> float:
+    data = pipeline.encode_image(img, fmt, quality=quality, **save_kwargs)
+    with Image.open(io.BytesIO(data)) as decoded:
+        decoded.load()
+        return ssim(img, decoded)
+
+
+def _load_cache() -> dict:
+    try:
+        with open(QUALITY_CACHE_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _store_cache(key, value):
+    # Read-merge-write so parallel workers only lose an entry in a rare race (it is just a cache)
+    cache = _load_cache()
+    cache[key] = value
+    QUALITY_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    pipeline.write_atomic(QUALITY_CACHE_FILE, json.dumps(cache, indent=1, sort_keys=True).encode("utf-8"))
+
+
+def search_quality(img, fmt, target_ssim, save_kwargs=None, quality_range=QUALITY_RANGE):
+    """
+    Lowest quality in quality_range whose encode reaches target_ssim.
+    Falls back to the top of the range if nothing reaches it. Returns (quality, ssim).
+    """
+    save_kwargs = {k: v for k, v in (save_kwargs or {}).items() if k not in ("quality", "exif")}
+    low, high = quality_range
+    best = (high, None)
+    while low <= high:
+        mid = (low + high) // 2
+        score = _encoded_ssim(img, fmt, mid, save_kwargs)
+        if score >= target_ssim:
+            best = (mid, score)
+            high = mid - 1
+        else:
+            low = mid + 1
+    if best[1] is None:
+        best = (quality_range[1], _encoded_ssim(img, fmt, quality_range[1], save_kwargs))
+    return best
+
+
+def resolve_quality(img, source, settings, fmt="WEBP", save_kwargs=None) -> int:
+    """
+    Quality to encode img with: settings["quality"] unless settings["target_ssim"]
+    is set, in which case the (cached) perceptual search result is used.
+    """
+    target = settings.get("target_ssim")
+    if not target:
+        return settings["quality"]
+
+    key = f"{pipeline.file_hash(source)}:{fmt}:{target}:{img.width}x{img.height}"
+    cached = _load_cache().get(key)
+    if cached:
+        return cached["quality"]
+
+    quality, score = search_quality(img, fmt, target, save_kwargs)
+    _store_cache(key, {"quality": quality, "ssim": round(score, 5), "source": pipeline.rel_path(source)})
+    print(f"   Perceptual search: {source.name} -> Q{quality} (SSIM {score:.4f}, target {target})")
+    return quality
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Asset reference index over the site sources (src/, blog/, i18n/, docusaurus.config.ts).
+
+1. One pass over the text files collects every asset-looking reference: quoted
+   string literals, markdown/CSS link targets and bare tokens ending in an image
+   extension. Quoted literals keep spaces, '&', full-width punctuation etc. intact.
+2. Per-file results are cached in .asset-cache/reference-index.json and reused
+   while the file's size + mtime are unchanged, so re-runs only read edited files.
+3. Consumers get two sets: referenced paths and referenced basenames; "is this
+   image used" becomes a set lookup instead of a grep over the tree.
+
+Usage: python scripts/reference_index.py   (prints dangling references)
+"""
+
+import json
+import os
+import re
+import sys
+from pathlib import Path, PurePosixPath
+from urllib.parse import unquote
+
+import asset_pipeline as pipeline
+
+INDEX_FILE = pipeline.CACHE_DIR / "reference-index.json"
+INDEX_VERSION = 1
+
+SOURCE_ROOTS = ["src", "blog", "i18n", "docusaurus.config.ts"]
+TEXT_EXTENSIONS = {".ts", ".tsx", ".js", ".jsx", ".md", ".mdx", ".css", ".scss",
+                   ".json", ".yml", ".yaml", ".html"}
+# Generated listings of what exists, not usages
+IGNORED_FILES = {pipeline.rel_path(pipeline.ASSET_MANIFEST_FILE), "src/data/asset-paths.json",
+                 "src/data/tile-manifest.json", "src/data/atlas-manifest.json", "src/data/precache-manifest.json"}
+
+ASSET_EXTENSIONS = ("jpg", "jpeg", "png", "webp", "avif", "gif", "svg", "ico", "bmp", "tif", "tiff")
+_EXT = "|".join(ASSET_EXTENSIONS)
+_REFERENCE_PATTERNS = [
+    # 'a b.jpg', "x&y.png", `${base}/z.webp`
+    re.compile(rf"""(['"`])((?:(?!\1)[^\n])*?\.(?:{_EXT}))(?:[?#][^'"`\n]*)?\1""", re.IGNORECASE),
+    # ![alt](path.png), url(path.png)
+    re.compile(rf"""(?:\]|url)\(\s*<?([^)<>'"\n]+?\.(?:{_EXT}))(?:[?#][^)\n]*)?>?\s*\)""", re.IGNORECASE),
+    # bare tokens (yaml values, html attributes without quotes, ...)
+    re.compile(rf"""([^\s'"`()<>\[\]{{}}=,]+\.(?:{_EXT}))\b""", re.IGNORECASE),
+]
+
+
+def extract_references(text: str) -> set:
+    """Asset references in one source text (URL-decoded, without query strings)."""
+    refs = set()
+    for pattern in _REFERENCE_PATTERNS:
+        for match in pattern.finditer(text):
+            ref = unquote(match.group(match.lastindex).strip())
+            if ref:
+                refs.add(ref)
+    return refs
+
+
+def source_files(roots=SOURCE_ROOTS):
+    for root in roots:
+        path = pipeline.PROJECT_ROOT / root
+        if path.is_file():
+            yield path
+        else:
+            yield from pipeline.scan_images(path, TEXT_EXTENSIONS)
+
+
+class ReferenceIndex:
+    """Persistent source file -> asset references map, refreshed by mtime."""
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = Path(path)
+        self.entries = {}
+        self.dirty = False
+        self.parsed = 0
+        if self.path.exists():
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == INDEX_VERSION:
+                    self.entries = data.get("entries", {})
+            except (OSError, ValueError) as e:
+                print(f"Warning: ignoring unreadable reference index {self.path}: {e}")
+
+    def refresh(self, roots=SOURCE_ROOTS):
+        """Re-read changed files under roots and drop entries for deleted ones."""
+        seen = set()
+        for path in source_files(roots):
+            key = pipeline.rel_path(path)
+            if key in IGNORED_FILES:
+                continue
+            seen.add(key)
+            st = os.stat(path)
+            entry = self.entries.get(key)
+            if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+                continue
+            text = path.read_text(encoding="utf-8", errors="replace")
+            self.entries[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                                 "refs": sorted(extract_references(text))}
+            self.parsed += 1
+            self.dirty = True
+        for key in set(self.entries) - seen:
+            del self.entries[key]
+            self.dirty = True
+        return self
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": INDEX_VERSION, "entries": self.entries}
+        pipeline.write_atomic(self.path, json.dumps(data, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+        self.dirty = False
+
+    def references(self) -> dict:
+        """{reference: [source files]} across the whole index."""
+        refs = {}
+        for key, entry in self.entries.items():
+            for ref in entry["refs"]:
+                refs.setdefault(ref, []).append(key)
+        return refs
+
+    def basenames(self) -> set:
+        return {PurePosixPath(ref).name for entry in self.entries.values() for ref in entry["refs"]}
+
+
+def resolve_reference(ref: str, source_key: str):
+    """
+    Filesystem path a reference points to, or None if it cannot be resolved
+    statically (external URLs, template expressions, bare file names).
+    """
+    if "://" in ref or ref.startswith("data:") or "${" in ref or "{" in ref:
+        return None
+    if ref.startswith("@site/"):
+        return pipeline.PROJECT_ROOT / ref[len("@site/"):]
+    if ref.startswith("/"):
+        # Site-absolute paths are served from static/
+        return pipeline.STATIC_DIR / ref.lstrip("/")
+    if ref.startswith(("./", "../")):
+        return (pipeline.PROJECT_ROOT / source_key).parent / ref
+    return None
+
+
+def dangling_references(index: ReferenceIndex) -> dict:
+    """{reference: [source files]} for resolvable references whose target is missing."""
+    dangling = {}
+    for ref, sources in index.references().items():
+        for source in sources:
+            target = resolve_reference(ref, source)
+            if target is not None and not target.exists():
+                dangling.setdefault(ref, []).append(source)
+    return dangling
+
+
+def load_index() -> ReferenceIndex:
+    index = ReferenceIndex().refresh()
+    index.save()
+    return index
+
+
+def print_dangling(dangling: dict):
+    if not dangling:
+        print("✅ No dangling asset references")
+        return
+    print(f"⚠️  {len(dangling)} dangling asset reference(s):")
+    for ref in sorted(dangling):
+        print(f"   {ref}  <- {', '.join(sorted(dangling[ref]))}")
+
+
+if __name__ == "__main__":
+    idx = load_index()
+    print(f"📇 Reference index: {len(idx.entries)} files, {idx.parsed} re-read")
+    found = dangling_references(idx)
+    print_dangling(found)
+    sys.exit(1 if found else 0)
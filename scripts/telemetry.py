@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Shared instrumentation for the image scripts: per-stage / per-file timers and
+counters, an optional cProfile or tracemalloc hook, and a JSONL / CSV report.
+
+1. `with telemetry.stage("decode"):` times a block. Stages nest, so an encode inside
+   the quality search is recorded as "quality_search/encode_webp".
+2. `telemetry.count("written_bytes", n)` adds a counter to the current file.
+3. asset_pipeline wraps every job in `track_file`, which tags events with the
+   source file and runs the profile hook; worker events travel back to the parent
+   with the job result, so one report covers all processes.
+4. Everything is thread-safe: the stage stack and current file are per thread, so
+   the pipeline's I/O threads (`for_file`) report beside the build thread.
+5. `finish()` prints the slowest stages and files and writes the report given with
+   --telemetry (.csv -> CSV, anything else -> JSON lines).
+
+--profile cprofile   dumps one .prof per file into .asset-cache/profiles/
+--profile tracemalloc records the peak Python-heap allocation per file
+"""
+
+import cProfile
+import csv
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+PROFILE_DIR = Path(__file__).resolve().parent.parent / ".asset-cache" / "profiles"
+# Spawned pool workers don't share module state; the profile mode reaches them via the environment
+PROFILE_ENV = "ASSET_PIPELINE_PROFILE"
+PROFILE_MODES = ("cprofile", "tracemalloc")
+SUMMARY_ROWS = 8
+CSV_FIELDS = ["event", "script", "stage", "file", "seconds", "name", "value", "status", "pid", "detail"]
+
+_script = Path(sys.argv[0]).stem or "python"
+_events = []        # recorded in this process, not yet handed to the parent
+_collected = []     # parent side: everything for the final report
+_lock = threading.Lock()
+_local = threading.local()  # per-thread stage stack and current file
+_report_path = None
+
+
+def add_telemetry_args(parser):
+    parser.add_argument("--telemetry", metavar="PATH", default=None,
+                        help="write per-stage / per-file timings to PATH (.jsonl, or .csv)")
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=None,
+                        help="profile each file with cProfile (.prof dumps) or tracemalloc (peak heap)")
+    return parser
+
+
+def configure(report=None, profile=None):
+    global _report_path
+    _report_path = Path(report) if report else None
+    if profile:
+        os.environ[PROFILE_ENV] = profile
+    else:
+        os.environ.pop(PROFILE_ENV, None)
+
+
+def _stack() -> list:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def _emit(event: dict):
+    event.setdefault("script", _script)
+    event.setdefault("pid", os.getpid())
+    current = getattr(_local, "file", None)
+    if current is not None:
+        event.setdefault("file", current)
+    with _lock:
+        _events.append(event)
+
+
+@contextmanager
+def stage(name):
+    """Time a block as one stage of the current file."""
+    stack = _stack()
+    stack.append(name)
+    path = "/".join(stack)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stack.pop()
+        _emit({"event": "stage", "stage": path, "seconds": time.perf_counter() - start})
+
+
+def count(name, value=1):
+    """Add value to a named counter of the current file."""
+    _emit({"event": "counter", "name": name, "value": value})
+
+
+def _profile_name(label, file) -> str:
+    return re.sub(r"[^\w.-]+", "_", f"{label}-{file}") + ".prof"
+
+
+@contextmanager
+def for_file(file):
+    """Attribute the events of this thread to file (no "file" event, no profiling)."""
+    previous = getattr(_local, "file", None)
+    _local.file = str(file)
+    try:
+        yield
+    finally:
+        _local.file = previous
+
+
+@contextmanager
+def track_file(file, label):
+    """Attribute everything inside to file; records a "file" event with its total time."""
+    previous = getattr(_local, "file", None)
+    _local.file = str(file)
+    mode = os.environ.get(PROFILE_ENV)
+    profiler = cProfile.Profile() if mode == "cprofile" else None
+    started_tracing = mode == "tracemalloc" and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    elif tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    event = {"event": "file", "stage": label}
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield event
+    finally:
+        if profiler:
+            profiler.disable()
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            dump = PROFILE_DIR / _profile_name(label, file)
+            profiler.dump_stats(dump)
+            event["detail"] = str(dump)
+        if tracemalloc.is_tracing():
+            event["value"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+            event["name"] = "py_peak_mb"
+            if started_tracing:
+                tracemalloc.stop()
+        event["seconds"] = time.perf_counter() - start
+        _emit(event)
+        _local.file = previous
+
+
+def skipped(file, label):
+    """Record a file whose job was skipped as unchanged."""
+    _emit({"event": "file", "stage": label, "file": str(file), "seconds": 0.0, "status": "skipped"})
+
+
+def drain() -> list:
+    """Hand over (and clear) the events recorded in this process."""
+    with _lock:
+        events = list(_events)
+        _events.clear()
+    return events
+
+
+def collect(events):
+    """Parent side: keep events (e.g. returned from a pool worker) for the report."""
+    _collected.extend(events)
+
+
+def all_events() -> list:
+    collect(drain())
+    return list(_collected)
+
+
+def write_report(path, events):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(events)
+        else:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+
+def print_summary(events):
+    stages = {}
+    for e in events:
+        if e["event"] == "stage":
+            total, calls = stages.get(e["stage"], (0.0, 0))
+            stages[e["stage"]] = (total + e["seconds"], calls + 1)
+    files = sorted((e for e in events if e["event"] == "file"), key=lambda e: e["seconds"], reverse=True)
+    if not stages and not files:
+        return
+    print("\n--- Telemetry: slowest stages ---")
+    for name, (total, calls) in sorted(stages.items(), key=lambda kv: kv[1][0], reverse=True)[:SUMMARY_ROWS]:
+        print(f"{name:<40} {total:9.2f}s  {calls:5d} calls  {total / calls * 1000:9.1f} ms/call")
+    if files:
+        print("--- Telemetry: slowest files ---")
+        for e in files[:SUMMARY_ROWS]:
+            extra = f"  {e['name']}={e['value']}" if e.get("name") else ""
+            print(f"{e['file']:<52} {e['seconds']:8.2f}s  ({e['stage']}){extra}")
+
+
+def finish():
+    """Print the summary and write the --telemetry report (if requested)."""
+    events = all_events()
+    print_summary(events)
+    if _report_path:
+        write_report(_report_path, events)
+        print(f"Telemetry: {len(events)} events -> {_report_path}")
@@ -0,0 +1,76 @@
+"""Sprite sheet packing and gutters (build_atlas.py)."""
+
+import random
+
+import pytest
+from PIL import Image
+
+from build_atlas import MaxRectsBin, pack, paste_extruded
+
+
+def overlaps(a, b) -> bool:
+    (ax, ay, aw, ah), (bx, by, bw, bh) = a, b
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
+
+def assert_valid_packing(sizes, placements, sheet_sizes, max_size):
+    rects = {}
+    for (w, h), (index, x, y) in zip(sizes, placements):
+        sheet_w, sheet_h = sheet_sizes[index]
+        assert 0 <= x and 0 <= y and x + w <= sheet_w <= max_size and y + h <= sheet_h <= max_size
+        rects.setdefault(index, []).append((x, y, w, h))
+    for sheet in rects.values():
+        for i, a in enumerate(sheet):
+            assert not any(overlaps(a, b) for b in sheet[i + 1:]), a
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_boxes_never_overlap_or_leave_the_sheet(seed):
+    rng = random.Random(seed)
+    sizes = [(rng.randint(20, 400), rng.randint(20, 400)) for _ in range(120)]
+    placements, sheet_sizes = pack(sizes, max_size=1024)
+    assert len(placements) == len(sizes)
+    assert_valid_packing(sizes, placements, sheet_sizes, 1024)
+
+
+def test_one_sheet_when_everything_fits():
+    # Ten 1364x1024 series sprites (1360x1020 plus gutters): three per row, four rows
+    sizes = [(1364, 1024)] * 10
+    placements, sheet_sizes = pack(sizes)
+    assert {index for index, _, _ in placements} == {0}
+    assert sheet_sizes == [(4092, 4096)]
+    assert_valid_packing(sizes, placements, sheet_sizes, 4096)
+
+
+def test_overflow_opens_new_sheets():
+    placements, sheet_sizes = pack([(3000, 3000)] * 3)
+    assert sorted(index for index, _, _ in placements) == [0, 1, 2]
+    assert sheet_sizes == [(3000, 3000)] * 3
+
+
+def test_oversized_sprite_is_rejected():
+    with pytest.raises(ValueError):
+        pack([(100, 100), (5000, 10)])
+
+
+def test_bottom_left_fills_rows_first():
+    packer = MaxRectsBin(300, 300)
+    assert [packer.insert(100, 100) for _ in range(4)] == [(0, 0), (100, 0), (200, 0), (0, 100)]
+    assert (packer.width, packer.height) == (300, 200)
+    assert packer.insert(301, 10) is None
+
+
+def test_gutter_repeats_the_sprite_edges():
+    thumb = Image.new("RGB", (4, 3), (0, 0, 255))
+    thumb.putpixel((0, 0), (255, 0, 0))
+    thumb.putpixel((3, 2), (0, 255, 0))
+    sheet = Image.new("RGB", (10, 9), (0, 0, 0))
+    paste_extruded(sheet, thumb, 1, 1, gutter=2)
+    assert sheet.crop((3, 3, 7, 6)).tobytes() == thumb.tobytes()
+    # Corners take the corner pixel; edges take the nearest edge pixel
+    assert sheet.getpixel((1, 1)) == sheet.getpixel((2, 2)) == (255, 0, 0)
+    assert sheet.getpixel((8, 7)) == sheet.getpixel((7, 6)) == (0, 255, 0)
+    assert sheet.getpixel((1, 4)) == (0, 0, 255)
+    assert sheet.getpixel((4, 1)) == (0, 0, 255)
+    # Nothing outside the padded box is touched
+    assert sheet.getpixel((0, 0)) == sheet.getpixel((9, 8)) == (0, 0, 0)
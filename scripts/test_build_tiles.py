@@ -0,0 +1,69 @@
+"""DZI pyramid geometry and strip-wise tiling (build_tiles.py)."""
+
+import io
+import math
+
+import pytest
+from PIL import Image
+
+import asset_pipeline as pipeline
+from build_tiles import TilePyramid, level_sizes, max_level
+
+
+def tile_count(sizes, tile_size=512):
+    return sum(math.ceil(w / tile_size) * math.ceil(h / tile_size) for w, h in sizes)
+
+
+def test_gfx_frame_pyramid():
+    sizes = level_sizes((11648, 8736))
+    assert sizes == [(11648, 8736), (5824, 4368), (2912, 2184), (1456, 1092), (728, 546), (364, 273)]
+    assert max_level((11648, 8736)) == 14
+    # IMAGE_STANDARDS budgets a 100MP frame at ~570 tiles
+    assert tile_count(sizes) == 566
+
+
+@pytest.mark.parametrize("size, expected", [
+    ((512, 300), [(512, 300)]),
+    ((513, 10), [(513, 10), (257, 5)]),
+    ((1100, 700), [(1100, 700), (550, 350), (275, 175)]),
+])
+def test_levels_halve_rounding_up_until_one_tile(size, expected):
+    assert level_sizes(size) == expected
+
+
+@pytest.mark.parametrize("size, expected", [((1, 1), 0), ((2, 1), 1), ((3, 2), 2), ((512, 512), 9), ((1025, 3), 11)])
+def test_max_level_is_ceil_log2_of_longest_side(size, expected):
+    assert max_level(size) == expected
+
+
+@pytest.fixture
+def png_tiles(monkeypatch):
+    """Encode tiles losslessly so their pixels can be compared exactly."""
+    def encode(img, fmt, **kwargs):
+        buffer = io.BytesIO()
+        img.save(buffer, "PNG")
+        return buffer.getvalue()
+    monkeypatch.setattr(pipeline, "encode_image", encode)
+
+
+def test_strip_wise_pyramid_matches_whole_level_reduce(tmp_path, png_tiles):
+    img = Image.radial_gradient("L").resize((1100, 700)).convert("RGB")
+    tile_size = 256
+    with pipeline.deferred_writes() as writes:
+        pyramid = TilePyramid(img.size, tmp_path, tile_size)
+        # Same feed as build_tiles: one tile row at a time
+        for y in range(0, img.height, tile_size):
+            pyramid.add_strip(img.crop((0, y, img.width, min(y + tile_size, img.height))))
+        pyramid.finish()
+    tiles = {(path.parent.name, path.name): Image.open(io.BytesIO(data)) for path, data in writes}
+
+    assert (pyramid.min_level, pyramid.top_level) == (8, 11)
+    assert len(tiles) == tile_count(level_sizes(img.size, tile_size), tile_size)
+    expected = img
+    for level in range(pyramid.top_level, pyramid.min_level - 1, -1):
+        stitched = Image.new("RGB", expected.size)
+        for row, y in enumerate(range(0, expected.height, tile_size)):
+            for col, x in enumerate(range(0, expected.width, tile_size)):
+                stitched.paste(tiles[str(level), f"{col}_{row}.webp"], (x, y))
+        assert stitched.tobytes() == expected.tobytes(), f"level {level}"
+        expected = expected.reduce(2)
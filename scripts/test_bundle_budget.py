@@ -0,0 +1,66 @@
+"""Deploy-bundle budget evaluation (bundle_budget.py)."""
+
+import pytest
+
+import bundle_budget as budget
+
+MB = budget.MB
+CONFIG = {"max_file_mb": 25, "warn_file_mb": 24, "max_files": 5, "max_total_mb": 60,
+          "directories": {"img": 2, "photography": 50}}
+
+
+def test_directory_totals_include_subdirectories():
+    sizes = {"img/a.webp": 10, "img/artworks/b.webp": 20, "photography/Skitting/c.jpg": 5, "sw.js": 1}
+    assert budget.directory_totals(sizes) == {
+        "img": 30, "img/artworks": 20, "photography": 5, "photography/Skitting": 5}
+
+
+def test_within_budget():
+    sizes = {"img/a.webp": 1 * MB, "photography/Skitting/DSCF0001.jpg": 22 * MB}
+    assert budget.check_budgets(sizes, budget.directory_totals(sizes), CONFIG) == ([], [])
+
+
+@pytest.mark.parametrize("sizes, violation", [
+    ({"photography/a.jpg": 26 * MB}, "per-file limit"),
+    ({"img/a.webp": 1.5 * MB, "img/artworks/b.webp": 1 * MB}, "img/: 2.5MB > 2MB directory budget"),
+    ({"photography/a.jpg": 20 * MB, "photography/b.jpg": 20 * MB, "tiles/c.webp": 21 * MB}, "total budget"),
+    ({f"f{i}.txt": 1 for i in range(6)}, "6 files > 5 file limit"),
+])
+def test_each_budget_is_enforced(sizes, violation):
+    errors, _ = budget.check_budgets(sizes, budget.directory_totals(sizes), CONFIG)
+    assert len(errors) == 1 and violation in errors[0]
+
+
+def test_files_close_to_the_limit_warn():
+    sizes = {"photography/a.jpg": int(24.5 * MB)}
+    errors, warnings = budget.check_budgets(sizes, budget.directory_totals(sizes), CONFIG)
+    assert errors == [] and len(warnings) == 1
+
+
+def test_scan_counts_everything_but_assetsignore(tmp_path):
+    for rel, size in {"img/a.webp": 3, "img/a.webp.bak": 5, ".DS_Store": 1, "drafts/x.png": 7,
+                      "sub/drafts/y.png": 11}.items():
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_bytes(b"x" * size)
+    assert budget.load_assetsignore(tmp_path) == []
+    assert set(budget.scan_bundle(tmp_path)) == {"img/a.webp", "img/a.webp.bak", ".DS_Store", "drafts/x.png",
+                                                 "sub/drafts/y.png"}
+
+    (tmp_path / ".assetsignore").write_text("# not uploaded\n.DS_Store\n/drafts/\n", encoding="utf-8")
+    patterns = budget.load_assetsignore(tmp_path)
+    assert set(budget.scan_bundle(tmp_path, patterns)) == {"img/a.webp", "img/a.webp.bak", "sub/drafts/y.png"}
+
+
+def test_a_failing_bundle_does_not_become_the_baseline(tmp_path, monkeypatch):
+    monkeypatch.setattr(budget, "CACHE_DIR", tmp_path / "cache")
+    root = tmp_path / "build"
+    root.mkdir()
+    (root / "a.bin").write_bytes(b"x" * 10)
+    config = tmp_path / "budget.json"
+    config.write_text('{"max_file_mb": 1, "max_files": 10, "max_total_mb": 1}', encoding="utf-8")
+    assert budget.main(root, config) == 0
+    assert budget.load_manifest(budget.manifest_path(root)) == {"a.bin": 10}
+
+    (root / "b.bin").write_bytes(b"x" * (2 * MB))
+    assert budget.main(root, config) == 1
+    assert budget.load_manifest(budget.manifest_path(root)) == {"a.bin": 10}
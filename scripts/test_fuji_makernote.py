@@ -0,0 +1,72 @@
+"""Fujifilm MakerNote reader (fuji_makernote.py): decoding, and failing cleanly on bad headers."""
+
+import struct
+
+import pytest
+from PIL import Image
+
+import fuji_makernote as fuji
+
+
+def makernote(entries) -> bytes:
+    ifd = struct.pack("<H", len(entries))
+    for tag, value in entries:
+        ifd += struct.pack("<HHIH2x", tag, 3, 1, value)
+    return b"FUJIFILM" + struct.pack("<I", 12) + ifd + struct.pack("<I", 0)
+
+
+def write_jpeg(path, note):
+    exif = Image.Exif()
+    exif[0x010F] = "FUJIFILM"
+    exif.get_ifd(0x8769)[0x927C] = note
+    Image.new("RGB", (16, 16)).save(path, "JPEG", exif=exif)
+    return path
+
+
+@pytest.fixture
+def gfx_jpeg(tmp_path):
+    # Classic Chrome, strong grain, DR400
+    return write_jpeg(tmp_path / "DSCF0001.jpg", makernote([(0x1047, 64), (0x1401, 0x600), (0x1403, 400)]))
+
+
+def test_reads_film_simulation_grain_and_dynamic_range(gfx_jpeg):
+    assert fuji.read_fuji_makernote(gfx_jpeg) == {
+        "filmSimulation": "Classic Chrome", "grainEffect": "Strong", "dynamicRange": "DR400"}
+
+
+def test_monochrome_comes_from_the_saturation_tag(tmp_path):
+    path = write_jpeg(tmp_path / "a.jpg", makernote([(0x1003, 0x501), (0x1401, 0x000)]))
+    assert fuji.read_fuji_makernote(path)["filmSimulation"] == "Acros + R Filter"
+
+
+def test_non_fuji_files_give_nothing(tmp_path):
+    path = tmp_path / "plain.jpg"
+    Image.new("RGB", (16, 16)).save(path, "JPEG")
+    assert fuji.read_fuji_makernote(path) == {}
+
+
+def test_truncated_files_raise_value_error_or_give_nothing(gfx_jpeg, tmp_path):
+    data = gfx_jpeg.read_bytes()
+    cut = tmp_path / "cut.jpg"
+    for length in range(len(data)):
+        cut.write_bytes(data[:length])
+        try:
+            fuji.read_fuji_makernote(cut)
+        except ValueError:
+            pass
+
+
+def test_value_offset_past_the_end_is_a_value_error(tmp_path):
+    # Two LONGs don't fit the entry, so the value is read at an offset: here past the note
+    entry = struct.pack("<HHII", 0x1401, 4, 2, 0xFFFF)
+    note = b"FUJIFILM" + struct.pack("<I", 12) + struct.pack("<H", 1) + entry + struct.pack("<I", 0)
+    path = write_jpeg(tmp_path / "bad.jpg", note)
+    with pytest.raises(ValueError):
+        fuji.read_fuji_makernote(path)
+
+
+def test_zero_segment_length_is_a_value_error(tmp_path):
+    path = tmp_path / "loop.jpg"
+    path.write_bytes(b"\xff\xd8\xff\xe0\x00\x00" + b"\x00" * 16)
+    with pytest.raises(ValueError):
+        fuji.read_fuji_makernote(path)
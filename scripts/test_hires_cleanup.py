@@ -0,0 +1,63 @@
+"""cleanup_directory keeps everything the hi-res WebP pass wrote (compress_hires_images.py)."""
+
+import pytest
+from PIL import Image
+
+import asset_pipeline as pipeline
+import compress_hires_images as hires
+
+
+@pytest.fixture
+def series(tmp_path, monkeypatch):
+    """A series directory under a throwaway static/photography, with one master JPG."""
+    root = tmp_path.resolve()
+    static = root / "static"
+    directory = static / "photography" / "Skitting"
+    directory.mkdir(parents=True)
+    monkeypatch.setattr(pipeline, "PROJECT_ROOT", root)
+    monkeypatch.setattr(pipeline, "STATIC_DIR", static)
+    monkeypatch.setattr(pipeline, "PHOTOGRAPHY_DIR", static / "photography")
+    Image.radial_gradient("L").resize((1600, 1200)).convert("RGB").save(directory / "DSCF0001.jpg", "JPEG",
+                                                                       quality=90)
+    return directory
+
+
+def build(directory, avif):
+    """compress_hires_images.main for one series: compress, WebP ladder, cleanup."""
+    master = directory / "DSCF0001.jpg"
+    hires.compress_jpg_in_place(master)
+    asset = hires.generate_standard_webp(master, settings=dict(hires.WEBP_SETTINGS, avif=avif))["asset"]
+    hires.cleanup_directory(directory)
+    return asset
+
+
+def asset_urls(asset):
+    urls = {asset["src"]}
+    for v in asset["variants"]:
+        urls.add(v["src"])
+        if "avif" in v:
+            urls.add(v["avif"]["src"])
+    return urls
+
+
+@pytest.mark.parametrize("avif", [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(not pipeline.AVIF_AVAILABLE, reason="no AVIF encoder")),
+])
+def test_every_manifest_url_survives_cleanup(series, avif):
+    asset = build(series, avif)
+    assert len(asset["variants"]) > 1
+    if avif:
+        assert any("avif" in v for v in asset["variants"])
+    missing = [url for url in asset_urls(asset) if not (pipeline.STATIC_DIR / url.lstrip("/")).exists()]
+    assert missing == []
+
+
+def test_derivatives_and_orphans_are_removed(series):
+    stale = [series / "DSCF0001_web.webp", series / "DSCF0001_web.jpg",
+             series / "DSCF0002.webp", series / "DSCF0002-480w.avif"]
+    for path in stale:
+        path.write_bytes(b"stale")
+    build(series, avif=False)
+    assert [p.name for p in stale if p.exists()] == []
+    assert (series / "DSCF0001.jpg").exists()
@@ -0,0 +1,92 @@
+"""Quality prediction and the pixel re-encode of compress_hires_images.py."""
+
+import pytest
+from PIL import Image
+
+import compress_hires_images as hires
+
+SAVE_KWARGS = {"optimize": True, "progressive": True}
+
+
+@pytest.fixture(autouse=True)
+def size_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(hires, "SIZE_MODEL_FILE", tmp_path / "jpeg-size-model.json")
+
+
+@pytest.fixture
+def photo():
+    # Noise over a gradient: compresses like a textured photo, not like a flat test card
+    noise = Image.effect_noise((1024, 768), 40)
+    gradient = Image.linear_gradient("L").resize((1024, 768))
+    return Image.merge("RGB", (noise, gradient, Image.blend(noise, gradient, 0.5)))
+
+
+def test_mosaic_is_a_grid_of_full_resolution_tiles(photo):
+    mosaic = hires.sample_mosaic(photo, grid=4, tile=64)
+    assert mosaic.size == (256, 256)
+    # The corner tiles are the image's corners, unscaled
+    assert mosaic.crop((0, 0, 64, 64)).tobytes() == photo.crop((0, 0, 64, 64)).tobytes()
+    assert mosaic.crop((192, 192, 256, 256)).tobytes() == photo.crop((960, 704, 1024, 768)).tobytes()
+
+
+def test_predicted_quality_is_the_highest_estimate_under_target(photo):
+    target = 120_000
+    quality, estimate = hires.predict_quality(photo, target, SAVE_KWARGS)
+    assert 1 < quality < 95
+    assert estimate(quality) < target <= estimate(quality + 1)
+
+
+def test_fitted_ratio_corrects_the_estimate(photo):
+    target = 120_000
+    plain, _ = hires.predict_quality(photo, target, SAVE_KWARGS)
+    hires.update_size_model([{"status": "built", "size_ratio": 1.5}])
+    corrected, estimate = hires.predict_quality(photo, target, SAVE_KWARGS)
+    assert corrected < plain
+    assert estimate(corrected) * 1.5 < target
+
+
+def test_size_model_only_learns_from_built_results():
+    hires.update_size_model([{"status": "built", "size_ratio": 1.1}, {"status": "skipped", "size_ratio": 2.0},
+                             {"status": "built", "quality": None}])
+    assert hires.load_size_model() == [1.1]
+
+
+@pytest.fixture
+def master(photo, tmp_path, monkeypatch):
+    path = tmp_path / "DSCF0001.jpg"
+    photo.save(path, "JPEG", quality=98)
+    with Image.open(path) as decoded:
+        decoded.load()
+        sizes = {q: len(hires.pipeline.encode_image(decoded, "JPEG", quality=q, **SAVE_KWARGS)) for q in (40, 41, 42)}
+    return path, sizes
+
+
+def predicted(monkeypatch, quality):
+    monkeypatch.setattr(hires, "predict_quality", lambda img, target, kwargs: (quality, lambda q: 100_000))
+
+
+def test_an_underestimate_gets_one_probe_up_and_no_more(master, monkeypatch):
+    path, sizes = master
+    # Q40, Q41 and Q42 all fit: only Q41 is tried
+    monkeypatch.setattr(hires, "TARGET_JPG_BYTES", sizes[42] + 1)
+    predicted(monkeypatch, 40)
+    data, quality, full_encodes, _ = hires.reencode_jpg(path)
+    assert (quality, full_encodes) == (41, 2)
+    assert len(data) == sizes[41]
+
+
+def test_an_overshoot_steps_down_to_the_first_fit(master, monkeypatch):
+    path, sizes = master
+    monkeypatch.setattr(hires, "TARGET_JPG_BYTES", sizes[41])
+    predicted(monkeypatch, 42)
+    data, quality, full_encodes, _ = hires.reencode_jpg(path)
+    assert (quality, full_encodes) == (40, 3)
+    assert len(data) < sizes[41]
+
+
+def test_reencode_refuses_to_return_an_oversize_file(master, monkeypatch):
+    path, _ = master
+    monkeypatch.setattr(hires, "TARGET_JPG_BYTES", 1_000)
+    predicted(monkeypatch, 3)
+    with pytest.raises(ValueError):
+        hires.reencode_jpg(path)
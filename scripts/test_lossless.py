@@ -0,0 +1,106 @@
+"""Lossless recompression (lossless.py): every rewrite must decode to the same image."""
+
+import io
+import struct
+import zlib
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import lossless
+
+
+def png(img, **kwargs) -> bytes:
+    out = io.BytesIO()
+    img.save(out, "PNG", compress_level=1, **kwargs)
+    return out.getvalue()
+
+
+def pixels(data: bytes) -> np.ndarray:
+    with Image.open(io.BytesIO(data)) as img:
+        return np.asarray(img.convert("RGBA"))
+
+
+def gradient(mode, size=(96, 64)):
+    base = Image.linear_gradient("L").resize(size)
+    if mode == "L":
+        return base
+    rgba = Image.merge("RGBA", (base, base.transpose(Image.Transpose.FLIP_LEFT_RIGHT), base.rotate(90), base))
+    return rgba.convert(mode) if mode != "P" else rgba.convert("RGB").quantize(16)
+
+
+@pytest.mark.parametrize("mode", ["RGBA", "RGB", "L", "P"])
+def test_png_round_trip_is_exact(mode):
+    data = png(gradient(mode))
+    optimized, desc = lossless.optimize_png(data)
+    assert len(optimized) <= len(data)
+    assert np.array_equal(pixels(optimized), pixels(data))
+    if desc:
+        assert optimized != data
+
+
+def test_flat_alpha_is_dropped_and_few_colours_become_a_palette():
+    img = Image.new("RGBA", (64, 64), (255, 0, 0, 255))
+    img.paste((0, 0, 255, 255), (0, 0, 32, 32))
+    data = png(img)
+    optimized, desc = lossless.optimize_png(data)
+    assert desc is not None
+    assert np.array_equal(pixels(optimized), pixels(data))
+    assert optimized[25] == lossless.PALETTE  # IHDR colour type
+
+
+def test_16_bit_rgb_png_is_left_alone():
+    # Pillow opens 16-bit/channel RGB as mode "RGB" and would silently drop to 8 bits
+    w, h = 16, 8
+    rows = b"".join(b"\x00" + b"".join(struct.pack(">HHH", x * 4000 + 7, y * 8000 + 3, 12345)
+                                       for x in range(w)) for y in range(h))
+    data = lossless._png_bytes(w, h, 2, 16, zlib.compress(rows, 0), None, None, {})
+    assert lossless.png_bit_depth(data) == 16
+    with Image.open(io.BytesIO(data)) as img:
+        assert img.mode == "RGB"
+    assert lossless.optimize_png(data) == (data, None)
+
+
+def test_lossless_webp_round_trip_is_exact():
+    out = io.BytesIO()
+    gradient("RGBA").save(out, "WEBP", lossless=True, method=0)
+    data = out.getvalue()
+    assert lossless.is_lossless_webp(data)
+    optimized, _ = lossless.optimize_webp(data)
+    assert np.array_equal(pixels(optimized), pixels(data))
+
+
+def test_lossy_webp_is_not_touched():
+    out = io.BytesIO()
+    gradient("RGB").save(out, "WEBP", quality=80)
+    assert lossless.optimize_webp(out.getvalue()) == (out.getvalue(), None)
+
+
+SVG = """<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10">
+  <!-- comment -->
+  <rect style="fill:#ff0000; opacity:1" width="10" height="10"/>
+  {extra}
+</svg>"""
+
+
+def test_svg_default_opacity_is_dropped_without_stylesheets():
+    minified, desc = lossless.minify_svg(SVG.format(extra="").encode())
+    assert desc == "minified"
+    assert b'style="fill:#f00"' in minified
+    assert b"comment" not in minified
+
+
+@pytest.mark.parametrize("extra", [
+    "<style>rect { opacity: 0.5 }</style>",
+    '<circle class="faded" r="2"/>',
+])
+def test_svg_default_opacity_is_kept_when_css_could_override_it(extra):
+    minified, _ = lossless.minify_svg(SVG.format(extra=extra).encode())
+    assert b"opacity:1" in minified
+
+
+def test_svg_preserved_whitespace_is_untouched():
+    text = '<text xml:space="preserve" style="opacity:1">  two  spaces  <tspan>  x  </tspan></text>'
+    minified, _ = lossless.minify_svg(SVG.format(extra=text).encode())
+    assert text.encode() in minified
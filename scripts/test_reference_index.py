@@ -0,0 +1,78 @@
+"""Asset reference index (reference_index.py) and the unused-image check built on it."""
+
+import os
+
+import pytest
+
+import asset_pipeline as pipeline
+import cleanup_unused
+from reference_index import ReferenceIndex, dangling_references, extract_references, resolve_reference
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    root = tmp_path.resolve()
+    (root / "src" / "pages").mkdir(parents=True)
+    (root / "static" / "img").mkdir(parents=True)
+    monkeypatch.setattr(pipeline, "PROJECT_ROOT", root)
+    monkeypatch.setattr(pipeline, "STATIC_DIR", root / "static")
+    monkeypatch.setattr(pipeline, "IMG_DIR", root / "static" / "img")
+    monkeypatch.setattr(cleanup_unused, "IMG_DIR", root / "static" / "img")
+    return root
+
+
+def test_extracts_quoted_markdown_css_and_bare_references():
+    text = """
+    const a = '/img/IMG 0196 (1).jpg';
+    <img src="/photography/Skitting/DSCF0192.webp?v=2" />
+    ![cover](./cover%20art.png)
+    background: url(/img/bg.svg);
+    image: /img/social-card.jpg
+    """
+    assert extract_references(text) >= {
+        "/img/IMG 0196 (1).jpg", "/photography/Skitting/DSCF0192.webp", "./cover art.png",
+        "/img/bg.svg", "/img/social-card.jpg"}
+
+
+def test_non_asset_strings_are_ignored():
+    assert extract_references("import x from './x.tsx'; const s = 'jpg';") == set()
+
+
+def test_resolves_site_relative_and_static_references(project):
+    assert resolve_reference("/img/a.png", "src/pages/x.tsx") == project / "static" / "img" / "a.png"
+    assert resolve_reference("@site/static/img/a.png", "src/pages/x.tsx") == project / "static" / "img" / "a.png"
+    assert resolve_reference("../b.png", "src/pages/x.tsx") == project / "src" / "pages" / ".." / "b.png"
+    for unresolvable in ("https://example.com/a.png", "${base}/a.png", "a.png"):
+        assert resolve_reference(unresolvable, "src/pages/x.tsx") is None
+
+
+def test_refresh_rereads_only_changed_files_and_drops_deleted_ones(project, tmp_path):
+    page = project / "src" / "pages" / "a.tsx"
+    other = project / "src" / "pages" / "b.tsx"
+    page.write_text("const a = '/img/a.webp';", encoding="utf-8")
+    other.write_text("const b = '/img/b.webp';", encoding="utf-8")
+    index_file = tmp_path / "reference-index.json"
+
+    index = ReferenceIndex(index_file).refresh(["src"])
+    index.save()
+    assert index.parsed == 2
+
+    page.write_text("const a = '/img/a2.webp';", encoding="utf-8")
+    os.utime(page, ns=(1, 1))
+    other.unlink()
+    index = ReferenceIndex(index_file).refresh(["src"])
+    assert index.parsed == 1
+    assert index.references() == {"/img/a2.webp": ["src/pages/a.tsx"]}
+
+
+def test_dangling_and_unused_images(project, tmp_path):
+    img = project / "static" / "img"
+    for name in ("used.png", "used.webp", "unused.png", "unused.webp", "no-webp.png"):
+        (img / name).write_bytes(b"x")
+    (project / "src" / "pages" / "a.tsx").write_text(
+        "const a = '/img/used.png'; const b = '/img/missing.webp';", encoding="utf-8")
+
+    index = ReferenceIndex(tmp_path / "reference-index.json").refresh(["src"])
+    assert dangling_references(index) == {"/img/missing.webp": ["src/pages/a.tsx"]}
+    # Only sources with an optimized WebP are candidates
+    assert cleanup_unused.find_unused(index.basenames()) == [img / "unused.png"]
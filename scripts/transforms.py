@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Declarative geometry transforms for source images, applied by the shared pipeline.
+
+scripts/transforms.json maps a static-relative source path to a list of operations,
+run in order on the decoded (EXIF-oriented) image before the resize/encode step:
+
+    {"img/alipay_receiveMoney.png": [{"op": "aspect", "ratio": [924, 966], "anchor": "top"}]}
+
+Operations (sizes in source pixels, display orientation):
+- crop:   {"box": [left, top, right, bottom]} or {"width", "height", "anchor"}
+- aspect: {"ratio": [w, h], "anchor", "mode": "crop" | "pad", "background"}
+- pad:    {"width", "height"} (grow to at least that size) or {"margin": n | [top, right, bottom, left]},
+          plus "anchor" and "background"
+- fit:    {"width", "height", "mode": "contain" | "cover", "anchor", "background"}; the result is
+          exactly width x height (contain pads, cover crops)
+- rotate: {"degrees", "background"}; multiples of 90 are exact transposes
+anchor is one of top-left, top, top-right, left, center, right, bottom-left, bottom, bottom-right
+(default center). background is "#rrggbb", "#rrggbbaa" or "transparent" (default: transparent
+for images with alpha, else white).
+
+Crop, pad and 90-degree rotation move pixels without resampling; only fit and other
+rotations resample. The source file itself is never modified: the config is the record
+of what was done, and the AssetClass settings hash includes it, so editing an entry
+rebuilds that asset.
+"""
+
+import json
+from pathlib import Path
+
+from PIL import Image, ImageColor
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+STATIC_DIR = PROJECT_ROOT / "static"
+CONFIG_FILE = Path(__file__).resolve().parent / "transforms.json"
+
+ANCHORS = {
+    "top-left": (0, 0), "top": (0.5, 0), "top-right": (1, 0),
+    "left": (0, 0.5), "center": (0.5, 0.5), "right": (1, 0.5),
+    "bottom-left": (0, 1), "bottom": (0.5, 1), "bottom-right": (1, 1),
+}
+REQUIRED = {
+    "crop": (),
+    "aspect": ("ratio",),
+    "pad": (),
+    "fit": ("width", "height"),
+    "rotate": ("degrees",),
+}
+
+_config_cache = {}
+
+
+def validate(ops, where="transforms") -> list:
+    """Check a list of operations; raises ValueError naming the bad entry."""
+    if not isinstance(ops, list):
+        raise ValueError(f"{where}: expected a list of operations")
+    for i, op in enumerate(ops):
+        name = op.get("op") if isinstance(op, dict) else None
+        if name not in REQUIRED:
+            raise ValueError(f"{where}[{i}]: unknown op {name!r} (expected one of {', '.join(REQUIRED)})")
+        missing = [k for k in REQUIRED[name] if k not in op]
+        if name == "crop" and "box" not in op and not {"width", "height"} <= op.keys():
+            missing.append("box or width/height")
+        if name == "pad" and "margin" not in op and not {"width", "height"} <= op.keys():
+            missing.append("margin or width/height")
+        if missing:
+            raise ValueError(f"{where}[{i}] ({name}): missing {', '.join(missing)}")
+        if op.get("anchor", "center") not in ANCHORS:
+            raise ValueError(f"{where}[{i}] ({name}): unknown anchor {op['anchor']!r}")
+    return ops
+
+
+def load_config(path=CONFIG_FILE) -> dict:
+    """{static-relative path: [op, ...]}, validated; cached per process."""
+    path = Path(path)
+    if path not in _config_cache:
+        try:
+            with open(path, encoding="utf-8") as f:
+                config = json.load(f)
+        except FileNotFoundError:
+            config = {}
+        _config_cache[path] = {key: validate(ops, f"{path.name}: {key}") for key, ops in config.items()}
+    return _config_cache[path]
+
+
+def for_source(source, config_path=CONFIG_FILE):
+    """The operations configured for a source file, or None."""
+    try:
+        key = Path(source).resolve().relative_to(STATIC_DIR).as_posix()
+    except ValueError:
+        return None
+    return load_config(config_path).get(key)
+
+
+def _fill(img, background):
+    """(mode, fill colour) for new canvas area; images gain alpha for transparent fills."""
+    has_alpha = img.mode in ("RGBA", "LA") or "transparency" in img.info
+    if background is None:
+        background = "transparent" if has_alpha else "#ffffff"
+    color = (0, 0, 0, 0) if background == "transparent" else ImageColor.getrgb(background)
+    if has_alpha or (len(color) == 4 and color[3] < 255):
+        return "RGBA", color if len(color) == 4 else color + (255,)
+    return "RGB", color[:3]
+
+
+def _offset(outer, inner, anchor) -> tuple:
+    """Top-left position of an inner size within an outer size at the given anchor."""
+    fx, fy = ANCHORS[anchor or "center"]
+    return round((outer[0] - inner[0]) * fx), round((outer[1] - inner[1]) * fy)
+
+
+def _crop_to(img, size, anchor):
+    size = (min(size[0], img.width), min(size[1], img.height))
+    x, y = _offset(img.size, size, anchor)
+    return img.crop((x, y, x + size[0], y + size[1]))
+
+
+def _pad_to(img, size, anchor, background, offset=None):
+    size = (max(size[0], img.width), max(size[1], img.height))
+    if size == img.size:
+        return img
+    mode, color = _fill(img, background)
+    canvas = Image.new(mode, size, color)
+    source = img if img.mode == mode else img.convert(mode)
+    canvas.paste(source, offset or _offset(size, img.size, anchor))
+    return canvas
+
+
+def _ratio_size(size, ratio, grow) -> tuple:
+    """Largest (grow=False) or smallest (grow=True) size with the given ratio around size."""
+    w, h = size
+    rw, rh = ratio
+    if (w * rh > h * rw) != grow:
+        return max(1, round(h * rw / rh)), h
+    return w, max(1, round(w * rh / rw))
+
+
+def apply_op(img, op):
+    name, anchor, background = op["op"], op.get("anchor"), op.get("background")
+    if img.mode == "P":
+        img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+
+    if name == "crop":
+        if "box" in op:
+            return img.crop(tuple(op["box"]))
+        return _crop_to(img, (op["width"], op["height"]), anchor)
+
+    if name == "aspect":
+        grow = op.get("mode", "crop") == "pad"
+        size = _ratio_size(img.size, op["ratio"], grow)
+        return _pad_to(img, size, anchor, background) if grow else _crop_to(img, size, anchor)
+
+    if name == "pad":
+        if "margin" in op:
+            margin = op["margin"]
+            top, right, bottom, left = margin if isinstance(margin, list) else [margin] * 4
+            size = (img.width + left + right, img.height + top + bottom)
+            return _pad_to(img, size, anchor, background, offset=(left, top))
+        return _pad_to(img, (op["width"], op["height"]), anchor, background)
+
+    if name == "fit":
+        box = (op["width"], op["height"])
+        cover = op.get("mode", "contain") == "cover"
+        scale = (max if cover else min)(box[0] / img.width, box[1] / img.height)
+        scaled = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        if scaled != img.size:
+            img = img.resize(scaled, Image.Resampling.LANCZOS)
+        return _crop_to(img, box, anchor) if cover else _pad_to(img, box, anchor, background)
+
+    # rotate: counter-clockwise degrees, like Image.rotate
+    degrees = op["degrees"] % 360
+    if degrees % 90 == 0:
+        method = {90: Image.Transpose.ROTATE_90, 180: Image.Transpose.ROTATE_180,
+                  270: Image.Transpose.ROTATE_270}.get(degrees)
+        return img.transpose(method) if method is not None else img
+    mode, color = _fill(img, background)
+    return img.convert(mode).rotate(degrees, Image.Resampling.BICUBIC, expand=True, fillcolor=color)
+
+
+def apply_transforms(img, ops):
+    """Run every operation in order; the input image is not modified."""
+    for op in ops:
+        img = apply_op(img, op)
+    return img
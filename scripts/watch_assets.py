@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Watch static/img and static/photography and optimize images as they land.
+
+1. Changes are picked up with inotify on Linux (through ctypes, no extra packages),
+   or by polling a stat snapshot every POLL_INTERVAL seconds elsewhere (or with --poll).
+2. Partial writes are debounced: a file is queued once it has been quiet for
+   DEBOUNCE_SECONDS and its size and mtime did not change over that window.
+3. Each batch of ready files goes only through the stages that own them, in the
+   order the batch scripts run:
+   homepage in-place JPG/PNG -> hi-res JPG compression -> WebP + responsive widths
+   -> deep-zoom tiles -> SVG minification -> listing atlases -> exif.json / EXIF shards.
+   The asset, tile and atlas manifests and exif.json are updated in place; the build
+   manifest still skips anything unchanged, so a file that only got touched costs a hash.
+4. Files the watcher itself rewrites (compressed JPGs, in-place PNGs) are recognised by
+   their post-build size and mtime and not queued again.
+
+Deleting a source does nothing: the workflow deletes raw files once they are optimized.
+Run the batch scripts for pruning and the orphan cleanup of the photography series.
+
+Usage: python scripts/watch_assets.py [--poll] [--initial] [-j N]
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+import asset_pipeline as pipeline
+import build_atlas
+import build_tiles
+import compress_hires_images
+import extract_exif
+import optimize_all_assets
+import optimize_artworks
+import optimize_homepage
+import optimize_lossless
+import telemetry
+
+WATCH_DIRS = [
+    pipeline.IMG_DIR,
+    pipeline.PHOTOGRAPHY_DIR,
+]
+# Sources only: WebP/AVIF outputs, manifests and temp files never trigger a build
+WATCH_EXTENSIONS = {".jpg", ".jpeg", ".png", ".svg"}
+# Backups written by optimize_homepage, fingerprinted copies, EXIF shards
+EXCLUDE_DIRS = {"artworks_backup", "hashed", "exif"}
+
+DEBOUNCE_SECONDS = 1.5
+POLL_INTERVAL = 1.0
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_IGNORED = 0x00008000
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct("iIII")
+READ_BUFFER = 64 * 1024
+
+
+def is_watched(path: Path) -> bool:
+    name = path.name
+    return not name.startswith(".") and path.suffix.lower() in WATCH_EXTENSIONS
+
+
+def snapshot(roots) -> dict:
+    """{path: (size, mtime_ns)} for every watched file under roots."""
+    state = {}
+    for root in roots:
+        for path in pipeline.scan_images(root, WATCH_EXTENSIONS, EXCLUDE_DIRS):
+            if is_watched(path):
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue
+                state[path] = (st.st_size, st.st_mtime_ns)
+    return state
+
+
+class PollingWatcher:
+    """Portable fallback: compares stat snapshots."""
+
+    name = "polling"
+
+    def __init__(self, roots):
+        self.roots = roots
+        self.state = snapshot(roots)
+
+    def wait(self, timeout) -> set:
+        time.sleep(min(timeout, POLL_INTERVAL))
+        current = snapshot(self.roots)
+        changed = {p for p, st in current.items() if self.state.get(p) != st}
+        self.state = current
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify: one watch per directory, added for new directories as they appear."""
+
+    name = "inotify"
+
+    def __init__(self, roots):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.roots = roots
+        self.dirs = {}
+        for root in roots:
+            self._watch_tree(Path(root))
+
+    def _watch_tree(self, root: Path) -> set:
+        """Watch root and its subdirectories; returns the files already inside (copied before the watch)."""
+        found = set()
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in EXCLUDE_DIRS]
+            wd = self._add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                raise OSError(err, f"inotify_add_watch {dirpath}: {os.strerror(err)}")
+            self.dirs[wd] = Path(dirpath)
+            found.update(p for p in (Path(dirpath) / f for f in filenames) if is_watched(p))
+        return found
+
+    def wait(self, timeout) -> set:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        try:
+            data = os.read(self.fd, READ_BUFFER)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            raw_name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped: fall back to one full snapshot
+                changed.update(snapshot(self.roots))
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            directory = self.dirs.get(wd)
+            if directory is None or not raw_name:
+                continue
+            path = directory / os.fsdecode(raw_name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and path.name not in EXCLUDE_DIRS:
+                    changed.update(self._watch_tree(path))
+            elif is_watched(path):
+                changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher(roots, poll=False):
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError) as e:
+            print(f"⚠️  inotify unavailable ({e}), polling instead")
+    return PollingWatcher(roots)
+
+
+class Debouncer:
+    """A path is ready once it has been quiet for `delay` seconds with an unchanged stat."""
+
+    def __init__(self, delay=DEBOUNCE_SECONDS):
+        self.delay = delay
+        self.pending = {}  # path -> (last change, (size, mtime_ns))
+
+    def touch(self, paths, now):
+        for path in paths:
+            self.pending[path] = (now, _stat(path))
+
+    def ready(self, now) -> list:
+        done = []
+        for path, (last, state) in list(self.pending.items()):
+            if now - last < self.delay:
+                continue
+            current = _stat(path)
+            if current is None:
+                del self.pending[path]  # removed (or renamed away) before it settled
+            elif current != state:
+                self.pending[path] = (now, current)  # still being written
+            else:
+                del self.pending[path]
+                done.append(path)
+        return done
+
+    def next_timeout(self, now) -> Optional[float]:
+        if not self.pending:
+            return None
+        return max(0.05, min(last + self.delay for last, _ in self.pending.values()) - now)
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+
+@dataclass
+class Step:
+    """One stage of the watch pipeline: the asset classes it runs plus what it updates afterwards."""
+    name: str
+    classes: list = field(default_factory=list)
+    # Paths this step leaves to another one
+    skip: Optional[Callable] = None
+    after: Optional[Callable] = None
+    # Steps without classes (EXIF) decide with this instead
+    matches: Optional[Callable] = None
+    # Only the classes whose batch script passes --target-ssim get it, so settings
+    # hashes (and therefore skips) match the batch scripts
+    uses_ssim: bool = False
+
+    def select(self, paths) -> list:
+        owned = self.matches or (lambda p: any(c.matches(p) for c in self.classes))
+        return [p for p in paths if owned(p) and not (self.skip and self.skip(p))]
+
+    def run(self, paths, force=False, workers=1, target_ssim=None) -> list:
+        """Build paths through the step's classes (run_batch calls after separately)."""
+        if not self.classes:
+            return []
+        overrides = {"target_ssim": target_ssim} if self.uses_ssim else {}
+        return pipeline.run_asset_classes(self.classes, pipeline.BuildManifest(), force=force,
+                                          workers=workers, paths=paths, **overrides)
+
+
+def _after_hires_jpg(paths, results):
+    compress_hires_images.update_size_model(results)
+
+
+def _after_web(paths, results):
+    pipeline.update_asset_manifest(results)
+
+
+def _after_tiles(paths, results):
+    build_tiles.update_tile_manifest(results)
+    if not any(r.get("status") == "failed" for r in results):
+        build_tiles.prune_tiles(results, masters=paths)
+
+
+def _after_atlas(paths, results):
+    build_atlas.main()
+
+
+def _after_exif(paths, results):
+    extract_exif.main()
+
+
+def _is_atlas_source(path) -> bool:
+    """Sources whose WebP lands in a listing atlas (build_atlas.atlas_groups)."""
+    path = Path(path).resolve()
+    roots = [pipeline.PHOTOGRAPHY_DIR.resolve(), (pipeline.IMG_DIR / "artworks").resolve()]
+    return any(root in path.parents for root in roots) and path.suffix.lower() in {".jpg", ".jpeg", ".png"}
+
+
+def _is_photography_jpg(path) -> bool:
+    path = Path(path).resolve()
+    return pipeline.PHOTOGRAPHY_DIR.resolve() in path.parents and path.suffix.lower() in {".jpg", ".jpeg"}
+
+
+STEPS = [
+    Step("homepage", [optimize_homepage.HOMEPAGE_JPGS, optimize_homepage.HOMEPAGE_PNG]),
+    Step("hires_jpg", [compress_hires_images.HIRES_JPGS], after=_after_hires_jpg),
+    # optimize_all_assets also covers static/photography; a hi-res master's WebP comes
+    # from compress_hires_images instead (its 2912x2184 box and quality)
+    Step("webp", [optimize_artworks.ARTWORKS, optimize_all_assets.ASSETS],
+         skip=compress_hires_images.HIRES_WEBPS.matches, after=_after_web, uses_ssim=True),
+    Step("hires_webp", [compress_hires_images.HIRES_WEBPS], after=_after_web, uses_ssim=True),
+    Step("tiles", [build_tiles.MASTERS], after=_after_tiles),
+    Step("svg", [optimize_lossless.SVGS]),
+    # Repacks only the groups whose WebPs changed
+    Step("atlas", matches=_is_atlas_source, after=_after_atlas),
+    Step("exif", matches=_is_photography_jpg, after=_after_exif),
+]
+
+
+def run_batch(paths, force=False, workers=1, target_ssim=None) -> dict:
+    """Push ready files through every step that owns them; returns {step name: results}."""
+    done = {}
+    for step in STEPS:
+        selected = step.select(paths)
+        if not selected:
+            continue
+        print(f"\n▶️  {step.name}: {len(selected)} file(s)")
+        # A crashed step (bad manifest, broken pool, full disk) must not stop the
+        # daemon; the next change to these files retries it. Its after hook is
+        # skipped, as it would read the missing results as "nothing built".
+        try:
+            results = step.run(selected, force, workers, target_ssim)
+        except Exception as e:
+            print(f"   ❌ {step.name} step failed: {type(e).__name__}: {e}")
+            done[step.name] = []
+            continue
+        for r in results:
+            if r.get("status") == "failed":
+                print(f"   ❌ {r['source']}: {r['error']}")
+        if step.after:
+            try:
+                step.after(selected, results)
+            except Exception as e:
+                print(f"   ❌ {step.name} step failed while updating: {type(e).__name__}: {e}")
+        done[step.name] = results
+    return done
+
+
+def watch(force=False, workers=1, target_ssim=None, poll=False, initial=False):
+    roots = [d for d in WATCH_DIRS if d.exists()]
+    watcher = make_watcher(roots, poll)
+    debouncer = Debouncer()
+    # Post-build state of every file the watcher processed: events that leave a file
+    # exactly like this are its own writes (e.g. a JPG compressed in place)
+    settled = {}
+    print(f"👀 Watching {', '.join(pipeline.rel_path(d) for d in roots)} ({watcher.name}); Ctrl+C to stop")
+
+    if initial:
+        debouncer.touch(snapshot(roots), time.monotonic() - DEBOUNCE_SECONDS)
+    try:
+        while True:
+            now = time.monotonic()
+            timeout = debouncer.next_timeout(now)
+            changed = watcher.wait(POLL_INTERVAL if timeout is None else timeout)
+            now = time.monotonic()
+            changed = {p for p in changed if settled.get(p) is None or settled[p] != _stat(p)}
+            debouncer.touch(changed, now)
+            ready = debouncer.ready(now)
+            if not ready:
+                continue
+
+            print(f"\n📥 {len(ready)} new or changed file(s): {', '.join(p.name for p in ready[:5])}"
+                  + (" ..." if len(ready) > 5 else ""))
+            started = time.monotonic()
+            run_batch(sorted(ready), force=force, workers=workers, target_ssim=target_ssim)
+            for path in ready:
+                settled[path] = _stat(path)
+            print(f"✅ Web-ready in {time.monotonic() - started:.1f}s")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    parser = pipeline.add_pipeline_args(argparse.ArgumentParser(description=__doc__))
+    parser.add_argument("--poll", action="store_true", help="Poll instead of using inotify")
+    parser.add_argument("--initial", action="store_true",
+                        help="Queue every existing source once at startup (catches files added while not watching)")
+    args = parser.parse_args()
+    telemetry.configure(args.telemetry, args.profile)
+    watch(force=args.force, workers=args.workers, target_ssim=args.target_ssim, poll=args.poll, initial=args.initial)
+    telemetry.finish()
@@ -0,0 +1,260 @@
+/**
+ * DeepZoom 组件 - 100MP 原图的瓦片式缩放查看器
+ *
+ * 功能：
+ * - 读取 scripts/build_tiles.py 生成的 DZI 金字塔，只加载视口内可见的瓦片
+ * - 按当前缩放比例（含 devicePixelRatio）选择层级，放大到 100% 才请求全分辨率瓦片
+ * - 网页版 WebP 作为底图，瓦片加载前先显示
+ * - 滚轮 / 双击 / 双指缩放，拖动平移，Esc 关闭
+ *
+ * 像素级查看一张 GFX 原图通常只需几百 KB，而不是下载 22MB 的 JPG。
+ */
+
+import React, { useCallback, useEffect, useRef, useState } from 'react';
+import { levelSize, tileUrl, type TileSource } from '../../data/tileManifest';
+import styles from './styles.module.css';
+
+export interface DeepZoomProps {
+    /** 瓦片金字塔（getTileSource 的返回值） */
+    source: TileSource;
+    /** 已加载的网页版图片，作为瓦片加载前的底图 */
+    previewSrc?: string;
+    /** 图片描述 */
+    alt: string;
+    /** 关闭查看器 */
+    onClose: () => void;
+}
+
+interface View {
+    /** 屏幕像素 / 原图像素 */
+    scale: number;
+    /** 原图左上角在视口中的位置 */
+    x: number;
+    y: number;
+}
+
+/** 最大放大到原图 200% */
+const MAX_SCALE = 2;
+const WHEEL_ZOOM_SPEED = 0.002;
+const BUTTON_ZOOM_STEP = 2;
+
+export default function DeepZoom({ source, previewSrc, alt, onClose }: DeepZoomProps) {
+    const viewportRef = useRef<HTMLDivElement>(null);
+    const [viewport, setViewport] = useState({ width: 0, height: 0 });
+    const [view, setView] = useState<View | null>(null);
+    const pointers = useRef(new Map<number, { x: number; y: number }>());
+
+    const fitScale = viewport.width
+        ? Math.min(viewport.width / source.width, viewport.height / source.height)
+        : 0;
+
+    // 平移范围：图片小于视口时居中，否则边缘不离开视口
+    const clampView = useCallback(
+        (next: View): View => {
+            const scale = Math.min(Math.max(next.scale, fitScale), MAX_SCALE);
+            const clampAxis = (pos: number, imageSize: number, viewSize: number) => {
+                const size = imageSize * scale;
+                if (size <= viewSize) return (viewSize - size) / 2;
+                return Math.min(0, Math.max(viewSize - size, pos));
+            };
+            return {
+                scale,
+                x: clampAxis(next.x, source.width, viewport.width),
+                y: clampAxis(next.y, source.height, viewport.height),
+            };
+        },
+        [fitScale, source.width, source.height, viewport.width, viewport.height]
+    );
+
+    // 以视口内一点为中心缩放
+    const zoomAt = useCallback(
+        (factor: number, px: number, py: number) => {
+            setView((current) => {
+                if (!current) return current;
+                const scale = Math.min(Math.max(current.scale * factor, fitScale), MAX_SCALE);
+                const ratio = scale / current.scale;
+                return clampView({ scale, x: px - (px - current.x) * ratio, y: py - (py - current.y) * ratio });
+            });
+        },
+        [clampView, fitScale]
+    );
+
+    // 视口尺寸；尺寸变化后重新适配
+    useEffect(() => {
+        const element = viewportRef.current;
+        if (!element) return;
+        const observer = new ResizeObserver(([entry]) => {
+            const { width, height } = entry.contentRect;
+            setViewport({ width, height });
+        });
+        observer.observe(element);
+        return () => observer.disconnect();
+    }, []);
+
+    useEffect(() => {
+        if (!fitScale) return;
+        setView((current) => clampView(current ?? { scale: fitScale, x: 0, y: 0 }));
+    }, [fitScale, clampView]);
+
+    // 滚轮缩放需要非 passive 监听才能阻止页面滚动
+    useEffect(() => {
+        const element = viewportRef.current;
+        if (!element) return;
+        const onWheel = (event: WheelEvent) => {
+            event.preventDefault();
+            const rect = element.getBoundingClientRect();
+            zoomAt(Math.exp(-event.deltaY * WHEEL_ZOOM_SPEED), event.clientX - rect.left, event.clientY - rect.top);
+        };
+        element.addEventListener('wheel', onWheel, { passive: false });
+        return () => element.removeEventListener('wheel', onWheel);
+    }, [zoomAt]);
+
+    useEffect(() => {
+        const onKey = (event: KeyboardEvent) => {
+            if (event.key === 'Escape') onClose();
+            if (event.key === '+' || event.key === '=') zoomAt(BUTTON_ZOOM_STEP, viewport.width / 2, viewport.height / 2);
+            if (event.key === '-') zoomAt(1 / BUTTON_ZOOM_STEP, viewport.width / 2, viewport.height / 2);
+        };
+        document.body.style.overflow = 'hidden';
+        window.addEventListener('keydown', onKey);
+        return () => {
+            document.body.style.overflow = 'unset';
+            window.removeEventListener('keydown', onKey);
+        };
+    }, [onClose, zoomAt, viewport.width, viewport.height]);
+
+    // 拖动平移；两指时按指间距离缩放
+    const onPointerDown = (event: React.PointerEvent) => {
+        event.currentTarget.setPointerCapture(event.pointerId);
+        pointers.current.set(event.pointerId, { x: event.clientX, y: event.clientY });
+    };
+
+    const onPointerMove = (event: React.PointerEvent) => {
+        const previous = pointers.current.get(event.pointerId);
+        if (!previous) return;
+        const others = [...pointers.current.entries()].filter(([id]) => id !== event.pointerId);
+        pointers.current.set(event.pointerId, { x: event.clientX, y: event.clientY });
+        if (others.length === 1) {
+            const [, other] = others[0];
+            const rect = event.currentTarget.getBoundingClientRect();
+            const before = Math.hypot(previous.x - other.x, previous.y - other.y);
+            const after = Math.hypot(event.clientX - other.x, event.clientY - other.y);
+            if (before > 0) {
+                zoomAt(after / before, (event.clientX + other.x) / 2 - rect.left, (event.clientY + other.y) / 2 - rect.top);
+            }
+            return;
+        }
+        const dx = event.clientX - previous.x;
+        const dy = event.clientY - previous.y;
+        setView((current) => current && clampView({ ...current, x: current.x + dx, y: current.y + dy }));
+    };
+
+    const onPointerUp = (event: React.PointerEvent) => {
+        pointers.current.delete(event.pointerId);
+    };
+
+    const onDoubleClick = (event: React.MouseEvent) => {
+        const rect = event.currentTarget.getBoundingClientRect();
+        zoomAt(BUTTON_ZOOM_STEP, event.clientX - rect.left, event.clientY - rect.top);
+    };
+
+    const tiles = view ? visibleTiles(source, view, viewport) : [];
+
+    return (
+        <div className={styles.overlay} role="dialog" aria-label={alt}>
+            <div
+                ref={viewportRef}
+                className={styles.viewport}
+                onPointerDown={onPointerDown}
+                onPointerMove={onPointerMove}
+                onPointerUp={onPointerUp}
+                onPointerCancel={onPointerUp}
+                onDoubleClick={onDoubleClick}
+            >
+                {view && previewSrc && (
+                    <img
+                        src={previewSrc}
+                        alt={alt}
+                        className={styles.layer}
+                        draggable={false}
+                        style={{
+                            left: view.x,
+                            top: view.y,
+                            width: source.width * view.scale,
+                            height: source.height * view.scale,
+                        }}
+                    />
+                )}
+                {tiles.map((tile) => (
+                    <img
+                        key={tile.key}
+                        src={tile.src}
+                        alt=""
+                        className={styles.layer}
+                        draggable={false}
+                        style={{ left: tile.left, top: tile.top, width: tile.width, height: tile.height }}
+                    />
+                ))}
+            </div>
+
+            {/* 工具栏 */}
+            <div className={styles.toolbar}>
+                <button onClick={() => zoomAt(1 / BUTTON_ZOOM_STEP, viewport.width / 2, viewport.height / 2)} title="缩小">−</button>
+                <span className={styles.zoomLevel}>{view ? Math.round(view.scale * 100) : 0}%</span>
+                <button onClick={() => zoomAt(BUTTON_ZOOM_STEP, viewport.width / 2, viewport.height / 2)} title="放大">+</button>
+                <button onClick={() => view && zoomAt(1 / view.scale, viewport.width / 2, viewport.height / 2)} title="100% 原始像素">1:1</button>
+                <button onClick={() => setView(clampView({ scale: fitScale, x: 0, y: 0 }))} title="适应窗口">⤢</button>
+                <button onClick={onClose} title="关闭 (Esc)">✕</button>
+            </div>
+        </div>
+    );
+}
+
+interface PlacedTile {
+    key: string;
+    src: string;
+    left: number;
+    top: number;
+    width: number;
+    height: number;
+}
+
+/**
+ * 当前视图需要的瓦片：
+ * 选择分辨率不低于屏幕像素（考虑 devicePixelRatio）的最小层级，只返回与视口相交的瓦片。
+ * 瓦片边缘取整到整屏幕像素，相邻瓦片之间不会出现缝隙（金字塔 overlap 为 0）。
+ */
+function visibleTiles(source: TileSource, view: View, viewport: { width: number; height: number }): PlacedTile[] {
+    const dpr = typeof window === 'undefined' ? 1 : window.devicePixelRatio || 1;
+    const wanted = source.maxLevel + Math.ceil(Math.log2(view.scale * dpr));
+    const level = Math.min(source.maxLevel, Math.max(source.minLevel, wanted));
+    const factor = Math.pow(2, source.maxLevel - level); // 原图像素 / 层级像素
+    const { width: levelWidth, height: levelHeight } = levelSize(source, level);
+    const span = source.tileSize;
+
+    // 视口范围（层级像素）
+    const x0 = Math.max(0, -view.x / view.scale / factor);
+    const y0 = Math.max(0, -view.y / view.scale / factor);
+    const x1 = Math.min(levelWidth, (viewport.width - view.x) / view.scale / factor);
+    const y1 = Math.min(levelHeight, (viewport.height - view.y) / view.scale / factor);
+    if (x1 <= x0 || y1 <= y0) return [];
+
+    const toScreenX = (levelX: number) => Math.round(view.x + Math.min(levelX * factor, source.width) * view.scale);
+    const toScreenY = (levelY: number) => Math.round(view.y + Math.min(levelY * factor, source.height) * view.scale);
+    const placed: PlacedTile[] = [];
+    for (let row = Math.floor(y0 / span); row * span < y1; row++) {
+        for (let col = Math.floor(x0 / span); col * span < x1; col++) {
+            const left = toScreenX(col * span);
+            const top = toScreenY(row * span);
+            placed.push({
+                key: `${level}/${col}_${row}`,
+                src: tileUrl(source, level, col, row),
+                left,
+                top,
+                width: toScreenX(Math.min((col + 1) * span, levelWidth)) - left,
+                height: toScreenY(Math.min((row + 1) * span, levelHeight)) - top,
+            });
+        }
+    }
+    return placed;
+}
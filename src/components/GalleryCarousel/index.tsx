@@ -1,5 +1,8 @@
 import type { ReactNode } from 'react';
 import { useState, useEffect } from 'react';
+import { usePlaceholderStyle } from '../../hooks/useBlurhash';
+import { assetUrl } from '../../data/assetManifest';
+import { usePrefetchNext } from '../../hooks/usePrefetch';
 import styles from './styles.module.css';
 
 export interface ArtworkItem {
@@ -24,7 +27,10 @@ export interface GalleryCarouselProps {
 }
 
 // Reusable Frame Component
-const FramedImage = ({ src, alt, onError, isLoading = false }) => (
+const FramedImage = ({ src, alt, onError, isLoading = false }) => {
+  // 构建时生成的 BlurHash 作为加载前的模糊背景
+  const placeholderStyle = usePlaceholderStyle(src);
+  return (
   <div className="w-full h-full bg-[#111] p-[3%] flex ring-1 ring-white/10 ring-inset shadow-md">
     <div className="w-full h-full bg-[#fdfbf7] p-[10%] shadow-[inset_0_1px_4px_rgba(0,0,0,0.4)] flex flex-col relative overflow-hidden">
       <div className="relative w-full h-full shadow-[inset_0_2px_6px_rgba(0,0,0,0.2)] bg-gray-200">
@@ -33,11 +39,12 @@ const FramedImage = ({ src, alt, onError, isLoading = false }) => (
         ) : (
           <>
             <img
-              src={src}
+              src={assetUrl(src)}
               alt={alt}
               className="w-full h-full object-cover block"
               onError={onError}
               loading="lazy"
+              style={placeholderStyle}
             />
             <div className="absolute inset-0 shadow-[inset_0_0_30px_rgba(0,0,0,0.15)] pointer-events-none" />
           </>
@@ -45,7 +52,8 @@ const FramedImage = ({ src, alt, onError, isLoading = false }) => (
       </div>
     </div>
   </div>
-);
+  );
+};
 
 export default function GalleryCarousel(props: GalleryCarouselProps): ReactNode {
   const { artworks } = props;
@@ -68,6 +76,10 @@ export default function GalleryCarousel(props: GalleryCarouselProps): ReactNode
     }
   };
 
+  // Warm the next artworks (original + fan art) while this one is shown; the carousel does not wrap
+  const shownArtwork = artworks?.[currentIndex];
+  usePrefetchNext('artworks', shownArtwork && [shownArtwork.imagePath, shownArtwork.originalImagePath], false);
+
   // Handle empty artworks array
   if (!artworks || artworks.length === 0) {
     return (
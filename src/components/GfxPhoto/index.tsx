@@ -2,15 +2,20 @@
  * GfxPhoto 组件 - 专为 Fujifilm GFX100S 摄影作品设计的展示组件
  * 
  * 功能：
- * - 展示优化后的图片（网页版本）
+ * - 展示优化后的图片（网页版本），按 asset-manifest 自动生成 srcset
  * - 异步提取并展示原图的 EXIF 数据
+ * - 有瓦片金字塔时，点击 100MP 按钮打开 DeepZoom，按需加载可见瓦片
  * - 显示相机、镜头、拍摄参数
  * - 可选显示设备序列号（用于版权鉴证）
  */
 
-import React from 'react';
+import React, { useState } from 'react';
 import clsx from 'clsx';
+import DeepZoom from '../DeepZoom';
 import { useExif, formatExifSettings, type ExifData } from '../../hooks/useExif';
+import { assetUrl, getAsset, getSrcSet, getAvifSrcSet, DEFAULT_SIZES } from '../../data/assetManifest';
+import { getTileSource } from '../../data/tileManifest';
+import { usePlaceholderStyle } from '../../hooks/useBlurhash';
 import styles from './styles.module.css';
 
 export interface GfxPhotoProps {
@@ -28,9 +33,11 @@ export interface GfxPhotoProps {
     showSerial?: boolean;
     /** 是否显示 EXIF 信息 */
     showExif?: boolean;
+    /** srcset 对应的 sizes 属性 */
+    sizes?: string;
     /** 自定义类名 */
     className?: string;
-    /** 点击查看原图的回调 */
+    /** 点击查看原图的回调（没有瓦片金字塔时使用） */
     onViewOriginal?: () => void;
 }
 
@@ -42,30 +49,52 @@ export default function GfxPhoto({
     description,
     showSerial = false,
     showExif = true,
+    sizes = DEFAULT_SIZES,
     className,
     onViewOriginal,
 }: GfxPhotoProps) {
-    const { exif, loading: exifLoading } = useExif(originalSrc, { enabled: showExif });
+    // 序列号仅在完整 exif.json 中，其余情况只加载当前系列的精简分片
+    const { exif, loading: exifLoading } = useExif(originalSrc, { enabled: showExif, full: showSerial });
 
-    // 使用网页优化版显示，如果没有则使用原图
-    const displaySrc = webSrc || originalSrc;
+    // 使用网页优化版显示（有指纹版本时用哈希路径），如果没有则使用原图
+    const displaySrc = assetUrl(webSrc) || originalSrc;
+    // 响应式宽度变体：手机只下载 480/800px 版本
+    const asset = getAsset(webSrc);
+    const srcSet = getSrcSet(webSrc);
+    // 同等画质下更小的 AVIF，不支持的浏览器回退到 WebP
+    const avifSrcSet = getAvifSrcSet(webSrc);
+    // 原图加载前显示 BlurHash 模糊预览
+    const placeholderStyle = usePlaceholderStyle(webSrc);
+    // 深度缩放瓦片：像素级查看只下载视口内的瓦片，而不是整张 22MB 原图
+    const tileSource = getTileSource(originalSrc);
+    const [zooming, setZooming] = useState(false);
 
     return (
         <div className={clsx(styles.gfxPhotoWrapper, className)}>
             {/* 图片容器 */}
             <div className={styles.imageContainer}>
-                <img
-                    src={displaySrc}
-                    alt={alt}
-                    className={styles.photo}
-                    loading="lazy"
-                />
+                <picture>
+                    {avifSrcSet && (
+                        <source type="image/avif" srcSet={avifSrcSet} sizes={sizes} />
+                    )}
+                    <img
+                        src={displaySrc}
+                        srcSet={srcSet}
+                        sizes={srcSet ? sizes : undefined}
+                        width={asset?.width}
+                        height={asset?.height}
+                        alt={alt}
+                        className={styles.photo}
+                        style={placeholderStyle}
+                        loading="lazy"
+                    />
+                </picture>
 
                 {/* 查看原图按钮 */}
-                {onViewOriginal && (
+                {(tileSource || onViewOriginal) && (
                     <button
                         className={styles.viewOriginalBtn}
-                        onClick={onViewOriginal}
+                        onClick={tileSource ? () => setZooming(true) : onViewOriginal}
                         title="查看 100% 原图"
                     >
                         🔍 100MP
@@ -73,6 +102,15 @@ export default function GfxPhoto({
                 )}
             </div>
 
+            {zooming && tileSource && (
+                <DeepZoom
+                    source={tileSource}
+                    previewSrc={displaySrc}
+                    alt={alt}
+                    onClose={() => setZooming(false)}
+                />
+            )}
+
             {/* 信息区域 */}
             <div className={styles.infoSection}>
                 {/* 标题和描述 */}
@@ -110,6 +148,11 @@ export default function GfxPhoto({
                                             @ {exif.focalLength}
                                         </span>
                                     )}
+                                    {exif.filmSimulation && (
+                                        <span className={styles.filmSimulation}>
+                                            🎞 {exif.filmSimulation}
+                                        </span>
+                                    )}
                                 </div>
 
                                 {/* 时间 */}
@@ -131,7 +174,7 @@ export default function GfxPhoto({
                                 )}
 
                                 {/* 版权信息 */}
-                                {exif.copyright && (
+                                {(exif.artist || exif.copyright) && (
                                     <div className={styles.copyright}>
                                         © {exif.artist || exif.copyright}
                                     </div>
@@ -5,6 +5,9 @@ import clsx from 'clsx';
 import { useHistory } from '@docusaurus/router';
 import useBaseUrl from '@docusaurus/useBaseUrl';
 import { artworks } from '../../data/galleryData'; // Import shared data
+import { usePlaceholderStyle } from '../../hooks/useBlurhash';
+import { assetUrl } from '../../data/assetManifest';
+import SpriteImage from '../SpriteImage';
 
 interface MagicGalleryProps {
     className?: string; // e.g., h-[80vh]
@@ -88,7 +91,11 @@ export default function MagicGallery({ className }: MagicGalleryProps) {
     // CSS Paddings (relative to container width):
     // Frame: 1/40 = 2.5%
     // Mat: 4/40 = 10%
-    const GalleryFrame = ({ src, label, width, height, color = "bg-[#1a1a1a]" }: { src: string, label: string, width?: number, height?: number, color?: string }) => (
+    // assetPath: un-prefixed path; looks up the artworks atlas sprite (build_atlas.py crops it to
+    // the 30:35 art area) and the BlurHash placeholder, and is the fallback <img> otherwise
+    const GalleryFrame = ({ assetPath, label, width, height, color = "bg-[#1a1a1a]" }: { assetPath: string, label: string, width?: number, height?: number, color?: string }) => {
+        const placeholderStyle = usePlaceholderStyle(assetPath);
+        return (
         <div className={clsx(
             "relative w-full aspect-[40/45] flex items-center justify-center transition-transform duration-300 hover:scale-[1.01] shadow-2xl",
             color,
@@ -109,17 +116,20 @@ export default function MagicGallery({ className }: MagicGalleryProps) {
 
                 {/* The Art */}
                 <div className="relative z-10 w-full h-full flex items-center justify-center bg-white overflow-hidden">
-                    <img
-                        src={src}
+                    <SpriteImage
+                        group="artworks"
+                        src={assetPath}
                         alt="Artwork"
                         width={width}
                         height={height}
                         className="w-full h-full object-cover" // Crop to fit 30:35 ratio
+                        style={placeholderStyle}
                     />
                 </div>
             </div>
         </div>
-    );
+        );
+    };
 
     const cardVariants = {
         enter: (dir: number) => ({
@@ -172,7 +182,7 @@ export default function MagicGallery({ className }: MagicGalleryProps) {
             return (
                 <div className="w-[90vw] flex items-center justify-center">
                     <GalleryFrame
-                        src={useBaseUrl(artwork.imagePath)}
+                        assetPath={artwork.imagePath}
                         label="东方Project同人"
                         width={artwork.imageWidth}
                         height={artwork.imageHeight}
@@ -186,7 +196,7 @@ export default function MagicGallery({ className }: MagicGalleryProps) {
             <div className="w-[50vw] flex items-center justify-between gap-4 md:gap-8 px-4 md:px-0">
                 <div className="flex-1">
                     <GalleryFrame
-                        src={useBaseUrl(artwork.originalImagePath)}
+                        assetPath={artwork.originalImagePath}
                         label="原作名画"
                         width={artwork.originalImageWidth}
                         height={artwork.originalImageHeight}
@@ -194,7 +204,7 @@ export default function MagicGallery({ className }: MagicGalleryProps) {
                 </div>
                 <div className="flex-1">
                     <GalleryFrame
-                        src={useBaseUrl(artwork.imagePath)}
+                        assetPath={artwork.imagePath}
                         label="东方Project同人"
                         width={artwork.imageWidth}
                         height={artwork.imageHeight}
@@ -277,7 +287,7 @@ export default function MagicGallery({ className }: MagicGalleryProps) {
             <div className="absolute inset-0 z-40 pointer-events-none flex items-end justify-center overflow-hidden">
                 <img
                     ref={imageRef}
-                    src={useBaseUrl("/img/yukari.webp")}
+                    src={useBaseUrl(assetUrl("/img/yukari.webp"))}
                     alt="Yukari Yakumo"
                     crossOrigin="anonymous"
                     className={clsx(
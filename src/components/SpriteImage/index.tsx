@@ -0,0 +1,73 @@
+/**
+ * SpriteImage 组件 - 列表页卡片缩略图
+ *
+ * 有图集（scripts/build_atlas.py）时以背景图显示图集中的对应位置，同一页的卡片共用一张图集；
+ * 没有图集时退回普通 <img>（带指纹的 URL）。
+ * 元素需要由 style / className 给出与缩略图一致的宽高比，否则背景会被拉伸。
+ * 图集是 CSS 背景图，随页面立即加载：loading="lazy" 只对退回的 <img> 生效。
+ */
+
+import React, { type CSSProperties } from 'react';
+import useBaseUrl from '@docusaurus/useBaseUrl';
+import { assetUrl } from '../../data/assetManifest';
+import { getSprite, spriteStyle } from '../../data/atlasManifest';
+
+export interface SpriteImageProps {
+    /** 图集分组，如 "Skitting" / "phantasm" / "artworks" */
+    group: string;
+    /** 图片稳定路径，如 "/photography/Skitting/DSCF0192.webp" */
+    src: string;
+    alt: string;
+    className?: string;
+    style?: CSSProperties;
+    /** 以下三项仅用于退回的 <img> */
+    width?: number;
+    height?: number;
+    loading?: 'lazy' | 'eager';
+    onMouseEnter?: React.MouseEventHandler<HTMLElement>;
+    onMouseLeave?: React.MouseEventHandler<HTMLElement>;
+}
+
+export default function SpriteImage({
+    group,
+    src,
+    alt,
+    className,
+    style,
+    width,
+    height,
+    loading,
+    onMouseEnter,
+    onMouseLeave,
+}: SpriteImageProps) {
+    const found = getSprite(group, src);
+    const sheetUrl = useBaseUrl(found?.sheet.src ?? '');
+    const imageUrl = useBaseUrl(assetUrl(src));
+
+    if (!found) {
+        return (
+            <img
+                src={imageUrl}
+                alt={alt}
+                className={className}
+                style={style}
+                width={width}
+                height={height}
+                loading={loading}
+                onMouseEnter={onMouseEnter}
+                onMouseLeave={onMouseLeave}
+            />
+        );
+    }
+
+    return (
+        <div
+            role="img"
+            aria-label={alt}
+            className={className}
+            style={{ ...style, ...spriteStyle(found.sprite, found.sheet, sheetUrl) }}
+            onMouseEnter={onMouseEnter}
+            onMouseLeave={onMouseLeave}
+        />
+    );
+}
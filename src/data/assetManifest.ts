@@ -0,0 +1,118 @@
+/**
+ * assetManifest.ts - 图片资源清单（由 scripts/asset_pipeline.py 生成）
+ *
+ * asset-manifest.json 记录每张优化后 WebP 的尺寸、字节数以及响应式宽度变体
+ * (e.g. DSCF0192-480w.webp)，以及更小的 AVIF 版本，
+ * 供 galleryData / photoData / GfxPhoto 构建 srcset 和 <picture>。
+ * 请勿手动编辑 JSON，重新运行优化脚本即可更新。
+ *
+ * asset-paths.json 由 scripts/fingerprint_assets.py 在部署前生成：
+ * 稳定路径 -> 带内容哈希的路径 (e.g. "/hashed/img/yukari.3fa9c1.webp")，
+ * 哈希文件由 _headers 设为 immutable 长缓存。未生成时为空对象，assetUrl 原样返回。
+ */
+
+import manifest from './asset-manifest.json';
+import hashedPaths from './asset-paths.json';
+
+export interface AvifSibling {
+    /** 同宽度 AVIF 路径；仅在同等画质下比 WebP 更小时生成 */
+    src: string;
+    bytes: number;
+    quality: number;
+}
+
+export interface AssetVariant {
+    /** 站点路径 (e.g. "/photography/Skitting/DSCF0192-480w.webp") */
+    src: string;
+    width: number;
+    height: number;
+    /** 文件字节数 */
+    bytes: number;
+    /** 可选 AVIF 版本，用于 <picture> 的 <source type="image/avif"> */
+    avif?: AvifSibling;
+}
+
+export interface AssetEntry {
+    /** 主图路径（最大宽度） */
+    src: string;
+    width: number;
+    height: number;
+    bytes: number;
+    /** 按宽度升序排列的全部变体（包含主图） */
+    variants: AssetVariant[];
+    /** 主图的 AVIF 版本 */
+    avif?: AvifSibling;
+    /** 构建时生成的 BlurHash 占位符（由 hooks/useBlurhash 解码） */
+    blurhash?: string;
+}
+
+const assets = manifest as Record<string, AssetEntry>;
+const fingerprinted = hashedPaths as Record<string, string>;
+const logicalPaths = new Map(Object.entries(fingerprinted).map(([stable, hashed]) => [hashed, stable]));
+
+/**
+ * 稳定路径 -> 实际请求的 URL（有指纹版本时返回哈希路径）
+ * @param src 稳定路径，如 "/img/yukari.webp"
+ */
+export function assetUrl(src: string): string;
+export function assetUrl(src: string | undefined): string | undefined;
+export function assetUrl(src: string | undefined): string | undefined {
+    if (!src) return src;
+    return fingerprinted[src] ?? src;
+}
+
+/**
+ * 哈希路径 -> 稳定路径（用于 EXIF / 清单查询的 key），其它路径原样返回
+ */
+export function logicalPath(url: string): string {
+    return logicalPaths.get(url) ?? url;
+}
+
+/**
+ * 默认 sizes：画廊/摄影图最多占满视口宽度
+ */
+export const DEFAULT_SIZES = '(max-width: 996px) 100vw, 80vw';
+
+/**
+ * 查询某个资源的清单条目
+ * @param src 主图路径，如 "/img/yukari.webp"
+ */
+export function getAsset(src: string | undefined): AssetEntry | undefined {
+    if (!src) return undefined;
+    return assets[src];
+}
+
+/**
+ * 构建 srcset 字符串；未在清单中或只有单一宽度时返回 undefined，
+ * 此时浏览器直接使用 src。
+ *
+ * @param src 主图路径
+ * @param resolveUrl 路径转换（如 useBaseUrl），默认原样输出
+ */
+export function getSrcSet(
+    src: string | undefined,
+    resolveUrl: (path: string) => string = (path) => path
+): string | undefined {
+    const asset = getAsset(src);
+    if (!asset || asset.variants.length < 2) return undefined;
+    return asset.variants
+        .map((variant) => `${resolveUrl(assetUrl(variant.src))} ${variant.width}w`)
+        .join(', ');
+}
+
+/**
+ * 构建 AVIF srcset（用于 <source type="image/avif">）；
+ * 只包含生成了 AVIF 的宽度，没有任何 AVIF 时返回 undefined。
+ */
+export function getAvifSrcSet(
+    src: string | undefined,
+    resolveUrl: (path: string) => string = (path) => path
+): string | undefined {
+    const asset = getAsset(src);
+    if (!asset) return undefined;
+    const avifVariants = asset.variants.filter((variant) => variant.avif);
+    if (avifVariants.length === 0) return undefined;
+    return avifVariants
+        .map((variant) => `${resolveUrl(assetUrl(variant.avif!.src))} ${variant.width}w`)
+        .join(', ');
+}
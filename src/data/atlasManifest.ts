@@ -0,0 +1,70 @@
+/**
+ * atlasManifest.ts - 缩略图图集清单（由 scripts/build_atlas.py 生成）
+ *
+ * atlas-manifest.json 按列表页分组（"phantasm" 系列封面、各摄影系列、"artworks"），
+ * 记录每张图在图集 WebP 中的位置与尺寸，
+ * 列表页只请求一两张图集，而不是每张卡片一张全尺寸 WebP。
+ * 图集文件名带内容哈希，可长期缓存。请勿手动编辑 JSON，重新运行脚本即可更新。
+ */
+
+import type { CSSProperties } from 'react';
+import manifest from './atlas-manifest.json';
+
+export interface AtlasSheet {
+    /** 图集路径 (e.g. "/atlas/Skitting.3fa9c1.webp") */
+    src: string;
+    width: number;
+    height: number;
+    bytes: number;
+}
+
+export interface AtlasSprite {
+    /** 所在图集（sheets 下标） */
+    sheet: number;
+    /** 缩略图在图集中的像素矩形（不含四周的边缘填充） */
+    x: number;
+    y: number;
+    width: number;
+    height: number;
+}
+
+export interface AtlasGroup {
+    /** 源图与参数的哈希，脚本据此跳过未变化的分组 */
+    key: string;
+    sheets: AtlasSheet[];
+    /** 图片路径 -> 位置，如 "/photography/Skitting/DSCF0192.webp" */
+    sprites: Record<string, AtlasSprite>;
+}
+
+const groups = manifest as Record<string, AtlasGroup>;
+
+/**
+ * 查询图片在某个分组图集中的位置；未生成时返回 undefined
+ * @param group 分组名，如 "Skitting"
+ * @param src 图片路径，如 "/photography/Skitting/DSCF0192.webp"
+ */
+export function getSprite(
+    group: string,
+    src: string | undefined
+): { sprite: AtlasSprite; sheet: AtlasSheet } | undefined {
+    const entry = groups[group];
+    const sprite = src ? entry?.sprites[src] : undefined;
+    if (!sprite) return undefined;
+    return { sprite, sheet: entry.sheets[sprite.sheet] };
+}
+
+/**
+ * 以背景图显示图集中的一块：尺寸与位置都用百分比，元素按缩略图宽高比缩放即可，
+ * 不需要知道元素的像素尺寸。
+ * @param sheetUrl 图集 URL（已经过 useBaseUrl）
+ */
+export function spriteStyle(sprite: AtlasSprite, sheet: AtlasSheet, sheetUrl: string): CSSProperties {
+    // 图集与缩略图同宽/同高时任意位置都等价
+    const percent = (offset: number, free: number) => (free > 0 ? `${(offset / free) * 100}%` : '0%');
+    return {
+        backgroundImage: `url("${sheetUrl}")`,
+        backgroundRepeat: 'no-repeat',
+        backgroundSize: `${(sheet.width / sprite.width) * 100}% ${(sheet.height / sprite.height) * 100}%`,
+        backgroundPosition: `${percent(sprite.x, sheet.width - sprite.width)} ${percent(sprite.y, sheet.height - sprite.height)}`,
+    };
+}
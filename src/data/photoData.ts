@@ -17,7 +17,7 @@ export interface PhotoItem {
     /** 原图路径（保留完整 EXIF，用于元数据提取） */
     originalPath: string;
 
-    /** 网页优化版路径（用于快速加载显示） */
+    /** 网页优化版路径（用于快速加载显示；srcset 由 assetManifest.getSrcSet(webPath) 生成） */
     webPath?: string;
 
     /** 缩略图路径 */
@@ -0,0 +1,66 @@
+/**
+ * precacheManifest.ts - 照片预取清单（由 scripts/build_precache.py 生成）
+ *
+ * precache-manifest.json 按系列（各摄影系列与 "artworks"）记录照片的浏览顺序
+ * （与页面中的 photos / artworks 数组一致）、实际请求的 URL（有指纹时为哈希路径）与字节数，
+ * 供 usePrefetchNext 在预算内预取接下来的几张；serviceWorker 字段存在时注册 /sw.js 缓存这些照片。
+ * 请勿手动编辑 JSON，重新运行脚本即可更新。
+ */
+
+import manifest from './precache-manifest.json';
+
+export interface PrecacheEntry {
+    /** 稳定路径 (e.g. "/photography/Skitting/DSCF0192.webp") */
+    src: string;
+    /** 实际请求的 URL (e.g. "/hashed/photography/Skitting/DSCF0192.3fa9c1.webp") */
+    url: string;
+    bytes: number;
+    /** 内容哈希 */
+    hash: string;
+}
+
+export interface PrecacheManifest {
+    /** 清单版本，service worker 缓存以此命名 */
+    version?: string;
+    /** 每次最多预取的张数与字节预算 */
+    prefetch?: { count: number; budgetBytes: number };
+    /** 系列名 -> 按浏览顺序排列的照片 */
+    series?: Record<string, PrecacheEntry[]>;
+    /** 生成了 service worker 时为其路径 */
+    serviceWorker?: string;
+}
+
+const data = manifest as PrecacheManifest;
+
+/** 已生成的 service worker 路径；未生成时为 undefined */
+export const SERVICE_WORKER_URL = data.serviceWorker;
+
+/**
+ * 当前照片之后、在张数与字节预算内的照片
+ * @param series 系列名，如 "Skitting" / "artworks"
+ * @param current 正在显示的照片（可以是多张，如原作与同人并排），从其中最靠后的一张往后数
+ * @param wrap 到末尾后是否从头继续（循环浏览的画廊为 true）
+ */
+export function prefetchCandidates(
+    series: string,
+    current: string | string[] | undefined,
+    wrap = true
+): PrecacheEntry[] {
+    const entries = data.series?.[series];
+    if (!entries || !current || !data.prefetch) return [];
+    const shown = Array.isArray(current) ? current : [current];
+    const start = Math.max(...shown.map((src) => entries.findIndex((entry) => entry.src === src)));
+    if (start < 0) return [];
+
+    const picked: PrecacheEntry[] = [];
+    let bytes = 0;
+    for (let step = 1; step < entries.length && picked.length < data.prefetch.count; step++) {
+        if (!wrap && start + step >= entries.length) break;
+        const entry = entries[(start + step) % entries.length];
+        if (shown.includes(entry.src)) continue;
+        if (bytes + entry.bytes > data.prefetch.budgetBytes) break;
+        bytes += entry.bytes;
+        picked.push(entry);
+    }
+    return picked;
+}
@@ -0,0 +1,51 @@
+/**
+ * tileManifest.ts - 深度缩放瓦片清单（由 scripts/build_tiles.py 生成）
+ *
+ * tile-manifest.json 以原图路径（GfxPhoto 的 originalSrc）为 key，
+ * 记录 DZI 金字塔的尺寸、瓦片大小与层级范围，
+ * 供 DeepZoom 只加载视口内可见的 512px WebP 瓦片。
+ * 瓦片目录名带内容哈希，可长期缓存。请勿手动编辑 JSON，重新运行脚本即可更新。
+ */
+
+import manifest from './tile-manifest.json';
+
+export interface TileSource {
+    /** DZI 描述文件 (e.g. "/tiles/Skitting/DSCF0192.3fa9c1.dzi") */
+    dzi: string;
+    /** 瓦片目录，瓦片为 `${tiles}/${level}/${col}_${row}.${format}` */
+    tiles: string;
+    /** 全分辨率尺寸 */
+    width: number;
+    height: number;
+    tileSize: number;
+    overlap: number;
+    format: string;
+    /** 最小层级：整张图放得进一个瓦片 */
+    minLevel: number;
+    /** 最大层级：全分辨率，ceil(log2(长边)) */
+    maxLevel: number;
+    /** 全部瓦片字节数 */
+    bytes: number;
+}
+
+const sources = manifest as Record<string, TileSource>;
+
+/**
+ * 查询原图对应的瓦片金字塔；未生成时返回 undefined
+ * @param originalSrc 原图路径，如 "/photography/Skitting/DSCF0192.jpg"
+ */
+export function getTileSource(originalSrc: string | undefined): TileSource | undefined {
+    if (!originalSrc) return undefined;
+    return sources[originalSrc];
+}
+
+/** 某层级的像素尺寸（每层为上一层的一半，向上取整） */
+export function levelSize(source: TileSource, level: number): { width: number; height: number } {
+    const scale = Math.pow(2, source.maxLevel - level);
+    return { width: Math.ceil(source.width / scale), height: Math.ceil(source.height / scale) };
+}
+
+/** 瓦片 URL */
+export function tileUrl(source: TileSource, level: number, col: number, row: number): string {
+    return `${source.tiles}/${level}/${col}_${row}.${source.format}`;
+}
@@ -0,0 +1,130 @@
+/**
+ * useBlurhash Hook - 将构建时生成的 BlurHash 解码为占位图
+ *
+ * BlurHash 由 scripts/placeholders.py 在优化图片时计算，存放在 asset-manifest.json。
+ * 客户端解码为 32px 的 data URL，作为 <img> 的背景，在原图加载完成前立即显示模糊预览。
+ */
+
+import { useEffect, useState, type CSSProperties } from 'react';
+import { getAsset } from '../data/assetManifest';
+
+const BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~';
+const DECODE_SIZE = 32;
+
+/** 已解码的占位图缓存（同一图片在多个组件中复用） */
+const dataUrlCache = new Map<string, string>();
+
+function decode83(str: string): number {
+    let value = 0;
+    for (const char of str) {
+        value = value * 83 + BASE83.indexOf(char);
+    }
+    return value;
+}
+
+function srgbToLinear(value: number): number {
+    const v = value / 255;
+    return v <= 0.04045 ? v / 12.92 : Math.pow((v + 0.055) / 1.055, 2.4);
+}
+
+function linearToSrgb(value: number): number {
+    const v = Math.max(0, Math.min(1, value));
+    return v <= 0.0031308
+        ? Math.round(v * 12.92 * 255)
+        : Math.round((1.055 * Math.pow(v, 1 / 2.4) - 0.055) * 255);
+}
+
+function signPow(value: number, exp: number): number {
+    return Math.sign(value) * Math.pow(Math.abs(value), exp);
+}
+
+/**
+ * 解码 BlurHash 为 RGBA 像素
+ */
+export function decodeBlurhash(hash: string, width: number, height: number): Uint8ClampedArray {
+    const sizeFlag = decode83(hash[0]);
+    const numX = (sizeFlag % 9) + 1;
+    const numY = Math.floor(sizeFlag / 9) + 1;
+    const maxValue = (decode83(hash[1]) + 1) / 166;
+
+    const colors: number[][] = [];
+    const dc = decode83(hash.substring(2, 6));
+    colors.push([srgbToLinear(dc >> 16), srgbToLinear((dc >> 8) & 255), srgbToLinear(dc & 255)]);
+    for (let i = 1; i < numX * numY; i++) {
+        const value = decode83(hash.substring(4 + i * 2, 6 + i * 2));
+        colors.push([
+            signPow((Math.floor(value / (19 * 19)) - 9) / 9, 2) * maxValue,
+            signPow((Math.floor(value / 19) % 19 - 9) / 9, 2) * maxValue,
+            signPow((value % 19 - 9) / 9, 2) * maxValue,
+        ]);
+    }
+
+    const pixels = new Uint8ClampedArray(width * height * 4);
+    for (let y = 0; y < height; y++) {
+        for (let x = 0; x < width; x++) {
+            let r = 0, g = 0, b = 0;
+            for (let j = 0; j < numY; j++) {
+                for (let i = 0; i < numX; i++) {
+                    const basis = Math.cos((Math.PI * x * i) / width) * Math.cos((Math.PI * y * j) / height);
+                    const color = colors[i + j * numX];
+                    r += color[0] * basis;
+                    g += color[1] * basis;
+                    b += color[2] * basis;
+                }
+            }
+            const offset = 4 * (x + y * width);
+            pixels[offset] = linearToSrgb(r);
+            pixels[offset + 1] = linearToSrgb(g);
+            pixels[offset + 2] = linearToSrgb(b);
+            pixels[offset + 3] = 255;
+        }
+    }
+    return pixels;
+}
+
+function blurhashToDataUrl(hash: string, aspect: number): string | undefined {
+    const cached = dataUrlCache.get(hash);
+    if (cached) return cached;
+
+    const width = aspect >= 1 ? DECODE_SIZE : Math.max(1, Math.round(DECODE_SIZE * aspect));
+    const height = aspect >= 1 ? Math.max(1, Math.round(DECODE_SIZE / aspect)) : DECODE_SIZE;
+    const canvas = document.createElement('canvas');
+    canvas.width = width;
+    canvas.height = height;
+    const ctx = canvas.getContext('2d');
+    if (!ctx) return undefined;
+
+    const imageData = ctx.createImageData(width, height);
+    imageData.data.set(decodeBlurhash(hash, width, height));
+    ctx.putImageData(imageData, 0, 0);
+    const url = canvas.toDataURL();
+    dataUrlCache.set(hash, url);
+    return url;
+}
+
+/**
+ * 返回可直接用于 <img style> 的占位背景；资源没有 BlurHash 时返回 undefined
+ *
+ * @param assetPath 图片在 asset-manifest 中的路径（未经 useBaseUrl 处理），如 "/img/yukari.webp"
+ */
+export function usePlaceholderStyle(assetPath: string | undefined): CSSProperties | undefined {
+    const asset = getAsset(assetPath);
+    const hash = asset?.blurhash;
+    const [dataUrl, setDataUrl] = useState<string | undefined>(() => (hash ? dataUrlCache.get(hash) : undefined));
+
+    useEffect(() => {
+        // canvas 仅在浏览器可用，SSR 阶段不解码
+        if (!hash || !asset) {
+            setDataUrl(undefined);
+            return;
+        }
+        setDataUrl(blurhashToDataUrl(hash, asset.width / asset.height));
+    }, [hash]);
+
+    if (!dataUrl) return undefined;
+    return {
+        backgroundImage: `url(${dataUrl})`,
+        backgroundSize: 'cover',
+        backgroundPosition: 'center',
+    };
+}
@@ -4,9 +4,11 @@
  * 专为 Fujifilm GFX100S + GF45mm f/2.8 设计
  * EXIF 数据在本地上传时通过 scripts/extract_exif.py 提取并保存为 JSON
  * 客户端仅读取预构建的 JSON，不进行任何图片请求
+ * 默认只按需加载当前系列的精简分片 (/photography/exif/<系列>.json)
  */
 
 import { useState, useEffect } from 'react';
+import { logicalPath } from '../data/assetManifest';
 
 export interface ExifData {
     // 相机信息
@@ -32,8 +34,11 @@ export interface ExifData {
     artist?: string;           // 创作者
     copyright?: string;        // 版权声明
 
-    // 富士特有
-    filmSimulation?: string;   // 胶片模拟模式
+    // 富士特有（构建时从 MakerNote 解析）
+    filmSimulation?: string;   // 胶片模拟模式 (e.g. "Classic Chrome")
+    grainEffect?: string;      // 颗粒效果强度 (Off / Weak / Strong)
+    grainSize?: string;        // 颗粒大小 (Off / Small / Large)
+    dynamicRange?: string;     // 动态范围 (e.g. "DR100", "DR400")
 
     // 图像信息
     width?: number;
@@ -43,35 +48,73 @@ export interface ExifData {
 export interface UseExifOptions {
     /** 是否启用，可用于条件加载 */
     enabled?: boolean;
+    /**
+     * 是否需要完整字段（序列号、版权等）。
+     * 默认只加载当前系列的精简分片；为 true 时加载完整的 exif.json。
+     */
+    full?: boolean;
 }
 
 /**
- * 全局 EXIF 缓存 - 存储预构建的 EXIF 数据
+ * 分片格式（由 scripts/extract_exif.py 生成）：
+ * defaults 为系列内所有照片相同的字段，photos 只保存各自不同的字段
  */
-let prebuiltExifCache: Record<string, ExifData> | null = null;
-let cacheLoadPromise: Promise<void> | null = null;
-
-async function loadPrebuiltCache(): Promise<void> {
-    if (prebuiltExifCache !== null) return;
-    if (cacheLoadPromise) {
-        await cacheLoadPromise;
-        return;
+interface ExifShard {
+    defaults: ExifData;
+    photos: Record<string, ExifData>;
+}
+
+/**
+ * 全局 EXIF 缓存 - 按分片（系列）缓存加载结果，key 为 "/系列/文件名"
+ */
+const shardCache = new Map<string, Promise<Record<string, ExifData>>>();
+let fullCachePromise: Promise<Record<string, ExifData>> | null = null;
+
+/** 不属于任何系列目录的照片所在分片 */
+const ROOT_SHARD = '_root';
+
+async function fetchJson<T>(url: string, fallback: T): Promise<T> {
+    try {
+        const response = await fetch(url);
+        return response.ok ? await response.json() : fallback;
+    } catch {
+        return fallback;
     }
+}
 
-    cacheLoadPromise = (async () => {
-        try {
-            const response = await fetch('/photography/exif.json');
-            if (response.ok) {
-                prebuiltExifCache = await response.json();
-            } else {
-                prebuiltExifCache = {};
+/**
+ * 只加载 cacheKey 所属系列的分片 (e.g. "/Skitting/DSCF0192.JPG" -> exif/Skitting.json)
+ */
+function loadPrebuiltCache(cacheKey: string): Promise<Record<string, ExifData>> {
+    const parts = cacheKey.replace(/^\//, '').split('/');
+    const series = parts.length > 1 ? parts[0] : ROOT_SHARD;
+    const prefix = series === ROOT_SHARD ? '/' : `/${series}/`;
+
+    let promise = shardCache.get(series);
+    if (!promise) {
+        promise = fetchJson<ExifShard>(
+            `/photography/exif/${encodeURIComponent(series)}.json`,
+            { defaults: {}, photos: {} }
+        ).then((shard) => {
+            const entries: Record<string, ExifData> = {};
+            for (const [name, data] of Object.entries(shard.photos)) {
+                entries[prefix + name] = { ...shard.defaults, ...data };
             }
-        } catch {
-            prebuiltExifCache = {};
-        }
-    })();
+            return entries;
+        });
+        shardCache.set(series, promise);
+    }
+    return promise;
+}
 
-    await cacheLoadPromise;
+/**
+ * 加载完整 exif.json（包含序列号等全部字段）
+ */
+function loadFullCache(): Promise<Record<string, ExifData>> {
+    if (!fullCachePromise) {
+        fullCachePromise = fetchJson<Record<string, ExifData>>('/photography/exif.json', {});
+    }
+    return fullCachePromise;
 }
 
 /**
@@ -84,7 +127,7 @@ export function useExif(
     imageUrl: string | undefined,
     options: UseExifOptions = {}
 ) {
-    const { enabled = true } = options;
+    const { enabled = true, full = false } = options;
 
     const [exif, setExif] = useState<ExifData | null>(null);
     const [loading, setLoading] = useState(false);
@@ -103,16 +146,19 @@ export function useExif(
             setError(null);
 
             try {
-                await loadPrebuiltCache();
-
                 // 从 URL 提取相对路径作为 key (e.g., "/photography/xxx/yyy.JPG" -> "/xxx/yyy.JPG")
-                const urlPath = new URL(imageUrl, window.location.origin).pathname;
+                // 指纹路径 (/hashed/...) 先还原为稳定路径，保证 key 一致
+                const urlPath = logicalPath(decodeURIComponent(new URL(imageUrl, window.location.origin).pathname));
                 const photographyMatch = urlPath.match(/\/photography(\/.*)/);
                 const cacheKey = photographyMatch ? photographyMatch[1] : null;
 
-                if (cacheKey && prebuiltExifCache && prebuiltExifCache[cacheKey]) {
+                const cache = cacheKey
+                    ? await (full ? loadFullCache() : loadPrebuiltCache(cacheKey))
+                    : null;
+
+                if (cacheKey && cache && cache[cacheKey]) {
                     if (!cancelled) {
-                        setExif(prebuiltExifCache[cacheKey]);
+                        setExif(cache[cacheKey]);
                     }
                 } else {
                     // 没有找到预构建数据，设置为空
@@ -137,7 +183,7 @@ export function useExif(
         return () => {
             cancelled = true;
         };
-    }, [imageUrl, enabled]);
+    }, [imageUrl, enabled, full]);
 
     return { exif, loading, error };
 }
@@ -0,0 +1,79 @@
+/**
+ * usePrefetch Hooks - 按 precache-manifest 预取接下来的照片
+ *
+ * usePrefetchNext：当前照片显示后，空闲时以低优先级请求同系列接下来的几张（受清单中的张数与字节预算限制），
+ * 翻到下一张时已在缓存中。Save-Data 或 2G/3G 网络下不预取。
+ * usePhotoServiceWorker：清单带 serviceWorker 时在生产环境注册 /sw.js（照片缓存优先，重复访问即时显示）；
+ * 不再生成时注销之前注册的 worker。
+ */
+
+import { useEffect } from 'react';
+import { useBaseUrlUtils } from '@docusaurus/useBaseUrl';
+import { prefetchCandidates, SERVICE_WORKER_URL } from '../data/precacheManifest';
+
+/** 先让当前照片的请求发出，再开始预取 */
+const PREFETCH_DELAY_MS = 500;
+const SERVICE_WORKER_PATH = '/sw.js';
+
+/** 本页已预取过的 URL（多个组件共享） */
+const prefetched = new Set<string>();
+
+interface NetworkInformation {
+    saveData?: boolean;
+    effectiveType?: string;
+}
+
+function connectionAllowsPrefetch(): boolean {
+    const connection = (navigator as Navigator & { connection?: NetworkInformation }).connection;
+    if (!connection) return true;
+    return !connection.saveData && !/2g|3g/.test(connection.effectiveType ?? '');
+}
+
+/**
+ * 预取系列中当前照片之后的几张
+ * @param series 系列名，如 "Skitting" / "artworks"
+ * @param current 正在显示的照片稳定路径；未显示时传 undefined
+ * @param wrap 画廊到末尾后是否循环
+ */
+export function usePrefetchNext(series: string, current: string | string[] | undefined, wrap = true) {
+    const { withBaseUrl } = useBaseUrlUtils();
+    const urls = prefetchCandidates(series, current, wrap).map((entry) => withBaseUrl(entry.url));
+    const key = urls.join('\n');
+
+    useEffect(() => {
+        if (!key || !connectionAllowsPrefetch()) return;
+        const timer = window.setTimeout(() => {
+            for (const url of key.split('\n')) {
+                if (prefetched.has(url)) continue;
+                prefetched.add(url);
+                // 与 <img> 相同的请求（Accept 头一致），经过 service worker 时同时写入其缓存
+                const image = new Image();
+                image.decoding = 'async';
+                image.setAttribute('fetchpriority', 'low');
+                image.src = url;
+            }
+        }, PREFETCH_DELAY_MS);
+        return () => window.clearTimeout(timer);
+    }, [key]);
+}
+
+/**
+ * 注册（或注销）照片缓存 service worker，在 Root 中调用一次
+ */
+export function usePhotoServiceWorker() {
+    const { withBaseUrl } = useBaseUrlUtils();
+    const scriptUrl = withBaseUrl(SERVICE_WORKER_URL ?? SERVICE_WORKER_PATH);
+
+    useEffect(() => {
+        if (process.env.NODE_ENV !== 'production' || !('serviceWorker' in navigator)) return;
+        if (SERVICE_WORKER_URL) {
+            navigator.serviceWorker.register(scriptUrl).catch(() => undefined);
+            return;
+        }
+        navigator.serviceWorker.getRegistrations().then((registrations) => {
+            for (const registration of registrations) {
+                if (registration.active?.scriptURL.endsWith(scriptUrl)) registration.unregister();
+            }
+        });
+    }, [scriptUrl]);
+}
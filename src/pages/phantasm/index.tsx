@@ -35,10 +35,10 @@ import Layout from '@theme/Layout';
 import Link from '@docusaurus/Link';
 import Head from '@docusaurus/Head';
 import Translate, { translate } from '@docusaurus/Translate';
-import useBaseUrl from '@docusaurus/useBaseUrl';
 import { motion, AnimatePresence } from 'framer-motion';
 import { ChevronLeft, ChevronRight } from 'lucide-react';
 import { useExif, formatExifSettings } from '../../hooks/useExif';
+import SpriteImage from '../../components/SpriteImage';
 import styles from '../index.module.css';
 
 // 词典释义数据
@@ -643,8 +643,10 @@ export default function Phantasm() {
                                                 position: 'relative',
                                                 overflow: 'hidden',
                                             }}>
-                                                <img
-                                                    src={useBaseUrl(currentSeries.coverImage)}
+                                                {/* 四个系列封面共用一张图集，切换系列不再发起新请求 */}
+                                                <SpriteImage
+                                                    group="phantasm"
+                                                    src={currentSeries.coverImage}
                                                     alt={currentSeries.defaultTitle}
                                                     style={{
                                                         width: '100%',
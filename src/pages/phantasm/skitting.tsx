@@ -10,6 +10,9 @@ import Translate, { translate } from '@docusaurus/Translate';
 import useBaseUrl from '@docusaurus/useBaseUrl';
 import { motion, AnimatePresence } from 'framer-motion';
 import { ChevronLeft, ChevronRight, X } from 'lucide-react';
+import SpriteImage from '../../components/SpriteImage';
+import { assetUrl } from '../../data/assetManifest';
+import { usePrefetchNext } from '../../hooks/usePrefetch';
 import styles from '../index.module.css';
 
 // 照片数据
@@ -161,6 +164,17 @@ function PhotoItem({ photo, onClick, isFirst }: PhotoItemProps) {
         setShowTooltip(false);
     };
 
+    const webImageUrl = useBaseUrl(photo.webImage);
+    const imageStyle: React.CSSProperties = {
+        width: '100%',
+        height: 'auto',
+        aspectRatio: photo.aspectRatio,
+        objectFit: 'cover',
+        display: 'block',
+        boxShadow: '0 4px 16px rgba(0,0,0,0.1)',
+        transition: 'box-shadow 0.3s ease',
+    };
+
     return (
         <div
             style={{
@@ -174,20 +188,17 @@ function PhotoItem({ photo, onClick, isFirst }: PhotoItemProps) {
                 onMouseMove={handleMouseMove}
                 onMouseLeave={handleMouseLeave}
             >
-                <img
-                    src={useBaseUrl(photo.webImage)}
-                    alt={photo.title}
-                    style={{
-                        width: '100%',
-                        height: 'auto',
-                        aspectRatio: photo.aspectRatio,
-                        objectFit: 'cover',
-                        display: 'block',
-                        boxShadow: '0 4px 16px rgba(0,0,0,0.1)',
-                        transition: 'box-shadow 0.3s ease',
-                    }}
-                    loading="lazy"
-                />
+                {/* 第一张占满整行，用全尺寸图；其余卡片共用一张缩略图图集 */}
+                {isFirst ? (
+                    <img
+                        src={webImageUrl}
+                        alt={photo.title}
+                        style={imageStyle}
+                        loading="lazy"
+                    />
+                ) : (
+                    <SpriteImage group="Skitting" src={photo.webImage} alt={photo.title} style={imageStyle} loading="lazy" />
+                )}
                 {/* 右下角小提示 - 只在鼠标位于下半部分时显示 */}
                 <AnimatePresence>
                     {showTooltip && (
@@ -319,7 +330,7 @@ function PhotoDetailModal({ photo, onClose, onPrev, onNext }: PhotoDetailModalPr
                 <div style={{ flex: '1 1 auto', maxWidth: '70vw', minWidth: '300px' }}>
                     <a href={useBaseUrl(photo.hiResImage)} target="_blank" rel="noopener noreferrer">
                         <img
-                            src={useBaseUrl(photo.webImage)}
+                            src={useBaseUrl(assetUrl(photo.webImage))}
                             alt={photo.title}
                             style={{
                                 width: '100%',
@@ -399,6 +410,8 @@ function PhotoDetailModal({ photo, onClose, onPrev, onNext }: PhotoDetailModalPr
 
 export default function Skitting() {
     const [selectedPhoto, setSelectedPhoto] = useState<typeof photos[0] | null>(null);
+    // 弹窗打开时预取后面几张，翻页即时显示
+    usePrefetchNext('Skitting', selectedPhoto?.webImage);
 
     const handlePrev = () => {
         if (!selectedPhoto) return;
@@ -1,9 +1,10 @@
 import React, { useEffect } from 'react';
 import Head from '@docusaurus/Head';
+import { usePhotoServiceWorker } from '../hooks/usePrefetch';
 
 /**
  * Root 组件 - 包裹整个应用
- * 用于添加全局配置，如非阻塞字体加载
+ * 用于添加全局配置，如非阻塞字体加载、照片缓存 service worker
  */
 
 // 字体 URL（已包含 display=swap）
@@ -18,6 +19,9 @@ export default function Root({ children }: { children: React.ReactNode }) {
         document.head.appendChild(link);
     }, []);
 
+    // 照片缓存 service worker（scripts/build_precache.py --service-worker 生成）
+    usePhotoServiceWorker();
+
     return (
         <>
             <Head>